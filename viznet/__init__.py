@@ -1,11 +1,54 @@
-from .context import DynamicShow
-from .edgenode import Edge, Node, Pin
-from .brush import Brush, NodeBrush, EdgeBrush, CLinkBrush, CurveBrush, pin
-from .cluster import node_sequence, node_ring, connect121, connecta2a
-from .circuit import QuantumCircuit
-from .grid import Grid
-from .parsecircuit import dict2circuit, vizcode
-
-from . import theme, setting, shapes
-from . import parsecircuit
+'''
+viznet - a network visualization toolbox.
+
+Names are loaded lazily, a submodule (and its matplotlib dependencies) is imported on the first access of a name it defines.
+'''
+
+import importlib
+
 from .version import __version__
+
+_LAZY_ATTRS = {
+    'DynamicShow': 'context',
+    'Canvas': 'canvas',
+    'Edge': 'edgenode', 'Node': 'edgenode', 'Pin': 'edgenode',
+    'NodeCollection': 'edgenode', 'EdgeCollection': 'edgenode',
+    'NodeStore': 'edgenode', 'NodeHandle': 'edgenode',
+    'Brush': 'brush', 'NodeBrush': 'brush', 'EdgeBrush': 'brush',
+    'CLinkBrush': 'brush', 'RouteBrush': 'brush', 'CurveBrush': 'brush', 'pin': 'brush',
+    'node_sequence': 'cluster', 'node_ring': 'cluster', 'connect121': 'cluster', 'connecta2a': 'cluster',
+    'QuantumCircuit': 'circuit',
+    'Grid': 'grid',
+    'dict2circuit': 'parsecircuit', 'vizcode': 'parsecircuit',
+    'register_shape': 'shapes',
+    'Scene': 'scene', 'SceneNodes': 'scene',
+    'write_svg': 'svg',
+    'SpatialIndex': 'spatial',
+    'OrthogonalRouter': 'routing', 'PolylineRouter': 'routing',
+    'draw_density': 'raster',
+    'force_layout': 'layout', 'spectral_layout': 'layout', 'layered_layout': 'layout',
+    'component_layout': 'layout', 'IncrementalLayout': 'layout',
+    'LayoutCache': 'cache',
+}
+'''
+names exported by viznet, and the submodules defining them.
+'''
+
+_SUBMODULES = ['theme', 'setting', 'shapes', 'parsecircuit']
+
+__all__ = list(_LAZY_ATTRS) + _SUBMODULES + ['__version__']
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module('.' + _LAZY_ATTRS[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,19 @@
-import pdb
+import copy
+import math
 import numbers
+from collections import namedtuple
+from functools import lru_cache
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib import patches, transforms
+from matplotlib.collections import PathCollection, LineCollection, PolyCollection, EllipseCollection
+from matplotlib.lines import Line2D
 from matplotlib.path import Path
 from numpy.linalg import norm
 
-from .edgenode import Edge, Node, Pin, _node
+from .edgenode import Edge, Node, Pin, NodeCollection, EdgeCollection, _node
+from .raster import draw_density
 from .theme import NODE_THEME_DICT, BLUE
-from .utils import rotate
+from .utils import rotate, get_ax
 from .setting import node_setting, edge_setting
 from .import shapes
 
@@ -17,13 +22,27 @@ class Brush(object):
     pass
 
 
+NodeStyle = namedtuple('NodeStyle', ['theme', 'size', 'is_rectangular', 'lw', 'edgecolor', 'inner_style'])
+NodeStyle.__doc__ = '''
+Resolved style of a :obj:`NodeBrush`.
+
+Attributes:
+    theme (tuple): color, shape and inner shape (:obj:`Shape` instances, or 'none' for no inner shape).
+    size (1darray): size of nodes (read only).
+    is_rectangular (bool): the shape is a rectangle.
+    lw (float): line width.
+    edgecolor (str): edge color.
+    inner_style (tuple): facecolor, edgecolor and line width of the inner shape.
+'''
+
+
 class NodeBrush(Brush):
     '''
     a brush class used to draw node.
 
     Attributes:
         style (str): refer keys for `viznet.theme.NODE_THEME_DICT`.
-        ax (:obj:`Axes`): matplotlib Axes instance.
+        ax (:obj:`Axes`|:obj:`Canvas`|None): matplotlib Axes instance, a canvas, or None to use the current axes of pyplot.
         color (str|None): the color of painted node by this brush, it will overide theme color if is not `None`.
         size ('huge'|'large'|'normal'|'small'|'tiny'|'dot'|tuple|float): size of node.
         roundness (float): the roundness of edges.
@@ -31,6 +50,7 @@ class NodeBrush(Brush):
         rotate (float): angle for rotation.
         ls (str): line style.
         props (dict): other arguments passed to handler.
+        store (:obj:`NodeStore`|None): store to keep nodes, a new store is used for each batch if None.
     '''
     setting = node_setting
 
@@ -43,7 +63,7 @@ class NodeBrush(Brush):
         'dot': 0.05,
     }
 
-    def __init__(self, style, ax=None, color=None, size='normal', roundness=0, zorder=0, rotate=0., ls='-', lw=None, edgecolor=None, props=None):
+    def __init__(self, style, ax=None, color=None, size='normal', roundness=0, zorder=0, rotate=0., ls='-', lw=None, edgecolor=None, props=None, store=None):
         self.style = style
         self.size = size
         self.ax = ax
@@ -56,44 +76,81 @@ class NodeBrush(Brush):
         self.node_handler = basicgeometry_handler
         self.props = props if props is not None else {}
         self.roundness = roundness
+        self.store = store
+        # the collection (and the resolved style) single nodes in the store are appended to.
+        self._last_collection = None
+
+    def __setattr__(self, name, value):
+        # changing a public attribute invalidates the resolved style.
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            object.__setattr__(self, '_resolved', None)
+
+    @property
+    def style(self):
+        return self._style_key
+
+    @style.setter
+    def style(self, style):
+        # check shapes early, they are resolved in `resolved`.
+        self._style_key = style
+        color, geo, inner_geo = self._theme = tuple(self._style)
+        shapes.get_shape(geo)
+        if inner_geo != 'none':
+            shapes.get_shape(inner_geo)
+
+    @property
+    def resolved(self):
+        '''
+        :obj:`NodeStyle`: the resolved style, recompiled only if attributes of this brush or the `setting` change.
+        '''
+        version = getattr(self.setting, 'version', None)
+        if self._resolved is None or version is None or self._resolved_version != version:
+            self._resolved = self._resolve()
+            self._resolved_version = version
+        return self._resolved
+
+    def _resolve(self):
+        is_rectangular = self._style[1] in ['rectangle']
+        size = self.size_dict[self.size] if isinstance(self.size, str) else self.size
+        if is_rectangular and np.ndim(size)==0:
+            size = [size, size]
+        size = np.array(size)
+        size.setflags(write=False)
+        setting = self.setting
+        # resolve shapes once, instead of on every node.
+        color, geo, inner_geo = self._theme
+        theme = (color, shapes.get_shape(geo), inner_geo if inner_geo == 'none' else shapes.get_shape(inner_geo))
+        return NodeStyle(theme=theme, size=size, is_rectangular=is_rectangular,
+                lw=setting['lw'] if self.lw is None else self.lw,
+                edgecolor=setting['edgecolor'] if self.edgecolor is None else self.edgecolor,
+                inner_style=(setting['inner_facecolor'], setting['inner_edgecolor'], setting['inner_lw']))
 
     @property
     def is_rectangular(self):
-        return self._style[1] in ['rectangle']
+        return self.resolved.is_rectangular
 
     @property
     def _size(self):
-        if isinstance(self.size, str):
-            size = self.size_dict[self.size]
-        else:
-            size = self.size
-        if self.is_rectangular and np.ndim(size)==0:
-            size = [size, size]
-        return np.asarray(size)
+        return self.resolved.size
 
     def __rshift__(self, xy):
         '''
-        add a node.
+        add a node, or a batch of nodes.
 
         Args:
-            xy (tuple): position.
+            xy (tuple|2darray): position, or an array of positions with shape (N, 2).
 
         Returns:
-            :obj:`Node`: node object.
+            :obj:`Node`|:obj:`NodeCollection`: node object (a :obj:`NodeHandle` if the brush has a store),
+                or a vectorized node handle if a batch of positions is given.
         '''
-        # color priority: brush color > theme color
-        ax = plt.gca() if self.ax is None else self.ax
-        # override color
-        if self.color is not None:
-            color = self.color
-        lw = self.lw
-        edgecolor = self.edgecolor
-        if lw is None:
-            lw = self.setting['lw']
-        if edgecolor is None:
-            edgecolor = self.setting['edgecolor']
-
-        theme_code = self._style
+        ax = get_ax(self.ax)
+        if np.ndim(xy) == 2:
+            return self._place_batch(ax, np.asarray(xy, dtype='float64'))
+        if self.store is not None and not isinstance(xy[0], slice) and not isinstance(xy[1], slice):
+            # keep the node in the store.
+            return self._place_single(ax, np.asarray(xy, dtype='float64')[None])
 
         # get the size and position
         size = self._size
@@ -103,8 +160,7 @@ class NodeBrush(Brush):
             size = (size[0] + abs(xstop - xstart)/2., size[1] + abs(ystop - ystart)/2.)
             xy = (xstop + xstart)/2., (ystart + ystop)/2.
 
-        objs = self.node_handler(theme_code, xy, size, self.roundness, facecolor=self.color,
-                lw = lw, edgecolor=edgecolor, ls=self.ls, zorder=self.zorder, angle=self.rotate, props=self.props)
+        objs = self._make_patches(xy, size)
 
         # add patches
         for p in objs:
@@ -113,12 +169,82 @@ class NodeBrush(Brush):
         node = Node(objs, xy, self)
         return node
 
+    def _make_patches(self, xy, size):
+        '''create (but not add) the patches of a node.'''
+        style = self.resolved
+        kwargs = {'inner_style': style.inner_style} if self.node_handler is basicgeometry_handler else {}
+        # color priority: brush color > theme color
+        return self.node_handler(style.theme, xy, size, self.roundness, facecolor=self.color,
+                lw=style.lw, edgecolor=style.edgecolor, ls=self.ls, zorder=self.zorder, angle=self.rotate, props=self.props, **kwargs)
+
+    def _place_batch(self, ax, xys):
+        '''
+        add a batch of nodes, each layer of patches (shape, inner shape, ...) becomes a single collection.
+        '''
+        # build the patches once at the origin, and translate them to every position.
+        templates = self._make_patches((0., 0.), self._size)
+        objs = []
+        for patch in templates:
+            objs.append(_patch_collection(patch, xys))
+            ax.add_collection(objs[-1])
+        return NodeCollection(objs, xys, templates, copy.copy(self), store=self.store)
+
+    def _place_single(self, ax, xys):
+        '''
+        add a node to the store, it is appended to the collection of the last node placed by this brush if the style, axes and store are unchanged.
+        '''
+        style = self.resolved
+        last = self._last_collection
+        if last is None or last[1] is not style or last[0].ax is not ax or last[0].store is not self.store:
+            collection = self._place_batch(ax, xys)
+            self._last_collection = (collection, style)
+            return collection[0]
+        collection = last[0]
+        for obj, patch in zip(collection.objs, collection.templates):
+            _extend_patch_collection(obj, patch, xys)
+        return collection.store[collection._extend(xys)[0]]
+
+    def _place_layer(self, ax, xys, tier='full'):
+        '''
+        add a batch of nodes as artists drawing one node at many offsets, they are moved by `_set_offsets` without rebuilding,
+        in a level of detail: nodes for tier 'full', plain discs (squares for rectangular nodes) for tier 'disc',
+        single pixels for tier 'point' and nothing for tier 'drop'.
+
+        Returns:
+            tuple: artists, and templates (un-added patches of a node placed at the origin).
+        '''
+        templates = self._make_patches((0., 0.), self._size)
+        primary = templates[0]
+        facecolor = primary.get_facecolor()
+        color = facecolor if primary.get_fill() and facecolor[3] > 0 else primary.get_edgecolor()
+        # shapes are in data units relative to offsets.
+        delta = transforms.AffineDeltaTransform(ax.transData)
+        if tier == 'full':
+            objs = [_patch_collection(patch, np.zeros([1, 2]), offsets=xys, offset_transform=ax.transData, transform=delta)
+                    for patch in templates]
+        elif tier == 'drop':
+            objs = []
+        elif tier == 'point':
+            objs = ax.plot(xys[:, 0], xys[:, 1], ls='none', marker=',', color=color, zorder=self.zorder)
+        elif self.is_rectangular:
+            corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * self._size
+            objs = [PolyCollection([corners], offsets=xys, offset_transform=ax.transData, transform=delta,
+                facecolors=[color], linewidths=0, zorder=self.zorder)]
+        else:
+            diameter = 2 * np.max(self._size)
+            objs = [EllipseCollection(diameter, diameter, 0, units='xy', offsets=xys, offset_transform=ax.transData,
+                facecolors=[color], linewidths=0, zorder=self.zorder)]
+        for obj in objs:
+            if tier != 'point':
+                ax.add_collection(obj)
+        return objs, templates
+
     @property
     def _style(self):
-        if isinstance(self.style, str):
-            return NODE_THEME_DICT[self.style]
+        if isinstance(self._style_key, str):
+            return NODE_THEME_DICT[self._style_key]
         else:
-            return self.style
+            return self._style_key
 
     def _get_range(self, x):
         if isinstance(x, slice):   # gridwise operation.
@@ -133,18 +259,22 @@ class EdgeBrush(Brush):
     a brush for drawing edges.
 
     Attributes:
-        style (str): the style of edge, must be a combination of ('>'|'<'|'-'|'.').
+        style (str): the style of edge, must be a combination of ('>'|'<'|'-'|'.'|'='), with at least one line segment.
             * '>', right arrow
             * '<', left arrow,
             * '-', line,
-            * '.', dashed line.
-        ax (:obj:`Axes`): matplotlib Axes instance.
+            * '.', dashed line,
+            * '=', double line.
+        ax (:obj:`Axes`|:obj:`Canvas`|None): matplotlib Axes instance, a canvas, or None to use the current axes of pyplot.
         lw (float): line width.
         color (str): the color of painted edge by this brush.
+        template (:obj:`EdgeStyle`): the compiled style.
+        density (bool|'auto'): draw batches of edges as a density image under nodes (see :func:`viznet.raster.draw_density`),
+            'auto' to do it for batches larger than `edge_setting['density_threshold']`.
     '''
     setting = edge_setting
 
-    def __init__(self, style, ax=None, lw=1, color='k', zorder=0, solid_capstyle='butt'):
+    def __init__(self, style, ax=None, lw=1, color='k', zorder=0, solid_capstyle='butt', density='auto'):
         self.lw = lw
         self.color = color
         self.ax = ax
@@ -152,22 +282,37 @@ class EdgeBrush(Brush):
         self.zorder = zorder
         self.line_handler = basicline_handler
         self.solid_capstyle = solid_capstyle
+        self.density = density
+
+    @property
+    def style(self):
+        return self._style
+
+    @style.setter
+    def style(self, style):
+        # compile once, edges only apply an affine map to the template.
+        self.template = compile_style(style)
+        self._style = style
 
     def __rshift__(self, startend):
         '''
         connect start node and end node
 
         Args:
-            startend (tuple): start node (position) and end node (position).
+            startend (tuple): start node (position) and end node (position),
+                either of them can be a batch (:obj:`NodeCollection`, a list of nodes or an array of positions with shape (N, 2)).
 
         Returns:
-            :obj:`Edge`: edge object.
+            :obj:`Edge`|:obj:`EdgeCollection`: edge object, or a vectorized edge handle if a batch is given.
         '''
-        ax = plt.gca() if self.ax is None else self.ax
+        ax = get_ax(self.ax)
         lw = self.lw
         head_length = self.setting['arrow_head_length'] * lw
         head_width = self.setting['arrow_head_width'] * lw
 
+        if _is_batch(startend[0]) or _is_batch(startend[1]):
+            return self._connect_batch(ax, startend[0], startend[1])
+
         # get start position and end position
         start, end = _node(startend[0]), _node(startend[1])
         sxy, exy = np.asarray(start.position), np.asarray(end.position)
@@ -177,10 +322,34 @@ class EdgeBrush(Brush):
         exy = end.get_connection_point(-unit_d)
 
         arrows, lines = self.line_handler(sxy, exy, self.style, head_length)
+        lines = _double_lines(lines, lw)
         objs = _arrows(ax, arrows, head_width=head_width, head_length=head_length, lw=lw, zorder=self.zorder, color=self.color)
         objs += _lines(ax, lines, lw=lw, color=self.color, zorder=self.zorder, use_path=False, solid_capstyle=self.solid_capstyle)
         return Edge(objs, sxy, exy, start, end, brush=self)
 
+    def _connect_batch(self, ax, start, end):
+        '''connect a batch of start nodes and end nodes, lines of the same style are drawn as one collection.'''
+        lw = self.lw
+        head_length = self.setting['arrow_head_length'] * lw
+        head_width = self.setting['arrow_head_width'] * lw
+
+        spos, sconnect = _batch_points(start)
+        epos, econnect = _batch_points(end)
+        spos, epos = np.broadcast_arrays(spos, epos)
+        if self.density is True or (self.density == 'auto' and len(spos) > self.setting['density_threshold']):
+            # edges end at node centers, arrows are not drawn.
+            obj = draw_density(ax, spos, epos, color=self.color, cmap=self.setting['density_cmap'], zorder=self.zorder - 1)
+            return EdgeCollection([obj], spos, epos, start, end, brush=self)
+        d = epos - spos
+        unit_d = d / norm(d, axis=-1, keepdims=True)
+        sxy, exy = np.broadcast_arrays(sconnect(unit_d), econnect(-unit_d))
+
+        arrows, lines = self.line_handler(sxy, exy, self.style, head_length)
+        lines = _double_lines(lines, lw)
+        objs = _arrows(ax, arrows, head_width=head_width, head_length=head_length, lw=lw, zorder=self.zorder, color=self.color)
+        objs += _line_collections(ax, lines, lw=lw, color=self.color, zorder=self.zorder, solid_capstyle=self.solid_capstyle)
+        return EdgeCollection(objs, sxy, exy, start, end, brush=self)
+
 class CLinkBrush(EdgeBrush):
     '''
     Brush for C type link.
@@ -189,7 +358,7 @@ class CLinkBrush(EdgeBrush):
         style (str): e.g. '<->', right-side grow with respect to the line direction.
     '''
     def __init__(self, style, ax=None, offsets=(0.2,), roundness=0, lw=1, color='k', zorder=0, solid_capstyle='butt'):
-        super(CLinkBrush, self).__init__(style, ax=ax, lw=lw, color=color, zorder=zorder, solid_capstyle=solid_capstyle)
+        super(CLinkBrush, self).__init__(style, ax=ax, lw=lw, color=color, zorder=zorder, solid_capstyle=solid_capstyle, density=False)
         self.roundness = roundness
         self.offsets = list(offsets)
         self.line_handler = clink_handler
@@ -204,7 +373,7 @@ class CLinkBrush(EdgeBrush):
         Returns:
             :obj:`Edge`: edge object.
         '''
-        ax = plt.gca() if self.ax is None else self.ax
+        ax = get_ax(self.ax)
         lw = self.lw
         head_length = self.setting['arrow_head_length'] * lw
         head_width = self.setting['arrow_head_width'] * lw
@@ -218,13 +387,81 @@ class CLinkBrush(EdgeBrush):
         objs += _lines(ax, lines, lw=lw, color=self.color, zorder=self.zorder, use_path=True, solid_capstyle=self.solid_capstyle)
         return Edge(objs, sxy_, exy_, start, end, brush=self)
 
+class RouteBrush(EdgeBrush):
+    '''
+    Brush for polyline links, e.g. orthogonal links routed around nodes by a router.
+
+    Attributes:
+        style (str): e.g. '->', '<->' or '->-', arrows at ends (or in the middle) and exactly 1 line style code.
+        router (:obj:`OrthogonalRouter`|:obj:`PolylineRouter`): the router, obstacles of an :obj:`OrthogonalRouter` are usually all nodes of the diagram.
+        roundness (float): radius of rounded corners.
+    '''
+    def __init__(self, style, router, ax=None, roundness=0, lw=1, color='k', zorder=0, solid_capstyle='butt'):
+        super(RouteBrush, self).__init__(style, ax=ax, lw=lw, color=color, zorder=zorder, solid_capstyle=solid_capstyle, density=False)
+        self.router = router
+        self.roundness = roundness
+        self.line_handler = route_handler
+
+    def __rshift__(self, startend):
+        '''
+        connect start node and end node
+
+        Args:
+            startend (tuple): start node (position) and end node (position), either of them can be a batch.
+
+        Returns:
+            :obj:`Edge`|:obj:`EdgeCollection`: edge object, or a vectorized edge handle if a batch is given.
+        '''
+        ax = get_ax(self.ax)
+        lw = self.lw
+        head_length = self.setting['arrow_head_length'] * lw
+        head_width = self.setting['arrow_head_width'] * lw
+
+        if _is_batch(startend[0]) or _is_batch(startend[1]):
+            return self._connect_batch(ax, startend[0], startend[1])
+
+        start, end = _node(startend[0]), _node(startend[1])
+        vertices = self.router.route(np.asarray(start.position), np.asarray(end.position))
+        sdirection, edirection = _route_directions([vertices])
+        vertices[0] = start.get_connection_point(sdirection[0])
+        vertices[-1] = end.get_connection_point(edirection[0])
+
+        arrows, lines = self.line_handler(vertices, self.style, self.roundness, head_length, lw)
+        objs = _arrows(ax, arrows, head_width=head_width, head_length=head_length, lw=lw, zorder=self.zorder, color=self.color)
+        objs += _lines(ax, lines, lw=lw, color=self.color, zorder=self.zorder, use_path=True, solid_capstyle=self.solid_capstyle)
+        return Edge(objs, vertices[0], vertices[-1], start, end, brush=self)
+
+    def _connect_batch(self, ax, start, end):
+        '''route a batch of edges together, so that they share channels, paths of the same style are drawn as one collection.'''
+        lw = self.lw
+        head_length = self.setting['arrow_head_length'] * lw
+        head_width = self.setting['arrow_head_width'] * lw
+
+        spos, sconnect = _batch_points(start)
+        epos, econnect = _batch_points(end)
+        spos, epos = np.broadcast_arrays(spos, epos)
+        routes = self.router.route_many(spos, epos)
+        sdirection, edirection = _route_directions(routes)
+        sxy, exy = sconnect(sdirection), econnect(edirection)
+
+        arrows, paths = [], {}
+        for vertices, sxy_, exy_ in zip(routes, sxy, exy):
+            vertices[0], vertices[-1] = sxy_, exy_
+            arrows_, lines = self.line_handler(vertices, self.style, self.roundness, head_length, lw)
+            arrows.extend(arrows_)
+            for ls, path in lines:
+                paths.setdefault(ls, []).append(path)
+        objs = _arrows(ax, arrows, head_width=head_width, head_length=head_length, lw=lw, zorder=self.zorder, color=self.color)
+        objs += _path_collections(ax, paths, lw=lw, color=self.color, zorder=self.zorder, solid_capstyle=self.solid_capstyle)
+        return EdgeCollection(objs, sxy, exy, start, end, brush=self)
+
 class CurveBrush(Brush):
     '''
     a brush for drawing edges.
 
     Attributes:
         style (str): the style of edge, same as arrowprops in https://matplotlib.org/api/_as_gen/matplotlib.pyplot.annotate.html.
-        ax (:obj:`Axes`): matplotlib Axes instance.
+        ax (:obj:`Axes`|:obj:`Canvas`|None): matplotlib Axes instance, a canvas, or None to use the current axes of pyplot.
         lw (float): line width.
         color (str): the color of painted edge by this brush.
     '''
@@ -249,7 +486,7 @@ class CurveBrush(Brush):
         Returns:
             :obj:`Edge`: edge object.
         '''
-        ax = plt.gca() if self.ax is None else self.ax
+        ax = get_ax(self.ax)
         lw = self.lw
         head_length = self.setting['arrow_head_length'] * lw
         head_width = self.setting['arrow_head_width'] * lw
@@ -321,53 +558,162 @@ def rounded_path(vertices, roundness):
     vertices_new.append(vertices[-1])
     return Path(vertices_new, codes)
 
-def basicline_handler(sxy, exy, style, head_length):
-    '''draw a line between start and end.'''
-    # the distance and unit distance
-    d = np.asarray(exy) - sxy
-    unit_d = d / norm(d)
+def route_handler(vertices, style, roundness, head_length, lw=1):
+    '''
+    arrows and the path of a routed link, `vertices` are the route from the start connection point to the end connection point.
 
-    # get arrow locations.
+    A double line is made of two paths, offset to both sides by the half space of double lines.
+    '''
+    vertices = np.array(vertices, dtype='float64')
     arrows = []
-    segs = []
+    # arrows at ends point along the route for '>', and backward for '<'.
+    for i, inward, code in [(0, 1, style[0]), (-1, -1, style[-1])]:
+        if code not in ['<', '>'] or len(style) < 2:
+            continue
+        d = vertices[i+inward] - vertices[i]
+        head_vec = d / norm(d) * head_length
+        arrows.append((vertices[i] + head_vec * 0.6, head_vec / head_length * inward * (1 if code == '>' else -1)))
+        vertices[i] = vertices[i] + head_vec
+        style = style[1:] if i == 0 else style[:-1]
+
+    # an arrow in the middle, at half length of the route.
+    if len(style) == 3 and style[1] in ['<', '>'] and style[0] == style[2]:
+        segs = np.diff(vertices, axis=0)
+        lengths = norm(segs, axis=1)
+        k = min(np.searchsorted(np.cumsum(lengths), lengths.sum() / 2.), len(segs) - 1)
+        unit_d = segs[k] / lengths[k]
+        mxy = vertices[k+1] - unit_d * (lengths[:k+1].sum() - lengths.sum() / 2.)
+        arrows.append((mxy, unit_d * (1 if style[1] == '>' else -1)))
+        style = style[0]
+    if len(style) != 1:
+        raise ValueError('style must contain exactly 1 line style code.')
+    if style == '=':
+        offset = _miter_normals(vertices) * (edge_setting['doubleline_space'] * lw)
+        return arrows, [('-', rounded_path(vertices + offset, roundness)), ('-', rounded_path(vertices - offset, roundness))]
+    return arrows, [(style, rounded_path(vertices, roundness))]
+
+def _miter_normals(vertices):
+    '''left normals at vertices of a polyline, scaled at corners so that offset segments keep a unit distance.'''
+    d = np.diff(vertices, axis=0)
+    normal = d[:, ::-1] * [-1, 1] / norm(d, axis=1, keepdims=True)
+    pre, nex = np.concatenate([normal[:1], normal]), np.concatenate([normal, normal[-1:]])
+    cos = (pre * nex).sum(axis=1, keepdims=True)
+    # a turn back keeps the normal of the previous segment.
+    return np.where(cos > -1 + 1e-8, (pre + nex) / np.maximum(1 + cos, 1e-8), pre)
+
+def _route_directions(routes):
+    '''unit vectors pointing from ends of routes into the routes, for start points and end points.'''
+    d = np.array([[vertices[1] - vertices[0], vertices[-2] - vertices[-1]] for vertices in routes], dtype='float64').reshape(-1, 2, 2)
+    d /= norm(d, axis=-1, keepdims=True)
+    return d[:, 0], d[:, 1]
+
+EdgeStyle = namedtuple('EdgeStyle', ['styles', 'signs', 'points'])
+EdgeStyle.__doc__ = '''
+A compiled edge style, points are parametrized as `sxy + a * d + b * head_length * unit_d`,
+with `d` the vector from start to end.
+
+Attributes:
+    styles (tuple): line styles of lines, a double line '=' is split into two lines when drawn (see `_double_lines`).
+    signs (tuple): arrow heads point to `sign * unit_d`.
+    points (2darray): (a, b) of start and end points of lines, followed by centers of arrow heads.
+'''
+
+@lru_cache(maxsize=None)
+def compile_style(style):
+    '''
+    compile an edge style.
+
+    Args:
+        style (str): the style of edge, a combination of ('>'|'<'|'-'|'.'|'=').
+
+    Returns:
+        :obj:`EdgeStyle`: the compiled style.
+    '''
+    segs = [s for s in style if s not in '<>']
+    num_segs = len(segs)
+    if num_segs == 0:
+        raise ValueError('style %r contains no line segment.' % (style,))
+
+    # an arrow after k segments sits at k/n of the edge (shortened by 1.2 head length).
+    arrows, signs = [], []
+    k = 0
     for s in style:
-        if s in ['>', '<']:
-            sign = 1 if s == '>' else -1
-            arrows.append([len(segs), sign*unit_d])
+        if s in '<>':
+            arrows.append([[k / num_segs, 0.6 - 1.2 * k / num_segs]])
+            signs.append(1 if s == '>' else -1)
         else:
-            segs.append(s)
-    head_vec = unit_d * head_length
-    vec_d = d - head_vec * 1.2
-    num_segs = len(segs)
-    for al in arrows:
-        al[0] = al[0] * vec_d / max(num_segs, 1) + sxy + 0.6 * head_vec
+            k += 1
 
-    # get the line locations.
-    uni = d / num_segs
+    # adjacent segments of the same style are merged.
     lines = []
-    end = start = sxy
-    seg_pre = ''
-    for seg in segs:
-        if seg != seg_pre and seg_pre != '':
-            lines.append([seg_pre, [start, end]])
-            start = end
-        seg_pre = seg
-        end = end + uni
-    lines.append([seg, [start, end]])
-
-    # fix end of line
-    if style[-1] in ['<', '>']:
-        lines[-1][1][1] -= head_vec
-    if style[0] in ['<', '>']:
-        lines[0][1][0] += head_vec
+    start = 0
+    for k in range(1, num_segs + 1):
+        if k == num_segs or segs[k] != segs[start]:
+            lines.append([segs[start], [[start / num_segs, 0], [k / num_segs, 0]]])
+            start = k
+
+    # leave space for arrow heads at the ends.
+    if style[0] in '<>':
+        lines[0][1][0][1] += 1
+    if style[-1] in '<>':
+        lines[-1][1][1][1] -= 1
+
+    styles = tuple('--' if ls == '.' else ls for ls, coeff in lines)
+    return EdgeStyle(styles, tuple(signs), np.concatenate([coeff for ls, coeff in lines] + arrows).astype('float64'))
+
+def basicline_handler(sxy, exy, style, head_length):
+    '''
+    draw a line between start and end, `sxy` and `exy` can also be batches of positions with shape (N, 2).
+
+    The style is compiled once, and mapped to edges by an affine transformation.
+    '''
+    template = compile_style(style)
+    sxy = np.asarray(sxy, dtype='float64')
+    d = np.asarray(exy) - sxy
+    if d.ndim == 1:
+        # a single edge, avoid the overheads of numpy on tiny arrays.
+        dx, dy = d.tolist()
+        length = math.hypot(dx, dy)
+        scale = 1. / length if length != 0 else np.nan
+        ux, uy = dx * scale, dy * scale
+        unit_d = np.array([ux, uy])
+        basis = np.array([[dx, dy], [ux * head_length, uy * head_length]])
+    else:
+        unit_d = d / norm(d, axis=-1)[..., None]
+        basis = np.stack([d, unit_d * head_length])
+
+    # points of all edges in one matrix product, with shape (number of points,) + shape of `sxy`.
+    xy = np.dot(template.points, basis.reshape(2, -1)).reshape((-1,) + d.shape)
+    xy += sxy
+    num_line = len(template.styles)
+    lines = [(ls, (xy[2*k], xy[2*k+1])) for k, ls in enumerate(template.styles)]
+    arrows = [(xy[2*num_line+k], sign * unit_d) for k, sign in enumerate(template.signs)]
     return arrows, lines
 
-def _arrows(ax, arrows, **kwargs):
-    '''show arrows'''
-    objs = []
-    for mxy, direction in arrows:
-        objs.append(_arrow(ax, mxy, direction, **kwargs))
-    return objs
+def _double_lines(lines, lw):
+    '''split double lines '=' between `sxy` and `exy` (single points or batches) into two lines, apart by twice the space.'''
+    lines_ = []
+    for ls, (sxy, exy) in lines:
+        if ls != '=':
+            lines_.append((ls, (sxy, exy)))
+            continue
+        sxy, exy = np.broadcast_arrays(np.asarray(sxy, dtype='float64'), np.asarray(exy, dtype='float64'))
+        d = exy - sxy
+        offset = d[..., ::-1] * [-1, 1] * (edge_setting['doubleline_space'] * lw / norm(d, axis=-1)[..., None])
+        lines_.extend([('-', (sxy + offset, exy + offset)), ('-', (sxy - offset, exy - offset))])
+    return lines_
+
+def _arrows(ax, arrows, head_width, head_length, lw, zorder, color):
+    '''show arrows, all arrow heads are drawn as one collection.'''
+    if len(arrows) == 0:
+        return []
+    mxy, direction = zip(*[np.broadcast_arrays(mxy, direction) for mxy, direction in arrows])
+    mxy = np.concatenate([np.reshape(xy, (-1, 2)) for xy in mxy])
+    direction = np.concatenate([np.reshape(d, (-1, 2)) for d in direction])
+    obj = PolyCollection(_arrow_vertices(mxy, direction, head_width, head_length),
+            facecolors=color, edgecolors=color, linewidths=lw, zorder=zorder)
+    ax.add_collection(obj)
+    return [obj]
 
 def _lines(ax, lines, **kwargs):
     '''show the lines.'''
@@ -376,54 +722,102 @@ def _lines(ax, lines, **kwargs):
         objs.extend(_line(ax, ls, line, **kwargs))
     return objs
 
-def _arrow(ax, mxy, direction, head_width, head_length, lw, zorder, color):
-    '''draw an arrow.'''
+def _arrow_vertices(mxy, direction, head_width, head_length):
+    '''
+    vertices of arrow head triangles.
+
+    Args:
+        mxy (2darray): centers of arrow heads, with shape (N, 2).
+        direction (2darray): unit vectors of arrow directions, with shape (N, 2).
+
+    Returns:
+        3darray: triangles with shape (N, 3, 2), the first vertex is the tip.
+    '''
     head_vec = direction * head_length
-    mxy = mxy - head_vec * 0.6
-    dx, dy = direction
-    obj = plt.arrow(*mxy, 1e-8 * dx, 1e-8 * dy,
-              head_length=head_length, width=0,
-              head_width=head_width, fc=color,
-              length_includes_head=False, lw=lw, edgecolor=color, zorder=zorder)
-    return obj
+    half_width = direction[..., ::-1] * [-1, 1] * (head_width / 2.)
+    base = mxy - head_vec * 0.6
+    return np.stack([base + head_vec, base - half_width, base + half_width], axis=-2)
 
 def _line(ax, ls, path, lw, color, zorder, use_path, solid_capstyle):
-    '''draw a line connecting sxy and exy.'''
-    objs = []
-    def _plot_line(path_):
-        if not use_path:
-            sxy_, exy_ = path_
-            objs.extend(ax.plot([sxy_[0], exy_[0]], [
-                               sxy_[1], exy_[1]], lw=lw, color=color,
-                               zorder=zorder, ls=ls, solid_capstyle=solid_capstyle))
-        else:
-            obj = patches.PathPatch(path_, lw=lw, facecolor='none', edgecolor=color,
-                               zorder=zorder, ls=ls)
-            objs.append(obj)
-            ax.add_patch(obj)
+    '''draw a line connecting sxy and exy, or a path.'''
     if ls == '=':
-        if not use_path:
-            sxy, exy = path
-            d = np.asarray(exy) - sxy
-            unit_d = d / norm(d)
-            perp_d = np.array([-unit_d[1], unit_d[0]])
-            offset = perp_d * edge_setting['doubleline_space'] * lw
-            ls = '-'
-            _plot_line((sxy + offset, exy + offset))
-            _plot_line((sxy - offset, exy - offset))
-        else:
-            raise NotImplementedError('Double line for C link not implemented!')
-    else:
-        if ls == '.': ls = '--'
-        _plot_line(path)
+        raise NotImplementedError('Double line for C link not implemented!')
+    if ls == '.': ls = '--'
+    if not use_path:
+        sxy, exy = path
+        return ax.plot([sxy[0], exy[0]], [sxy[1], exy[1]], lw=lw, color=color,
+                zorder=zorder, ls=ls, solid_capstyle=solid_capstyle)
+    obj = patches.PathPatch(path, lw=lw, facecolor='none', edgecolor=color, zorder=zorder, ls=ls)
+    ax.add_patch(obj)
+    return [obj]
+
+def _line_collections(ax, lines, lw, color, zorder, solid_capstyle):
+    '''show batches of lines, lines of the same style are drawn as one collection.'''
+    segments = {}
+    for ls, (sxy, exy) in lines:
+        sxy, exy = np.broadcast_arrays(sxy, exy)
+        segments.setdefault(ls, []).append(np.stack([sxy, exy], axis=-2))
+    objs = []
+    for ls, segs in segments.items():
+        obj = LineCollection(np.concatenate(segs), linewidths=lw, colors=color, linestyles=ls,
+                zorder=zorder, capstyle=solid_capstyle)
+        ax.add_collection(obj)
+        objs.append(obj)
+    return objs
+
+def _path_collections(ax, paths, lw, color, zorder, solid_capstyle):
+    '''show paths, paths of the same style are drawn as one collection.'''
+    objs = []
+    for ls, paths_ in paths.items():
+        obj = PathCollection(paths_, facecolors='none', edgecolors=color, linewidths=lw,
+                linestyles='--' if ls == '.' else ls, zorder=zorder, capstyle=solid_capstyle)
+        ax.add_collection(obj)
+        objs.append(obj)
     return objs
 
+def _is_batch(obj):
+    '''is `obj` a batch of nodes (or positions).'''
+    if isinstance(obj, NodeCollection) or _is_node_sequence(obj):
+        return True
+    return not hasattr(obj, 'position') and np.ndim(obj) == 2
+
+def _is_node_sequence(obj):
+    '''is `obj` a list (or object array) of nodes.'''
+    return isinstance(obj, (list, tuple, np.ndarray)) and len(obj) > 0 and hasattr(obj[0], 'position')
+
+def _batch_points(obj):
+    '''
+    get positions and a vectorized connection point function for a batch of nodes,
+    a single node is treated as a batch of size 1.
+    '''
+    if isinstance(obj, NodeCollection):
+        return obj.positions, obj.get_connection_point
+    if _is_node_sequence(obj):
+        if len(obj) == 1:
+            return _batch_points(obj[0])
+        nodes = [_node(node) for node in obj]
+        positions = np.array([node.position for node in nodes], dtype='float64')
+        return positions, lambda directions: np.array([node.get_connection_point(direction)
+            for node, direction in zip(nodes, directions)], dtype='float64')
+    if hasattr(obj, 'position') or np.ndim(obj) == 1:
+        node = _node(obj)
+        positions = np.asarray(node.position, dtype='float64')[None]
+        return positions, lambda directions: np.array([node.get_connection_point(direction)
+            for direction in directions], dtype='float64')
+    positions = np.asarray(obj, dtype='float64')
+    return positions, lambda directions: positions
+
 def _basicgeometry(xy, geo, size, angle, roundness, props, **kwargs):
     '''basic geometric handler.'''
-    return eval('shapes.%s'%geo)(xy, size, angle, roundness, props=props, **kwargs)
+    return shapes.get_shape(geo)(xy, size, angle, roundness, props=props, **kwargs)
+
+def basicgeometry_handler(theme_code, xy, size, roundness, facecolor, ls, lw, edgecolor, zorder, angle, props, inner_style=None):
+    '''
+    basic geometry node handler.
 
-def basicgeometry_handler(theme_code, xy, size, roundness, facecolor, ls, lw, edgecolor, zorder, angle, props):
-    '''basic geometry node handler.'''
+    Args:
+        inner_style (tuple|None): (facecolor, edgecolor, lw) of the inner shape, read from `node_setting` if None.
+    '''
     default_color, geo, inner_geo = theme_code
     if facecolor is None:
         facecolor = default_color
@@ -436,23 +830,49 @@ def basicgeometry_handler(theme_code, xy, size, roundness, facecolor, ls, lw, ed
     # add a geometric patch at the top of circle.
     if inner_geo != 'none':
         # get the size
-        if inner_geo in ['measure', 'cross', 'vbar', 'plus']:
-            inner_size = size
-        else:
-            inner_size = 0.7 * size
+        inner_geo = shapes.get_shape(inner_geo)
+        inner_size = inner_geo.inner_scale * size
 
-        inner_fc = node_setting['inner_facecolor']
-        inner_ec = node_setting['inner_edgecolor']
-        inner_lw = node_setting['inner_lw']
+        if inner_style is None:
+            inner_style = (node_setting['inner_facecolor'], node_setting['inner_edgecolor'], node_setting['inner_lw'])
+        inner_fc, inner_ec, inner_lw = inner_style
         objs += _basicgeometry(xy, inner_geo, inner_size, angle, roundness, props, facecolor=inner_fc, edgecolor=inner_ec, lw=inner_lw, ls=ls, zorder=zorder+1)
 
     # for BLUE nodes, add a self-loop (Stands for Recurrent Unit)
     if facecolor == BLUE and theme_code == 'nn.':
-        loop = plt.Circle((xy[0], xy[1] + 1.2 * size), 0.5 * size,
+        loop = patches.Circle((xy[0], xy[1] + 1.2 * size), 0.5 * size,
                           edgecolor=edgecolor, facecolor=inner_fc, lw=lw, zorder=-5)
         objs.append(loop)
     return objs
 
+def _patch_collection(patch, xys, **kwargs):
+    '''translate an un-added patch to positions `xys`, and pack them into one collection, `kwargs` are passed to the collection.'''
+    path = patch.get_transform().transform_path(patch.get_path())
+    paths = [Path(vertices, path.codes) for vertices in path.vertices[None] + xys[:, None]]
+    return PathCollection(paths, facecolors=patch.get_facecolor() if patch.get_fill() else 'none',
+            edgecolors=patch.get_edgecolor(), linewidths=patch.get_linewidth(),
+            linestyles=patch.get_linestyle(), zorder=patch.get_zorder(), **kwargs)
+
+def _set_offsets(objs, xys):
+    '''move artists made by `NodeBrush._place_layer` to draw nodes at positions `xys`.'''
+    for obj in objs:
+        if isinstance(obj, Line2D):
+            obj.set_data(xys[:, 0], xys[:, 1])
+        else:
+            obj.set_offsets(xys)
+
+def _extend_patch_collection(obj, patch, xys):
+    '''append paths of an un-added patch translated to positions `xys` to a collection made by `_patch_collection`.'''
+    num_path = len(obj.get_paths())
+    path = patch.get_transform().transform_path(patch.get_path())
+    obj.get_paths().extend(Path(vertices, path.codes) for vertices in path.vertices[None] + xys[:, None])
+    # colors of single paths (e.g. of removed nodes), are extended by the colors of the patch.
+    for colors, set_colors, color in [(obj.get_facecolor(), obj.set_facecolor, patch.get_facecolor()),
+            (obj.get_edgecolor(), obj.set_edgecolor, patch.get_edgecolor())]:
+        if len(colors) == num_path:
+            set_colors(np.concatenate([colors, np.tile(color, (len(xys), 1))]))
+    obj.stale = True
+
 def rotate_translate_path(path, angle, dxy=(0,0)):
     '''rotate path by angle'''
     affine = transforms.Affine2D()
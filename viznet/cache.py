@@ -0,0 +1,141 @@
+'''
+disk cache of layouts, keyed by hashes of edges and layout parameters.
+'''
+
+import hashlib
+import os
+
+import numpy as np
+
+
+class LayoutCache(object):
+    '''
+    Disk-backed cache of layouts, arrays are stored as `.npy` files in a directory, and loaded memory-mapped (copy on write) on hits.
+
+    The total size of files is bounded by `max_bytes`, the least recently used entries are evicted first,
+    a hit refreshes the modification times of its files.
+    Files are written under temporary names and renamed, so that processes can share a directory.
+
+    Args:
+        directory (str): cache directory, created if missing.
+        max_bytes (int): maximum total size of files.
+
+    Example:
+        >>> cache = LayoutCache('~/.cache/viznet')
+        >>> key = cache.key('force_layout', edges, space=1.)
+        >>> arrays = cache.get(key)
+        >>> if arrays is None:
+        ...     arrays = [force_layout(edges, space=1.)]
+        ...     cache.put(key, arrays)
+    '''
+
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(name, edges, **params):
+        '''
+        hash of a layout, by its name, canonical edges (an int64 (E, 2) array, in order) and parameters.
+
+        Arrays in parameters are hashed by their contents, functions by their qualified names.
+
+        Returns:
+            str: sha1 hex digest.
+        '''
+        sha = hashlib.sha1(name.encode())
+        sha.update(np.ascontiguousarray(edges, dtype='<i8').reshape(-1, 2).tobytes())
+        for param in sorted(params):
+            sha.update(('%s=%s;' % (param, _canonical(params[param]))).encode())
+        return sha.hexdigest()
+
+    def _path(self, key, i):
+        return os.path.join(self.directory, '%s_%d.npy' % (key, i))
+
+    def get(self, key, num_array=1):
+        '''
+        arrays stored under `key`.
+
+        Args:
+            key (str): key of the entry.
+            num_array (int): number of arrays in the entry.
+
+        Returns:
+            list|None: memory-mapped arrays, None if the entry is missing.
+        '''
+        paths = [self._path(key, i) for i in range(num_array)]
+        try:
+            arrays = [np.load(path, mmap_mode='c') for path in paths]
+            for path in paths:
+                os.utime(path)
+        except (IOError, OSError, ValueError):
+            # missing, evicted, or being written.
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        '''
+        store arrays under `key`, and evict least recently used entries beyond `max_bytes`.
+
+        Args:
+            key (str): key of the entry.
+            arrays (list): arrays of the entry.
+        '''
+        for i, array in enumerate(arrays):
+            path = self._path(key, i)
+            temp = os.path.join(self.directory, '.%s_%d.%d.tmp' % (key, i, os.getpid()))
+            with open(temp, 'wb') as f:
+                np.save(f, np.asarray(array))
+            os.replace(temp, path)
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        '''
+        remove the least recently used entries until files take no more than `max_bytes`.
+
+        Args:
+            keep (str|None): key of an entry never removed.
+        '''
+        entries = {}
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and not name.startswith('.'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                names, size, time = entries.get(name.rsplit('_', 1)[0], ([], 0, 0.))
+                entries[name.rsplit('_', 1)[0]] = (names + [name], size + stat.st_size, max(time, stat.st_mtime))
+        total = sum(size for names, size, time in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key][2]):
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                for name in entries[key][0]:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+                total -= entries[key][1]
+
+    def clear(self):
+        '''remove all entries.'''
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                os.remove(os.path.join(self.directory, name))
+
+
+def _canonical(value):
+    '''a string standing for a parameter value.'''
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        return 'array(%s,%s,%s)' % (value.dtype.str, value.shape, hashlib.sha1(value.tobytes()).hexdigest())
+    if isinstance(value, (tuple, list)):
+        return '(%s)' % ','.join(_canonical(item) for item in value)
+    if isinstance(value, dict):
+        return '{%s}' % ','.join('%s:%s' % (k, _canonical(value[k])) for k in sorted(value))
+    if callable(value):
+        return '%s.%s' % (value.__module__, getattr(value, '__qualname__', value.__name__))
+    if isinstance(value, (bool, np.bool_, str)) or value is None:
+        return repr(value)
+    return repr(float(value))
@@ -0,0 +1,71 @@
+'''
+pyplot-free rendering target.
+'''
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+class Canvas(object):
+    '''
+    A bare matplotlib figure with an Agg canvas, it never touches the global state of `matplotlib.pyplot`,
+    so that figures can be rendered in parallel threads. Pass it as `ax` to brushes and :obj:`QuantumCircuit`.
+
+    Args:
+        figsize (tuple, default=(6,4)): figure size.
+        filename (str|None): filename to store the figure when leaving the context, if None, it will not save a figure.
+        dpi (int, default=300): dots per inch.
+
+    Attributes:
+        fig (:obj:`Figure`): matplotlib Figure instance.
+        ax (:obj:`Axes`): matplotlib Axes instance.
+        filename (str|None): filename to store the figure when leaving the context.
+
+    Examples:
+        with Canvas(filename='_net.png') as canvas:
+            brush = NodeBrush('nn.input', canvas)
+            brush >> (0, 0)
+    '''
+
+    def __init__(self, figsize=(6, 4), filename=None, dpi=300):
+        self.filename = filename
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        if traceback is not None:
+            return False
+        self.finalize()
+        if self.filename is not None:
+            self.savefig(self.filename, transparent=True)
+
+    def finalize(self):
+        '''equal axis, remove axes and fit the layout.'''
+        self.ax.axis('equal')
+        self.ax.axis('off')
+        self.fig.tight_layout()
+
+    def savefig(self, fname, **kwargs):
+        '''
+        save the figure.
+
+        Args:
+            fname (str|file): filename or a file object.
+            kwargs: keyword arguments passed to `Figure.savefig`.
+        '''
+        self.fig.savefig(fname, **kwargs)
+
+    def to_rgba(self):
+        '''
+        render the figure.
+
+        Returns:
+            3darray: RGBA image with shape (height, width, 4).
+        '''
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba()).copy()
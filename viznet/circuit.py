@@ -7,11 +7,9 @@ feature list:
     3. implementation of simple RBM and Feed forward networks.
 '''
 
+import copy
 import numpy as np
-import pdb
 import numbers
-from matplotlib import pyplot as plt
-from matplotlib.patches import Circle, Polygon
 
 from .edgenode import Pin
 from .brush import EdgeBrush, NodeBrush
@@ -20,18 +18,19 @@ from .brush import EdgeBrush, NodeBrush
 class QuantumCircuit(object):
     '''
     Args:
-        ax: matplotlib.pyplot.Axes.
+        ax (:obj:`Axes`|:obj:`Canvas`|None): axes to draw on, brushes without axes draw on it too.
         num_bit (int): number of bits.
         y0 (float): the y offset.
     '''
     def __init__(self, num_bit, ax=None, x=0, y0=0, locs=None, **kwargs):
+        self.ax = ax
         self.x = x
         self.y0 = y0
         if locs is None:
             locs = self.y0-np.arange(num_bit)
         self.locs = locs
         self.node_dict = dict(
-            zip(range(num_bit), [[Pin(self.get_position(i))] for i in range(num_bit)]))
+            zip(range(num_bit), [[Pin(self.get_position(i), ax=ax)] for i in range(num_bit)]))
         self.edge = EdgeBrush('---', ax, **kwargs)
 
     @property
@@ -78,7 +77,7 @@ class QuantumCircuit(object):
                 y = line
 
             # place the node
-            node = b >> self.get_position(y)
+            node = _with_ax(b, self.ax) >> self.get_position(y)
 
             # connect nodes
             if len(node_list) >= 1:
@@ -127,7 +126,7 @@ class QuantumCircuit(object):
                     return False
                 xend = self.x
                 xstart = ctx.xstart
-                b = brush >> (slice(xstart-pad_x, xend+pad_x), slice(self.get_position(sls.start)[1]+pad_y, self.get_position(sls.stop)[1]-pad_y))
+                b = _with_ax(brush, self.ax) >> (slice(xstart-pad_x, xend+pad_x), slice(self.get_position(sls.start)[1]+pad_y, self.get_position(sls.stop)[1]-pad_y))
                 ctx.boxes.append(b)
                 return True
         return Context()
@@ -149,8 +148,16 @@ class QuantumCircuit(object):
         self.x += 0.8
         pins = []
         for opos, j in zip(old_positions, lmap):
-            pi = Pin(self.get_position(j))
+            pi = Pin(self.get_position(j), ax=self.ax)
             self.node_dict[j].append(pi)
             self.edge >> (opos, pi)
             pins.append(pi)
         return pins
+
+def _with_ax(brush, ax):
+    '''a copy of `brush` drawing on `ax`, if `brush` has no axes of its own.'''
+    if ax is None or brush.ax is not None:
+        return brush
+    brush = copy.copy(brush)
+    brush.ax = ax
+    return brush
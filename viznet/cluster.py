@@ -8,10 +8,9 @@ feature list:
 '''
 
 import numpy as np
-import pdb
 
 
-def node_sequence(brush, num_node, center, space=(1,0)):
+def node_sequence(brush, num_node, center, space=(1,0), batch=False):
     '''
     add a sequence of nodes along direction specified by space.
 
@@ -20,37 +19,48 @@ def node_sequence(brush, num_node, center, space=(1,0)):
         num_node (int): number of node to be added.
         center (tuple): center of this sequence.
         space (tuple|float): space between nodes.
+        batch (bool, default=False): place all nodes in one call, and return a :obj:`NodeCollection`.
 
     Return:
         list: a list of node names, you can visit this node by accesing `self.node_dict[node_name]`.
     '''
     x_list = np.arange(-num_node / 2. + 0.5, num_node / 2., 1)
     xylist = center + np.asarray(space) * x_list[:, None]
+    if batch:
+        return brush >> xylist
 
     node_list = []
     for i, xy in enumerate(zip(xylist[:, 0], xylist[:, 1])):
         node_list.append(brush >> xy)
     return node_list
 
-def connect121(start_nodes, end_nodes, brush):
+def connect121(start_nodes, end_nodes, brush, batch=False):
     '''
     Args:
         start_token (str): the start layer generation token (pointed from).
         end_token (str): the end layer generation token (pointed to).
         brush (EdgeBrush): edge brush instance.
+        batch (bool, default=False): draw all edges in one call, and return an :obj:`EdgeCollection`.
     '''
-    return _connect(start_nodes, end_nodes, brush, one2one=True)
+    return _connect(start_nodes, end_nodes, brush, one2one=True, batch=batch)
 
-def connecta2a(start_nodes, end_nodes, brush):
+def connecta2a(start_nodes, end_nodes, brush, batch=False):
     '''
     Args:
         start_token (str): the start layer generation token (pointed from).
         end_token (str): the end layer generation token (pointed to).
         brush (EdgeBrush): edge brush instance.
+        batch (bool, default=False): draw all edges in one call, and return an :obj:`EdgeCollection`.
     '''
-    return _connect(start_nodes, end_nodes, brush, one2one=False)
-
-def _connect(start_nodes, end_nodes, brush, one2one=False):
+    return _connect(start_nodes, end_nodes, brush, one2one=False, batch=batch)
+
+def _connect(start_nodes, end_nodes, brush, one2one=False, batch=False):
+    if batch:
+        if not one2one:
+            num_start, num_end = len(start_nodes), len(end_nodes)
+            start_nodes = _take(start_nodes, np.repeat(np.arange(num_start), num_end))
+            end_nodes = _take(end_nodes, np.tile(np.arange(num_end), num_start))
+        return brush >> (start_nodes, end_nodes)
     edge_list = []
     for i, start_node in enumerate(start_nodes):
         if one2one:
@@ -60,6 +70,12 @@ def _connect(start_nodes, end_nodes, brush, one2one=False):
                 edge_list.append(brush >> (start_node, end_node))
     return edge_list
 
+def _take(nodes, indices):
+    '''take nodes from a list, an array or a :obj:`NodeCollection` by indices.'''
+    if hasattr(nodes, 'positions') or isinstance(nodes, np.ndarray):
+        return nodes[indices]
+    return [nodes[i] for i in indices]
+
 def text_cluster(node_list, token, *args, **kwargs):
     '''
     add texts for a sequence of nodes.
@@ -77,7 +93,7 @@ def text_cluster(node_list, token, *args, **kwargs):
     for node, text in zip(node_list, text_list):
         node.text(text, *args, **kwargs)
 
-def node_ring(brush, num_node, center, radius):
+def node_ring(brush, num_node, center, radius, batch=False):
     '''
     add a sequence of nodes placed on a ring.
 
@@ -86,6 +102,7 @@ def node_ring(brush, num_node, center, radius):
         num_node (int): number of node to be added.
         center (tuple): center of this ring.
         radius (float): the raidus of the ring.
+        batch (bool, default=False): place all nodes in one call, and return a :obj:`NodeCollection`.
 
     Return:
         list: a list of nodes
@@ -93,6 +110,8 @@ def node_ring(brush, num_node, center, radius):
     theta_list = np.arange(0, 2 * np.pi, 2 * np.pi / num_node)
     R = radius * num_node / np.pi
     xylist = np.array([np.cos(theta_list), np.sin(theta_list)]).T * R
+    if batch:
+        return brush >> xylist
 
     node_list = []
     i = 0
@@ -1,6 +1,4 @@
-import pdb
 from matplotlib import pyplot as plt
-from matplotlib.animation import FuncAnimation
 
 class DynamicShow():
     '''
@@ -15,6 +13,7 @@ class DynamicShow():
         figsize (tuple, default=(6,4)): figure size.
         filename (filename, str): filename to store generated figure, if None, it will not save a figure.
         ax (Axes): matplotlib Axes instance.
+        steps (list): frames of an animation, functions drawing a frame, or :obj:`Scene` instances rendered in place of the last one.
 
     Examples:
         with DynamicShow() as ds:
@@ -28,6 +27,7 @@ class DynamicShow():
         self.ax = None
         self.steps = []
         self.fps = fps
+        self._scene = None
 
     def __enter__(self):
         plt.ion()
@@ -42,23 +42,36 @@ class DynamicShow():
         plt.axis('off')
         plt.tight_layout()
         if self.filename[-4:] == ".gif":
+            from matplotlib.animation import FuncAnimation
             nframe = len(self.steps)+1
 
             def update(i):
                 if i!=0:
-                    self.steps[i-1]()
+                    self._play(self.steps[i-1])
 
             anim = FuncAnimation(plt.gcf(), update, frames=range(nframe), repeat=False)
             print('Press `c` to save figure to "%s", `Ctrl+d` to break >>' %
                     self.filename)
             anim.save(self.filename, writer="imagemagick", fps=self.fps)
         elif self.filename is not None:
+            import pdb
             for f in self.steps:
-                f()
+                self._play(f)
             print('Press `c` to save figure to "%s", `Ctrl+d` to break >>' %
                   self.filename)
             pdb.set_trace()
             plt.savefig(self.filename, dpi=300, transparent=True)
         else:
+            import pdb
             pdb.set_trace()
         return True
+
+    def _play(self, step):
+        '''draw a frame, a scene is rebuilt without replaying user code.'''
+        if hasattr(step, 'render'):
+            if self._scene is not None:
+                self._scene.clear()
+            step.render(self.ax)
+            self._scene = step
+        else:
+            step()
@@ -2,15 +2,17 @@
 node class.
 '''
 
-import pdb
+from collections import namedtuple
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib import patches
+from matplotlib.lines import Line2D
 
 from .setting import annotate_setting
-from .utils import intersection
+from .utils import intersection, get_ax
 
 class EdgeNode(object):
+    __slots__ = ()
+
     def text(self, text, position='center', fontsize=None, text_offset=None, **kwargs):
         '''
         text an Edge|Node|Pin.
@@ -25,6 +27,18 @@ class EdgeNode(object):
         '''
         if fontsize is None:
             fontsize = annotate_setting['fontsize']
+        position, ha, va = self._text_layout(position, text_offset)
+        t = self.ax.text(position[0], position[1], text, va=va, ha=ha, fontsize=fontsize, **kwargs)
+        self.objs.append(t)
+        return t
+
+    def _text_layout(self, position, text_offset=None):
+        '''
+        location and alignments of a text.
+
+        Returns:
+            tuple: location, horizontal alignment and vertical alignment.
+        '''
         if text_offset is None:
             text_offset = annotate_setting['text_offset']
         va = ha = 'center'
@@ -65,9 +79,7 @@ class EdgeNode(object):
                 ha = 'left'
             position = self.pin(position)
             position = position + text_offset*uvec
-        t = self.ax.text(position[0], position[1], text, va=va, ha=ha, fontsize=fontsize, **kwargs)
-        self.objs.append(t)
-        return t
+        return position, ha, va
 
     def remove(self):
         for obj in self.objs:
@@ -81,25 +93,46 @@ class Node(EdgeNode):
     '''
     A patch with shape and style, defines the allowed connection points, and create pins for connection.
 
+    Its outline, bounding box and connection candidates are cached,
+    call `invalidate` after transforming its patches (setting `position` invalidates them too).
+
     Attributes:
         objs(list): a list matplotlib patch object, with the first the primary object.
         brush (NodeBrush): brush.
     '''
 
-    def __init__(self, objs, position, brush):
+    def __init__(self, objs, position, brush, ax=None, geometry=None):
         self.brush = brush
-        self.position = np.asarray(position)
         self.objs = objs
+        self._ax = ax
+        self._position = np.asarray(position)
+        self._geometry = geometry
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, position):
+        self._position = np.asarray(position)
+        self.invalidate()
+
+    def invalidate(self):
+        '''drop the cached geometry, it will be recomputed on the next use.'''
+        self._geometry = None
+
+    @property
+    def geometry(self):
+        '''
+        :obj:`NodeGeometry`: cached geometry.
+        '''
+        if self._geometry is None:
+            self._geometry = _node_geometry(self.obj, self.position)
+        return self._geometry
 
     @property
     def path(self):
-        obj = self.obj
-        trans = obj.get_transform()
-        path = obj.get_path()
-        path = trans.transform_path(path)
-        if obj.axes is not None:
-            path = obj.axes.transData.inverted().transform_path(path)
-        return path.vertices
+        return self.geometry.path
 
     @property
     def obj(self):
@@ -108,8 +141,8 @@ class Node(EdgeNode):
 
     @property
     def ax(self):
-        '''get the primary object.'''
-        return self.obj.axes
+        '''get the axes.'''
+        return self.obj.axes if self._ax is None else self._ax
 
     @property
     def _offset_dict(self):
@@ -172,62 +205,414 @@ class Node(EdgeNode):
     @property
     def mass_center(self):
         '''mass center of a node'''
-        shape = self.brush.style[1]
-        if isinstance(self.obj, (plt.Polygon, patches.PathPatch)):
-            pos = self._clean_path.mean(axis=0)
-        else:
-            pos = self.position
-        return Pin(pos)
+        return Pin(_mass_center(self.obj, self))
 
     @property
     def height(self):
-        shape = self.brush.style[1]
-        if isinstance(self.obj, plt.Circle):
-            return self.obj.radius * 2
-        elif isinstance(self.obj, plt.Rectangle):
-            return self.obj.get_height()
-        elif isinstance(self.obj, patches.FancyBboxPatch):
-            return self.obj.get_height() + 2*self.obj.get_boxstyle().pad
-        elif isinstance(self.obj, (plt.Polygon, patches.PathPatch)):
-            y = self.path[:,1]
-            return y.max() - y.min()
-        else:
-            raise
+        return self.geometry.height
 
     @property
     def width(self):
-        shape = self.brush.style[1]
-        if isinstance(self.obj, plt.Circle):
-            return self.obj.radius * 2
-        elif isinstance(self.obj, plt.Rectangle):
-            return self.obj.get_width()
-        elif isinstance(self.obj, patches.FancyBboxPatch):
-            return self.obj.get_width() + 2*self.obj.get_boxstyle().pad
-        elif isinstance(self.obj, (plt.Polygon, patches.PathPatch)):
-            x = self.path[:,0]
-            return x.max() - x.min()
-        else:
-            raise
+        return self.geometry.width
 
     def get_connection_point(self, direction):
         '''
         Args:
             direction (1darray): unit vector pointing to target direction.
         '''
-        shape = self.brush.style[1]
-        if shape == 'circle':
-            return self.obj.center + self.obj.radius * direction
+        return _connection_point(self.geometry, self.position, direction)
+
+NodeGeometry = namedtuple('NodeGeometry', ['path', 'width', 'height', 'radius', 'candidates'])
+NodeGeometry.__doc__ = '''
+Cached geometry of a node.
+
+Attributes:
+    path (2darray): outline of the primary patch, in data space.
+    width (float): width of the bounding box.
+    height (float): height of the bounding box.
+    radius (float|None): radius for circles, None for other shapes.
+    candidates (2darray): allowed connection points (vertices and edge centers), relative to the node position.
+'''
+
+def _node_geometry(obj, position):
+    '''compute the geometry of a node from its primary patch.'''
+    path = obj.get_transform().transform_path(obj.get_path())
+    if obj.axes is not None:
+        path = obj.axes.transData.inverted().transform_path(path)
+    vertices = path.vertices
+
+    radius = None
+    if isinstance(obj, patches.Circle):
+        radius = obj.radius
+        width = height = obj.radius * 2
+    elif isinstance(obj, patches.Rectangle):
+        width, height = obj.get_width(), obj.get_height()
+    elif isinstance(obj, patches.FancyBboxPatch):
+        pad = obj.get_boxstyle().pad
+        width, height = obj.get_width() + 2*pad, obj.get_height() + 2*pad
+    else:
+        width, height = vertices.max(axis=0) - vertices.min(axis=0)
+
+    # only allowed to connect edge center or vertex.
+    edge_centers = (vertices[:-1] + vertices[1:]) / 2.
+    candidates = np.concatenate([vertices[:-1], edge_centers], axis=0) - position
+    return NodeGeometry(vertices, width, height, radius, candidates)
+
+def _mass_center(obj, node):
+    '''mass center of a node with the primary patch `obj`, polygons take the mean of their vertices.'''
+    if isinstance(obj, (patches.Polygon, patches.PathPatch)):
+        return node._clean_path.mean(axis=0)
+    return node.position
+
+def _connection_point(geometry, position, direction):
+    '''
+    connection points of nodes sharing the same geometry.
+
+    Args:
+        geometry (:obj:`NodeGeometry`): the geometry, candidates are relative to positions.
+        position (1darray|2darray): position(s) of node(s).
+        direction (1darray|2darray): unit vector(s) pointing to target direction(s).
+    '''
+    if geometry.radius is not None:
+        return position + geometry.radius * direction
+    candidates = geometry.candidates
+    vdirection = direction[..., ::-1] * [-1, 1]
+    distance = np.dot(direction, candidates.T) - abs(np.dot(vdirection, candidates.T))
+    return position + candidates[np.argmax(distance, axis=-1)]
+
+class NodeCollection(object):
+    '''
+    A batch of nodes placed by a single brush, each layer of patches is drawn as one matplotlib collection.
+
+    Node data live in a :obj:`NodeStore`, indexing a collection by an integer gives a light weight :obj:`NodeHandle`.
+
+    Attributes:
+        objs (list): matplotlib collections, one for each (shape, inner shape, zorder).
+        positions (2darray): positions of nodes, with shape (N, 2).
+        templates (list): un-added patches of a node placed at the origin.
+        brush (NodeBrush): a snapshot of the brush that placed these nodes.
+        store (:obj:`NodeStore`): the store keeping node data, a new store is created if not given.
+        ids (1darray): indices of nodes in the store.
+    '''
+
+    def __init__(self, objs, positions, templates, brush, store=None, ids=None):
+        self.objs = objs
+        self.templates = templates
+        self.brush = brush
+        self._geometry = None
+        if store is None:
+            store = NodeStore()
+        if ids is None:
+            ids = store.add(positions, brush, self)
+        self.store = store
+        self.ids = ids
+        self._id_buffer = None
+
+    @property
+    def ax(self):
+        '''get the axes.'''
+        return self.objs[0].axes
+
+    @property
+    def positions(self):
+        return self.store.positions[self.ids]
+
+    @property
+    def position(self):
+        return self.positions
+
+    @property
+    def geometry(self):
+        '''
+        :obj:`NodeGeometry`: cached geometry of the node placed at the origin.
+        '''
+        if self._geometry is None:
+            self._geometry = _node_geometry(self.templates[0], np.zeros(2))
+        return self._geometry
+
+    @property
+    def outline(self):
+        '''outline of the primary shape, relative to node positions.'''
+        return self.geometry.path
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        '''
+        get a node by integer index, or a sub-collection by slice or index array.
+        '''
+        if isinstance(index, (int, np.integer)):
+            return NodeHandle(self.store, self.ids[index])
+        collection = NodeCollection(self.objs, None, self.templates, self.brush, store=self.store, ids=self.ids[index])
+        collection._geometry = self._geometry
+        return collection
+
+    def _extend(self, positions):
+        '''
+        register nodes appended to the artists of this collection in the store, ids grow in a buffer of doubling size.
+
+        Returns:
+            1darray: indices of nodes in the store.
+        '''
+        num_node = len(self.ids)
+        ids = self.store.add(positions, self.brush, self, slot=num_node)
+        if self._id_buffer is None or len(self._id_buffer) < num_node + len(ids):
+            buffer = np.empty(max(2 * (num_node + len(ids)), 16), dtype=ids.dtype)
+            buffer[:num_node] = self.ids
+            self._id_buffer = buffer
+        self._id_buffer[num_node:num_node + len(ids)] = ids
+        self.ids = self._id_buffer[:num_node + len(ids)]
+        return ids
+
+    def get_connection_point(self, direction):
+        '''
+        Args:
+            direction (2darray): unit vectors pointing to target directions, with shape (N, 2).
+
+        Returns:
+            2darray: connection points, with shape (N, 2).
+        '''
+        return _connection_point(self.geometry, self.positions, np.asarray(direction))
+
+    def pin(self, direction, align=None):
+        '''
+        obtain pins on specific surface for all nodes.
+
+        Args:
+            direction ('top'|'bottom'|'left'|'right'|'center'|float|1darray): specifies the surface to place pins, or thetas to specify the directions.
+            align (2darray|tuple|None, default=None): align y-axis for 'left' and 'right' pins, x-axis for 'top' and 'bottom' pins, or the points that lines along thetas pass.
+
+        Returns:
+            2darray: positions of pins with shape (N, 2), it can be used as a batch of nodes by :obj:`EdgeBrush`.
+        '''
+        geometry = self.geometry
+        if isinstance(direction, str):
+            w, h = geometry.width, geometry.height
+            offset = {'top': (0, h / 2.), 'bottom': (0, -h / 2.), 'left': (-w / 2., 0),
+                    'right': (w / 2., 0), 'center': (0., 0.)}[direction]
+            loc = self.positions + offset
+            if align is not None:
+                axis = {'top': 0, 'bottom': 0, 'left': 1, 'right': 1, 'center': None}[direction]
+                if axis is not None:
+                    loc[:, axis] = np.asarray(align, dtype='float64')[..., axis]
+            return loc
+        align = np.zeros(2) if align is None else np.asarray(align, dtype='float64') - self.positions
+        return self.positions + intersection(geometry.path, direction, align)
+
+    def remove(self):
+        for obj in self.objs:
+            try:
+                obj.remove()
+            except:
+                return False
+        return True
+
+class NodeStore(object):
+    '''
+    Struct of arrays keeping node data, filled in bulk by batch placement of :obj:`NodeBrush`.
+
+    Attributes:
+        positions (2darray): positions of nodes, with shape (N, 2).
+        styles (1darray): indices of node brushes in `brushes`.
+        artists (1darray): indices of node collections in `collections`.
+        slots (1darray): indices of nodes in their collections.
+        alive (1darray): False for removed nodes.
+        brushes (list): brushes, one for each style.
+        collections (list): node collections that own the artists.
+        index (:obj:`SpatialIndex`): spatial index over bounding boxes of nodes, updated as nodes are added or removed,
+            call `invalidate` after moving nodes.
+    '''
+
+    def __init__(self, capacity=1024):
+        self._positions = np.zeros([capacity, 2])
+        self._styles = np.zeros(capacity, dtype='int32')
+        self._artists = np.zeros(capacity, dtype='int32')
+        self._slots = np.zeros(capacity, dtype='int32')
+        self._alive = np.zeros(capacity, dtype='bool')
+        self.brushes = []
+        self.collections = []
+        self.size = 0
+        self._index = None
+        # artists of single nodes, shared collections followed by artists added to the node (e.g. texts).
+        self._objs = {}
+
+    @property
+    def positions(self):
+        return self._positions[:self.size]
+
+    @property
+    def styles(self):
+        return self._styles[:self.size]
+
+    @property
+    def artists(self):
+        return self._artists[:self.size]
+
+    @property
+    def slots(self):
+        return self._slots[:self.size]
+
+    @property
+    def alive(self):
+        return self._alive[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return NodeHandle(self, index)
+
+    @property
+    def index(self):
+        if self._index is None:
+            from .spatial import SpatialIndex
+            self._index = SpatialIndex.from_store(self)
+        return self._index
+
+    def invalidate(self):
+        '''drop the spatial index, it will be rebuilt on the next use.'''
+        self._index = None
+
+    def add(self, positions, brush, collection, slot=0):
+        '''
+        add a batch of nodes.
+
+        Args:
+            positions (2darray): positions of nodes, with shape (N, 2).
+            brush (NodeBrush): the brush placing nodes.
+            collection (:obj:`NodeCollection`): the collection owning the artists.
+            slot (int): index of the first node in the collection, nodes are appended to a collection already in the store if > 0.
+
+        Returns:
+            1darray: indices of nodes in this store.
+        '''
+        num_node = len(positions)
+        start, stop = self.size, self.size + num_node
+        if stop > len(self._positions):
+            self._reserve(max(stop, 2 * len(self._positions)))
+        if slot > 0:
+            style, artist = self._styles[collection.ids[0]], self._artists[collection.ids[0]]
         else:
-            vertices = candidates = self.path
-            # only allowed to connect edge center or vertex.
-            edge_centers = (vertices[:-1] + vertices[1:]) / 2.
-            candidates = np.concatenate([vertices[:-1], edge_centers], axis=0)
+            if not self.brushes or self.brushes[-1] is not brush:
+                self.brushes.append(brush)
+            self.collections.append(collection)
+            style, artist = len(self.brushes) - 1, len(self.collections) - 1
+        self._positions[start:stop] = positions
+        self._styles[start:stop] = style
+        self._artists[start:stop] = artist
+        self._slots[start:stop] = np.arange(slot, slot + num_node)
+        self._alive[start:stop] = True
+        self.size = stop
+        if self._index is not None:
+            path = collection.geometry.path
+            self._index.add(self._positions[start:stop] + path.min(axis=0), self._positions[start:stop] + path.max(axis=0))
+        return np.arange(start, stop)
+
+    def remove(self, index):
+        '''
+        remove a node, it is made transparent in the collections shared with other nodes, and artists added to it are removed.
+
+        Args:
+            index (int): index of the node.
+        '''
+        if not self._alive[index]:
+            return
+        shared = self.collections[self._artists[index]].objs
+        for obj in shared:
+            _hide(obj, self._slots[index])
+        for obj in self._objs.pop(index, []):
+            if not any(obj is other for other in shared):
+                obj.remove()
+        self._alive[index] = False
+        if self._index is not None:
+            self._index.removed[index] = True
+
+    def _reserve(self, capacity):
+        '''grow the arrays to `capacity`.'''
+        for name in ['_positions', '_styles', '_artists', '_slots', '_alive']:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+class NodeHandle(EdgeNode):
+    '''
+    A node in a :obj:`NodeStore`, it keeps only the store and an index, and is used the same way as :obj:`Node`.
+
+    Attributes:
+        store (:obj:`NodeStore`): the store.
+        index (int): index of this node in the store.
+    '''
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def position(self):
+        return self.store._positions[self.index]
+
+    @property
+    def collection(self):
+        '''the :obj:`NodeCollection` owning the artists.'''
+        return self.store.collections[self.store._artists[self.index]]
+
+    @property
+    def slot(self):
+        '''index of this node in its collection.'''
+        return self.store._slots[self.index]
+
+    @property
+    def brush(self):
+        return self.store.brushes[self.store._styles[self.index]]
+
+    @property
+    def objs(self):
+        '''artists shared by nodes of the collection, followed by artists added to this node (e.g. texts).'''
+        objs = self.store._objs.get(self.index)
+        if objs is None:
+            objs = self.store._objs[self.index] = list(self.collection.objs)
+        return objs
+
+    @property
+    def ax(self):
+        return self.collection.ax
+
+    @property
+    def geometry(self):
+        '''
+        :obj:`NodeGeometry`: geometry cached by the collection and shared by its nodes, its outline is relative to the node position.
+        '''
+        return self.collection.geometry
+
+    @property
+    def path(self):
+        return self.collection.geometry.path + self.position
+
+    @property
+    def mass_center(self):
+        '''mass center of a node'''
+        return Pin(_mass_center(self.collection.templates[0], self))
+
+    def remove(self):
+        '''remove this node from the store, other nodes of the collection are kept.'''
+        self.store.remove(self.index)
+        return True
 
-            vdirection = [-direction[1], direction[0]]
-            candidates_ = candidates - self.position
-            distance = candidates_.dot(
-                direction) - abs(candidates_.dot(vdirection))
-            return candidates[np.argmax(distance)]
+    obj = Node.obj
+    width = Node.width
+    height = Node.height
+    _offset_dict = Node._offset_dict
+    _clean_path = Node._clean_path
+    __getattr__ = Node.__getattr__
+    pin = Node.pin
+    get_connection_point = Node.get_connection_point
 
 class Edge(EdgeNode):
     '''
@@ -282,32 +667,82 @@ class Edge(EdgeNode):
         return Pin(self.start_xy)
 
 
-class Pin(np.ndarray, EdgeNode):
+class EdgeCollection(object):
+    '''
+    A batch of edges drawn by a single brush, lines of the same style are drawn as one matplotlib collection.
+
+    Attributes:
+        objs (list): matplotlib collections.
+        start_xy (2darray): start positions, with shape (N, 2).
+        end_xy (2darray): end positions, with shape (N, 2).
+        start (NodeCollection|list|2darray): start nodes.
+        end (NodeCollection|list|2darray): end nodes.
+        brush (:obj:`EdgeBrush`): brush.
+    '''
+
+    def __init__(self, objs, start_xy, end_xy, start, end, brush):
+        self.objs = objs
+        self.start = start
+        self.end = end
+        self.start_xy = np.asarray(start_xy)
+        self.end_xy = np.asarray(end_xy)
+        self.brush = brush
+
+    @property
+    def ax(self):
+        '''get the axes.'''
+        return self.objs[0].axes
+
+    @property
+    def position(self):
+        return (self.start_xy + self.end_xy) / 2.
+
+    def __len__(self):
+        return len(self.start_xy)
+
+    def head(self):
+        return self.end_xy
+
+    def tail(self):
+        return self.start_xy
+
+    def remove(self):
+        for obj in self.objs:
+            try:
+                obj.remove()
+            except:
+                return False
+        return True
+
+class Pin(EdgeNode):
     '''
     Simple Dot used for connecting wires.
+
+    It keeps a position tuple, and behaves like a 1D array of length 2 in indexing, iteration and arithmetics.
     '''
-    __array_priority__ = 0  # if it is >0, __str__ will not work.
+    __slots__ = ('_xy', '_ax', '_objs')
 
-    def __new__(subtype, param, ax=None, *args, **kwargs):
-        if isinstance(param, subtype):
-            obj = param
+    def __init__(self, param, ax=None):
+        if isinstance(param, Pin):
+            self._xy = param._xy
+            if ax is None:
+                ax = param._ax
         else:
-            dim = np.ndim(param)
-            obj = np.asarray(param, *args, **kwargs).view(subtype)
-        obj._ax = ax
-        obj.objs = []
-        return obj
-
-    def __array_finalize__(self, obj):
-        if obj is None:
-            return
-        self._ax = obj._ax if hasattr(obj, '_ax') else None
+            x, y = param
+            self._xy = (float(x), float(y))
+        self._ax = ax
+        self._objs = None
+
+    @property
+    def objs(self):
+        # created on demand, most pins are never texted.
+        if self._objs is None:
+            self._objs = []
+        return self._objs
 
     @property
     def ax(self):
-        if self._ax is None:
-            return plt.gca()
-        return self._ax
+        return get_ax(self._ax)
 
     @property
     def width(self):
@@ -318,11 +753,49 @@ class Pin(np.ndarray, EdgeNode):
         return 0.
 
     def get_connection_point(self, *arg, **kwargs):
-        return tuple(self)
+        return self._xy
 
     @property
     def position(self):
-        return tuple(self)
+        return self._xy
+
+    def __repr__(self):
+        return 'Pin(%r, %r)' % self._xy
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._xy, dtype=dtype)
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return self._xy[index]
+
+    def __iter__(self):
+        return iter(self._xy)
+
+    def __add__(self, other):
+        return np.add(self._xy, other)
+
+    def __radd__(self, other):
+        return np.add(other, self._xy)
+
+    def __sub__(self, other):
+        return np.subtract(self._xy, other)
+
+    def __rsub__(self, other):
+        return np.subtract(other, self._xy)
+
+    def __mul__(self, other):
+        return np.multiply(self._xy, other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return np.true_divide(self._xy, other)
+
+    def __neg__(self):
+        return np.negative(self._xy)
 
 def _node(node):
     if not hasattr(node, 'position'):
@@ -330,3 +803,19 @@ def _node(node):
     else:
         return node
 
+
+def _hide(obj, slot):
+    '''hide the `slot`-th item of a collection (or the `slot`-th point of a line) drawn for a batch of nodes.'''
+    if isinstance(obj, Line2D):
+        x, y = np.array(obj.get_xdata(), dtype='float64'), np.array(obj.get_ydata(), dtype='float64')
+        x[slot] = y[slot] = np.nan
+        obj.set_data(x, y)
+        return
+    num_item = max(len(obj.get_paths()), len(obj.get_offsets()))
+    for get, set_ in [(obj.get_facecolor, obj.set_facecolor), (obj.get_edgecolor, obj.set_edgecolor)]:
+        colors = get()
+        if len(colors) == 0:
+            continue
+        colors = np.array(np.broadcast_to(colors, (max(num_item, len(colors)), 4)))
+        colors[slot, 3] = 0
+        set_(colors)
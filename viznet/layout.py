@@ -0,0 +1,955 @@
+'''
+automatic layouts of graphs given by edge index arrays, positions are returned for bulk placement like `brush >> xy`.
+
+Layouts are cached on disk if `layout_setting['cache_dir']` is set, and loaded memory-mapped on later calls with the same edges and parameters.
+'''
+
+import functools
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse as sps
+from scipy.sparse.csgraph import connected_components, shortest_path
+from scipy.spatial import cKDTree
+
+from .cache import LayoutCache
+from .setting import layout_setting
+
+COARSEST_SIZE = 20
+'''
+graphs are coarsened until they have at most this number of nodes.
+'''
+
+MAX_DEPTH = 16
+'''
+maximum depth of quadtrees, nodes closer than 2**-MAX_DEPTH of the layout size share a leaf.
+'''
+
+EXACT_SIZE = 128
+'''
+repulsion between at most this number of nodes is summed up exactly, cheaper than building a quadtree.
+'''
+
+TASK_SIZE = 2000
+'''
+minimum number of nodes in a task of :func:`component_layout`, small components are sent to worker processes together.
+'''
+
+
+def as_edges(edges):
+    '''
+    edges as an int array with shape (E, 2).
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+    '''
+    if isinstance(edges, tuple) and len(edges) == 2:
+        edges = np.stack(np.broadcast_arrays(*edges), axis=-1)
+    return np.asarray(edges, dtype='int64').reshape(-1, 2)
+
+
+_cache_depth = [0]
+'''
+number of cached layouts being computed, layouts inside them (e.g. of components) are not cached again.
+'''
+
+
+def _cached(num_array=1, encode=lambda xy: [xy], decode=lambda arrays: arrays[0], ignore=()):
+    '''
+    cache a layout function in `layout_setting['cache_dir']`, by hashes of its edges and parameters except `ignore`.
+
+    Results are stored as `num_array` arrays given by `encode(result)`, and rebuilt from memory-mapped arrays by `decode(arrays)`.
+    '''
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if layout_setting['cache_dir'] is None or _cache_depth[0]:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.update(params.pop('kwargs', {}))
+            for name in ignore:
+                params.pop(name, None)
+            cache = LayoutCache(layout_setting['cache_dir'], layout_setting['cache_size'])
+            key = cache.key(func.__name__, as_edges(params.pop('edges')), **params)
+            arrays = cache.get(key, num_array)
+            if arrays is not None:
+                return decode(arrays)
+            _cache_depth[0] += 1
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _cache_depth[0] -= 1
+            cache.put(key, encode(result))
+            return result
+        return wrapper
+    return decorator
+
+
+@_cached()
+def force_layout(edges, num_node=None, center=(0, 0), space=1., num_iter=50, theta=1., positions=None, seed=0):
+    '''
+    multilevel force-directed layout.
+
+    The graph is coarsened by matching neighboring nodes until it is small, the coarsest graph is laid out from random positions,
+    and each finer graph is refined from the positions of its coarse nodes.
+    Each iteration costs O(N log N + E), see :func:`spring`.
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+        num_node (int|None): number of nodes, default is one plus the largest index in edges.
+        center (tuple): center of the layout.
+        space (float): ideal distance between neighboring nodes.
+        num_iter (int): number of iterations on each level.
+        theta (float): opening angle of the Barnes-Hut approximation.
+        positions (2darray|None): initial positions with shape (num_node, 2), refine them without coarsening if given.
+        seed (int): random seed.
+
+    Returns:
+        2darray: positions with shape (num_node, 2).
+    '''
+    edges = as_edges(edges)
+    if num_node is None:
+        num_node = edges.max() + 1 if len(edges) else 0
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    rng = np.random.RandomState(seed)
+    if positions is not None:
+        xy = spring(edges, np.array(positions, dtype='float64').reshape(num_node, 2), space, num_iter, space, theta)
+        return _normalize(xy, edges, center, space)
+
+    # coarse nodes stand for several nodes, and are further apart to cover the same area.
+    levels = [(edges, num_node, None)]
+    while levels[-1][1] > COARSEST_SIZE:
+        edges, num_node, _ = levels[-1]
+        labels, num_coarse = _match(edges, num_node, rng)
+        if num_coarse > 0.75 * num_node:
+            break
+        coarse = np.unique(labels[edges], axis=0)
+        levels.append((coarse[coarse[:, 0] != coarse[:, 1]], num_coarse, labels))
+
+    edges, num_node, labels = levels[-1]
+    scale = np.sqrt(levels[0][1] / float(max(num_node, 1)))
+    xy = rng.rand(num_node, 2) * (np.sqrt(num_node) * space * scale)
+    # small and cheap, the coarsest graph gets more iterations to untangle.
+    coarsest_iter = num_iter * min(10, max(1, 10 * COARSEST_SIZE // max(num_node, 1)))
+    xy = spring(edges, xy, space * scale, coarsest_iter, 0.1 * np.sqrt(num_node) * space * scale, theta)
+    for (edges, num_node, _), labels in zip(levels[-2::-1], [level[2] for level in levels[:0:-1]]):
+        scale = np.sqrt(levels[0][1] / float(num_node))
+        xy = xy[labels] + (rng.rand(num_node, 2) - 0.5) * (0.1 * space * scale)
+        xy = spring(edges, xy, space * scale, num_iter, 2 * space * scale, theta)
+    return _normalize(xy, edges, center, space)
+
+
+def spring(edges, xy, space, num_iter, temperature, theta=1., gravity=0.01):
+    '''
+    Fruchterman-Reingold iterations, repulsion between nodes is approximated by :func:`barnes_hut`.
+
+    Args:
+        edges (2darray): (E, 2) node index pairs without self loops.
+        xy (2darray): initial positions with shape (N, 2).
+        space (float): ideal distance between neighboring nodes.
+        num_iter (int): number of iterations.
+        temperature (float): maximum displacement of the first step, cooling down linearly.
+        theta (float): opening angle.
+        gravity (float): strength of a pull towards the center, keeping disconnected nodes close.
+
+    Returns:
+        2darray: positions with shape (N, 2).
+    '''
+    xy = np.array(xy, dtype='float64')
+    num_node = len(xy)
+    if num_node < 2:
+        return xy
+    for step in range(num_iter):
+        force = barnes_hut(xy, theta) * space**2
+        force -= gravity * (xy - xy.mean(axis=0))
+        delta = xy[edges[:, 0]] - xy[edges[:, 1]]
+        pull = delta * (np.sqrt((delta**2).sum(axis=1)) / space)[:, None]
+        for i in range(2):
+            force[:, i] -= np.bincount(edges[:, 0], weights=pull[:, i], minlength=num_node)
+            force[:, i] += np.bincount(edges[:, 1], weights=pull[:, i], minlength=num_node)
+        length = np.maximum(np.sqrt((force**2).sum(axis=1)), 1e-300)
+        t = temperature * (1 - step / float(num_iter))
+        xy += force * (np.minimum(length, t) / length)[:, None]
+    return xy
+
+
+def _normalize(xy, edges, center, space):
+    '''move the center of positions to `center`, and scale the median length of edges to `space`.'''
+    if len(xy) == 0:
+        return xy
+    xy = xy - xy.mean(axis=0)
+    if len(edges):
+        length = np.median(np.sqrt(((xy[edges[:, 0]] - xy[edges[:, 1]])**2).sum(axis=1)))
+        if length > 0:
+            xy *= space / length
+    return xy + center
+
+
+def _match(edges, num_node, rng, num_round=5):
+    '''
+    labels of coarse nodes, by merging matched pairs of neighbors.
+
+    Edges get random keys, in each round an edge is matched if it has the smallest key around both its (unmatched) nodes.
+
+    Returns:
+        tuple: labels with shape (num_node,), and the number of coarse nodes.
+    '''
+    index = np.arange(num_node)
+    root = index.copy()
+    src = np.concatenate([edges[:, 0], edges[:, 1]])
+    dst = np.concatenate([edges[:, 1], edges[:, 0]])
+    key = np.tile(rng.rand(len(edges)), 2)
+    for i in range(num_round):
+        free = root == index
+        mask = free[src] & free[dst]
+        if not mask.any():
+            break
+        s, d, k = src[mask], dst[mask], key[mask]
+        best = np.full(num_node, np.inf)
+        np.minimum.at(best, s, k)
+        # both nodes of a matched edge choose it.
+        chosen = k == best[s]
+        pick = index.copy()
+        pick[s[chosen]] = d[chosen]
+        mutual = (pick[pick] == index) & (pick != index)
+        root[mutual] = np.minimum(pick, index)[mutual]
+    # isolated nodes are merged in pairs, they would not be merged otherwise.
+    isolated = np.flatnonzero(np.bincount(src, minlength=num_node) == 0)
+    root[isolated[1::2]] = isolated[0:len(isolated) - 1:2]
+    keep, labels = np.unique(root, return_inverse=True)
+    return labels, len(keep)
+
+
+def barnes_hut(xy, theta=1.):
+    '''
+    sum of `(x_i - x_j) / |x_i - x_j|^2` over other nodes j for each node i, by a Barnes-Hut approximation.
+
+    The quadtree is built from sorted Morton codes, each level is a set of contiguous runs of nodes.
+    All nodes descend the tree together, a (node, cell) pair is either accepted or expanded to child cells.
+    Sums over no more than `EXACT_SIZE` nodes are exact.
+
+    Args:
+        xy (2darray): positions with shape (N, 2).
+        theta (float): opening angle.
+
+    Returns:
+        2darray: forces with shape (N, 2).
+    '''
+    xy = np.asarray(xy, dtype='float64')
+    num_node = len(xy)
+    if num_node <= EXACT_SIZE:
+        z = xy[:, 0] + 1j * xy[:, 1]
+        d = z[:, None] - z
+        # coincident nodes (and a node itself) are infinitely far away.
+        d[d == 0] = np.inf
+        return (1 / d.conj()).sum(axis=1).view('float64').reshape(num_node, 2)
+    lower = xy.min(axis=0)
+    size = max((xy.max(axis=0) - lower).max(), 1e-300) * (1 + 1e-9)
+    cell = ((xy - lower) * (2**MAX_DEPTH / size)).astype('int64')
+    codes = _interleave(cell[:, 0]) | (_interleave(cell[:, 1]) << 1)
+    order = np.argsort(codes, kind='stable')
+    codes, sxy = codes[order], xy[order]
+
+    # cells of each level, as runs [start, start + count) of sorted nodes.
+    # positions relative to the lower corner are complex numbers, in single precision to save memory traffic.
+    z = ((sxy[:, 0] - lower[0]) + 1j * (sxy[:, 1] - lower[1])).astype('complex64')
+    levels = []
+    for level in range(MAX_DEPTH + 1):
+        prefix = codes >> (2 * (MAX_DEPTH - level))
+        start = np.concatenate([[0], np.flatnonzero(prefix[1:] != prefix[:-1]) + 1])
+        count = np.diff(np.append(start, num_node))
+        com = (np.add.reduceat(z.astype('complex128'), start) / count).astype('complex64')
+        # the cell of each node, and the first child of each cell.
+        node_cell = np.repeat(np.arange(len(start), dtype='int32'), count)
+        levels.append([start, count, com, node_cell])
+        if len(start) == num_node:
+            # nodes are alone in their cells, the deepest level needed.
+            break
+    for level in range(len(levels) - 1):
+        start, count = levels[level][:2]
+        first = levels[level + 1][3][start]
+        levels[level].append((first, np.diff(np.append(first, len(levels[level + 1][0]))).astype('int32')))
+
+    force = np.zeros(num_node, dtype='complex128')
+    query, cells = np.arange(num_node, dtype='int32'), np.zeros(num_node, dtype='int32')
+    for level, (start, count, com, node_cell, *children) in enumerate(levels):
+        delta = z[query] - com[cells]
+        dist2 = delta.real * delta.real + delta.imag * delta.imag
+        own = node_cell[query] == cells
+        single = (count == 1)[cells]
+        accept = dist2 * theta**2 > (size / 2**level)**2
+        accept |= single
+        if level == len(levels) - 1:
+            accept[:] = True
+        accept &= ~own
+        target = query[accept]
+        delta = delta[accept] * (count[cells[accept]] / np.maximum(dist2[accept], 1e-30)).astype('float32')
+        force += np.bincount(target, weights=delta.real, minlength=num_node)
+        force += 1j * np.bincount(target, weights=delta.imag, minlength=num_node)
+        if level == len(levels) - 1:
+            break
+        # expand the other pairs, skipping a node alone in its own cell.
+        expand = ~(accept | (own & single))
+        query, cells = query[expand], cells[expand]
+        first, num_child = children[0]
+        num_child = num_child[cells]
+        offset = np.arange(num_child.sum(), dtype='int32') - np.repeat(np.cumsum(num_child, dtype='int32') - num_child, num_child)
+        query = np.repeat(query, num_child)
+        cells = np.repeat(first[cells], num_child) + offset
+
+    result = np.empty([num_node, 2])
+    result[order, 0], result[order, 1] = force.real, force.imag
+    return result
+
+
+def _interleave(v):
+    '''spread the lower 16 bits of integers to even bits.'''
+    v = v & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+@_cached()
+def spectral_layout(edges, num_node=None, center=(0, 0), space=1., num_pivot=30, seed=0):
+    '''
+    spectral layout, coordinates are the two lowest nontrivial eigenvectors of the Laplacian, `L x = lambda D x`.
+
+    The eigenvectors are solved in the subspace of breadth-first distances from `num_pivot` pivots far apart from each other,
+    in O(num_pivot * (N + E)) time, exactly for graphs with no more than `num_pivot` nodes.
+    Connected components are laid out separately, and packed side by side.
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+        num_node (int|None): number of nodes, default is one plus the largest index in edges.
+        center (tuple): center of the layout.
+        space (float): median distance between neighboring nodes.
+        num_pivot (int): dimension of the subspace.
+        seed (int): random seed of the first pivot.
+
+    Returns:
+        2darray: positions with shape (num_node, 2).
+    '''
+    edges = as_edges(edges)
+    if num_node is None:
+        num_node = edges.max() + 1 if len(edges) else 0
+    rng = np.random.RandomState(seed)
+    return _by_component(edges, num_node, lambda edges, num_node: _spectral(edges, num_node, num_pivot, rng), center, space)
+
+
+def _spectral(edges, num_node, num_pivot, rng):
+    '''spectral layout of a connected graph.'''
+    adjacency = _adjacency(edges, num_node)
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    laplacian = sps.diags(degree) - adjacency
+    if num_node <= num_pivot:
+        value, vector = scipy.linalg.eigh(laplacian.toarray(), np.diag(degree))
+        xy = vector[:, 1:3]
+    else:
+        # pivots are the farthest nodes from previous pivots.
+        distance = np.empty([num_node, num_pivot])
+        nearest = np.full(num_node, np.inf)
+        pivot = rng.randint(num_node)
+        for i in range(num_pivot):
+            distance[:, i] = shortest_path(adjacency, method='D', unweighted=True, indices=pivot)
+            nearest = np.minimum(nearest, distance[:, i])
+            pivot = np.argmax(nearest)
+        # an orthonormal basis of distances D-orthogonal to constants, and the eigenproblem restricted to it.
+        distance -= degree.dot(distance) / degree.sum()
+        value, vector = np.linalg.eigh(distance.T.dot(distance))
+        keep = value > 1e-12 * value[-1]
+        basis = distance.dot(vector[:, keep] / np.sqrt(value[keep]))
+        value, vector = scipy.linalg.eigh(basis.T.dot(laplacian.dot(basis)), basis.T.dot(degree[:, None] * basis))
+        xy = basis.dot(vector[:, :2])
+    # graphs with two nodes have a single nontrivial eigenvector.
+    return np.pad(xy, [(0, 0), (0, 2 - xy.shape[1])])
+
+
+def _by_component(edges, num_node, layout, center, space):
+    '''
+    lay out connected components separately by `layout(edges, num_node)`, and pack them side by side.
+    '''
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    labels, node_order, components = _split(edges, num_node)
+    if len(components) == 1:
+        return _normalize(layout(edges, num_node), edges, center, space)
+    xy = np.zeros([num_node, 2])
+    bounds = np.cumsum([0] + [size for _, size in components])
+    for (comp_edges, size), start in zip(components, bounds):
+        if size > 1:
+            xy[node_order[start:start + size]] = _normalize(layout(comp_edges, size), comp_edges, (0, 0), space)
+    return _pack(xy, labels, center, space)
+
+
+@_cached(ignore=('num_workers',))
+def component_layout(edges, num_node=None, layout='force', center=(0, 0), space=1., num_workers=None, **kwargs):
+    '''
+    lay out connected components separately in a pool of worker processes, and pack them side by side.
+
+    Components are sent to workers in tasks of at least `TASK_SIZE` nodes, the largest first,
+    and their bounding boxes are packed by a skyline packer into a square-ish area, `space` apart.
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+        num_node (int|None): number of nodes, default is one plus the largest index in edges.
+        layout (str|function): 'force', 'spectral', or a module level function `layout(edges, num_node, space=space, **kwargs)`
+            returning positions of a connected graph.
+        center (tuple): center of the layout.
+        space (float): median distance between neighboring nodes, and space between components.
+        num_workers (int|None): number of worker processes, default is the number of CPUs, no pool is started if 1.
+        kwargs: more arguments of the layout, e.g. `num_iter` of :func:`force_layout`.
+
+    Returns:
+        2darray: positions with shape (num_node, 2).
+    '''
+    edges = as_edges(edges)
+    if num_node is None:
+        num_node = edges.max() + 1 if len(edges) else 0
+    layout = {'force': force_layout, 'spectral': spectral_layout}.get(layout, layout)
+    kwargs['space'] = space
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    labels, node_order, components = _split(edges, num_node)
+    sizes = np.array([size for _, size in components])
+    bounds = np.cumsum(np.concatenate([[0], sizes]))
+
+    tasks = []
+    for comp in np.argsort(-sizes, kind='stable')[:np.count_nonzero(sizes > 1)]:
+        if not tasks or sizes[tasks[-1]].sum() >= TASK_SIZE:
+            tasks.append([])
+        tasks[-1].append(comp)
+    jobs = [[components[comp] for comp in task] for task in tasks]
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(min(num_workers, len(jobs))) as executor:
+            results = list(executor.map(_layout_task, [layout] * len(jobs), jobs, [kwargs] * len(jobs)))
+    else:
+        results = [_layout_task(layout, job, kwargs) for job in jobs]
+
+    xy = np.zeros([num_node, 2])
+    for task, result in zip(tasks, results):
+        for comp, comp_xy in zip(task, result):
+            xy[node_order[bounds[comp]:bounds[comp + 1]]] = comp_xy
+    return _pack(xy, labels, center, space)
+
+
+def _layout_task(layout, components, kwargs):
+    '''positions of components laid out in a worker process.'''
+    return [np.asarray(layout(edges, num_node, **kwargs), dtype='float64').reshape(num_node, 2) for edges, num_node in components]
+
+
+def _split(edges, num_node):
+    '''
+    split a graph into connected components.
+
+    Returns:
+        tuple: component labels of nodes, nodes sorted by components, and (edges, num_node) of components in their own indices.
+    '''
+    num_comp, labels = connected_components(_adjacency(edges, num_node), directed=False)
+    size = np.bincount(labels, minlength=num_comp)
+    offset = np.cumsum(size) - size
+    node_order = np.argsort(labels, kind='stable')
+    local = np.empty(num_node, dtype='int64')
+    local[node_order] = np.arange(num_node) - np.repeat(offset, size)
+    edge_label = labels[edges[:, 0]]
+    edge_order = np.argsort(edge_label, kind='stable')
+    comp_edges = np.split(local[edges[edge_order]], np.cumsum(np.bincount(edge_label, minlength=num_comp))[:-1])
+    return labels, node_order, list(zip(comp_edges, size))
+
+
+def _pack(xy, labels, center, space):
+    '''
+    move components to lower left corners given by :func:`skyline`, nodes of different components are at least `space` apart.
+    '''
+    num_comp = labels.max() + 1 if len(labels) else 0
+    lower = np.full([num_comp, 2], np.inf)
+    upper = np.full([num_comp, 2], -np.inf)
+    np.minimum.at(lower, labels, xy)
+    np.maximum.at(upper, labels, xy)
+    xy = xy + (skyline(upper - lower + space) - lower)[labels]
+    return xy - xy.mean(axis=0) + center if len(xy) else xy
+
+
+def skyline(sizes):
+    '''
+    pack boxes by a skyline packer, in a strip about as wide as the square root of their total area.
+
+    The skyline is the top border of boxes placed so far, boxes are placed the tallest first, each at the lowest position on the skyline.
+    Equal boxes (e.g. of isolated nodes) are packed into grid blocks first, so that many of them cost like one.
+
+    Args:
+        sizes (2darray): widths and heights of boxes with shape (N, 2).
+
+    Returns:
+        2darray: lower left corners of boxes with shape (N, 2).
+    '''
+    sizes = np.asarray(sizes, dtype='float64').reshape(-1, 2)
+    if len(sizes) == 0:
+        return np.zeros([0, 2])
+    _, group, count = np.unique(np.round(sizes / sizes.max(), 9), axis=0, return_inverse=True, return_counts=True)
+    group = group.ravel()
+    box = np.empty([len(count), 2])
+    box[group] = sizes
+    cols = np.clip(np.round(np.sqrt(count * box[:, 1] / box[:, 0])), 1, count).astype('int64')
+    blocks = box * np.stack([cols, -(-count // cols)], axis=1)
+    width = max(blocks[:, 0].max(), np.sqrt(np.prod(sizes, axis=1).sum()))
+
+    # segment i of the skyline spans [xs[i], xs[i+1]) at height ys[i].
+    xs, ys = np.array([0., width]), np.array([0.])
+    block_corner = np.empty_like(blocks)
+    for b in np.lexsort((-blocks[:, 0], -blocks[:, 1])):
+        w, h = blocks[b]
+        start = np.flatnonzero(xs[:-1] + w <= width * (1 + 1e-9))
+        stop = np.minimum(np.searchsorted(xs, xs[start] + w), len(ys))
+        # heights of the box at candidate positions, the highest segment under it.
+        height = np.maximum.reduceat(np.append(ys, 0), np.stack([start, stop], axis=1).ravel())[::2]
+        best = np.argmin(height)
+        i, k, y = start[best], stop[best], height[best]
+        block_corner[b] = xs[i], y
+        right = [xs[i] + w] if xs[i] + w < xs[k] else []
+        xs = np.concatenate([xs[:i + 1], right, xs[k:]])
+        ys = np.concatenate([ys[:i], [y + h], ys[k - 1:k] if right else [], ys[k:]])
+
+    # boxes in grid blocks.
+    order = np.argsort(group, kind='stable')
+    rank = np.empty(len(sizes), dtype='int64')
+    rank[order] = np.arange(len(sizes)) - np.repeat(np.cumsum(count) - count, count)
+    return block_corner[group] + box[group] * np.stack([rank % cols[group], rank // cols[group]], axis=1)
+
+
+def _adjacency(edges, num_node):
+    '''symmetric adjacency matrix of edges, without self loops.'''
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    adjacency = sps.coo_matrix((np.ones(len(edges)), (edges[:, 0], edges[:, 1])), shape=(num_node, num_node)).tocsr()
+    adjacency = adjacency + adjacency.T
+    adjacency.data[:] = 1
+    return adjacency
+
+
+def _encode_routes(result):
+    xy, routes = result
+    return [xy, np.concatenate(routes) if routes else np.zeros([0, 2]), np.array([len(route) for route in routes], dtype='int64')]
+
+
+def _decode_routes(arrays):
+    xy, vertices, length = arrays
+    return xy, np.split(vertices, np.cumsum(length)[:-1]) if len(length) else []
+
+
+@_cached(3, _encode_routes, _decode_routes)
+def layered_layout(edges, num_node=None, center=(0, 0), space=1., layer_space=None, direction='down', num_sweep=12):
+    '''
+    layered (Sugiyama) layout of a directed graph, edges point from upper layers to lower layers.
+
+    Nodes are assigned to layers by their longest paths from sources (sources are pulled down next to their successors),
+    long edges are split into chains of dummy nodes on the layers in between,
+    crossings are reduced by barycenter sweeps reordering all odd (even) layers at once,
+    and coordinates are relaxed towards barycenters of neighbors, keeping nodes in a layer apart.
+    Edges closing cycles are reversed for layering, and routed in their own direction.
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+        num_node (int|None): number of nodes, default is one plus the largest index in edges.
+        center (tuple): center of the layout.
+        space (float): space between nodes in a layer.
+        layer_space (float|None): space between layers, same as `space` if None.
+        direction (str): direction of layers, 'down', 'up', 'right' or 'left'.
+        num_sweep (int): number of sweeps to reduce crossings.
+
+    Returns:
+        tuple: positions with shape (num_node, 2), and routes of edges,
+        a list of polylines from start nodes to end nodes through dummy nodes, e.g. for :obj:`PolylineRouter`.
+    '''
+    edges = as_edges(edges)
+    if num_node is None:
+        num_node = edges.max() + 1 if len(edges) else 0
+    layer = _layering(edges, num_node)
+    forward = layer[edges[:, 0]] <= layer[edges[:, 1]]
+    oriented = np.where(forward[:, None], edges, edges[:, ::-1])
+
+    # chains of nodes along edges, dummy nodes are numbered after real nodes.
+    length = np.maximum(layer[oriented[:, 1]] - layer[oriented[:, 0]], 1) + 1
+    step = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+    chain = num_node + np.arange(length.sum()) - 2 * np.repeat(np.arange(len(edges)), length) - 1
+    chain[step == 0] = oriented[:, 0]
+    chain[np.cumsum(length) - 1] = oriented[:, 1]
+    dummy = chain >= num_node
+    all_layer = np.empty(num_node + dummy.sum(), dtype='int64')
+    all_layer[:num_node] = layer
+    all_layer[chain[dummy]] = (np.repeat(layer[oriented[:, 0]], length) + step)[dummy]
+    # segments between adjacent layers, self loops have none.
+    inner = np.ones(len(chain) - 1, dtype='bool') if len(chain) else np.zeros(0, dtype='bool')
+    inner[np.cumsum(length)[:-1] - 1] = False
+    upper, lower = chain[:-1][inner], chain[1:][inner]
+    inner = upper != lower
+    upper, lower = upper[inner], lower[inner]
+
+    rank = _order(upper, lower, all_layer, num_sweep)
+    x = _coordinates(upper, lower, all_layer, rank, space)
+    y = all_layer * float(space if layer_space is None else layer_space)
+    xy = {'down': (x, -y), 'up': (x, y), 'right': (y, -x), 'left': (-y, -x)}[direction]
+    xy = np.stack(xy, axis=1)
+    xy += np.asarray(center) - xy[:num_node].mean(axis=0) if num_node else 0
+
+    routes = np.split(xy[chain], np.cumsum(length)[:-1])
+    routes = [route if keep else route[::-1] for route, keep in zip(routes, forward)]
+    return xy[:num_node], routes
+
+
+def _layering(edges, num_node):
+    '''
+    layers of nodes by longest paths from sources, peeling sources off in rounds.
+    A node is forced to be a source if no source is left, breaking cycles.
+    '''
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    order = np.argsort(edges[:, 0], kind='stable')
+    target = edges[order, 1]
+    num_out = np.bincount(edges[:, 0], minlength=num_node)
+    first = np.cumsum(num_out) - num_out
+    num_in = np.bincount(edges[:, 1], minlength=num_node)
+    layer = np.full(num_node, -1, dtype='int64')
+    frontier = np.flatnonzero(num_in == 0)
+    level, num_left = 0, num_node
+    while num_left:
+        if len(frontier) == 0:
+            left = np.flatnonzero(layer < 0)
+            frontier = left[[np.argmin(num_in[left])]]
+        layer[frontier] = level
+        num_left -= len(frontier)
+        count = num_out[frontier]
+        index = np.repeat(first[frontier] - np.cumsum(count) + count, count) + np.arange(count.sum())
+        node, decrease = np.unique(target[index], return_counts=True)
+        num_in[node] -= decrease
+        frontier = node[(num_in[node] == 0) & (layer[node] < 0)]
+        level += 1
+
+    # sources are pulled down next to their nearest successors.
+    forward = edges[layer[edges[:, 0]] < layer[edges[:, 1]]]
+    is_source = np.bincount(forward[:, 1], minlength=num_node) == 0
+    nearest = np.full(num_node, np.iinfo('int64').max)
+    np.minimum.at(nearest, forward[:, 0], layer[forward[:, 1]] - 1)
+    pull = is_source & (nearest < np.iinfo('int64').max)
+    layer[pull] = nearest[pull]
+    return layer
+
+
+def _order(upper, lower, layer, num_sweep):
+    '''
+    ranks of nodes in their layers, reducing crossings of segments by barycenter sweeps, the best ordering is kept.
+    '''
+    num_all = len(layer)
+    # nodes sorted by layers and ranks, stable sorts keep ranks for ties.
+    order = np.argsort(layer, kind='stable')
+    layer_start = np.searchsorted(layer[order], np.arange(layer.max() + 2 if num_all else 1))
+    width = np.diff(layer_start)
+    rank = np.empty(num_all, dtype='int64')
+    rank[order] = np.arange(num_all) - layer_start[layer[order]]
+    degree = np.bincount(upper, minlength=num_all) + np.bincount(lower, minlength=num_all)
+    moved = degree > 0
+    # keys of layers are apart, centered ranks make layers of different widths comparable.
+    base = layer * (width.max() + 1.) if num_all else np.zeros(0)
+    best, best_rank = _crossings(upper, lower, layer, rank, width), rank
+    for sweep in range(num_sweep):
+        for parity in (sweep % 2, 1 - sweep % 2):
+            center = rank - (width[layer] - 1) / 2.
+            total = np.bincount(upper, weights=center[lower], minlength=num_all) + np.bincount(lower, weights=center[upper], minlength=num_all)
+            key = np.where(moved & (layer % 2 == parity), total / np.maximum(degree, 1), center)
+            order = order[np.argsort((base + key)[order], kind='stable')]
+            rank = np.empty(num_all, dtype='int64')
+            rank[order] = np.arange(num_all) - layer_start[layer[order]]
+        crossings = _crossings(upper, lower, layer, rank, width)
+        if crossings < best:
+            best, best_rank = crossings, rank
+    return best_rank
+
+
+def _crossings(upper, lower, layer, rank, width):
+    '''
+    number of crossings of segments between adjacent layers.
+
+    Segments of each layer sorted by upper ranks cross when lower ranks are inverted.
+    Inversions are counted bit by bit of lower ranks from the highest bit, as pairs first differing at the bit,
+    runs of segments with the same higher bits are split by the bit with stable partitions.
+    '''
+    if len(upper) == 0:
+        return 0
+    wide = width.max() + 1
+    value = rank[lower]
+    perm = np.argsort((layer[upper] * wide + rank[upper]) * wide + value, kind='stable')
+    group = layer[upper][perm]
+    value = value[perm]
+    index = np.arange(len(value))
+    total = 0
+    for bit in range(int(value.max()).bit_length() - 1, -1, -1):
+        ones = (value >> bit) & 1
+        high = value >> (bit + 1)
+        start = np.ones(len(value), dtype='bool')
+        start[1:] = (group[1:] != group[:-1]) | (high[1:] != high[:-1])
+        run_start = np.maximum.accumulate(np.where(start, index, 0))
+        num_one = np.cumsum(ones)
+        one_before = num_one - ones - (num_one[run_start] - ones[run_start])
+        total += one_before[ones == 0].sum()
+        # zeros before ones in each run, keeping orders.
+        starts = np.flatnonzero(start)
+        ends = np.append(starts[1:], len(value))
+        run = np.cumsum(start) - 1
+        run_zeros = (ends - starts - num_one[ends - 1] + num_one[starts] - ones[starts])[run]
+        zero_before = index - run_start - one_before
+        position = run_start + np.where(ones == 0, zero_before, run_zeros + one_before)
+        group[position], value[position] = group.copy(), value.copy()
+    return int(total)
+
+
+def _coordinates(upper, lower, layer, rank, space, num_iter=20):
+    '''
+    positions of nodes in their layers, relaxed towards barycenters of neighbors, and kept `space` apart in order.
+    '''
+    num_all = len(layer)
+    order = np.lexsort((rank, layer))
+    sorted_layer = layer[order]
+    start = np.concatenate([[True], sorted_layer[1:] != sorted_layer[:-1]]) if num_all else np.zeros(0, dtype='bool')
+    width = np.bincount(layer) if num_all else np.zeros(0, dtype='int64')
+    x = (rank - (width[layer] - 1) / 2.) * space
+    degree = np.bincount(upper, minlength=num_all) + np.bincount(lower, minlength=num_all)
+    for i in range(num_iter):
+        total = np.bincount(upper, weights=x[lower], minlength=num_all) + np.bincount(lower, weights=x[upper], minlength=num_all)
+        target = np.where(degree > 0, total / np.maximum(degree, 1), x)
+        # nodes in a layer are apart by at least `space`, both cumulative bounds keep the order.
+        slack = target[order] - rank[order] * space
+        offset = sorted_layer * (np.ptp(slack) + 1.)
+        left = np.maximum.accumulate(slack + offset) - offset
+        right = (np.minimum.accumulate((slack + offset)[::-1]) - offset[::-1])[::-1]
+        x[order] = (left + right) / 2. + rank[order] * space
+    return x
+
+
+class IncrementalLayout(object):
+    '''
+    Force-directed layout of a changing graph, e.g. frames of an animation, refined locally after each change.
+
+    After an update, nodes within `radius` hops of the change (new nodes, ends of added and removed edges, neighbors of removed nodes)
+    are moved by `num_iter` spring iterations, other nodes stay in place.
+    Repulsion is cut off beyond `cutoff * space`, surrounding nodes are found in a grid hash with cells of that size,
+    so that the cost of an update scales with the size of the change, not with the size of the graph.
+
+    Nodes keep their indices, rows of removed nodes in `positions` are NaN.
+
+    Args:
+        edges (2darray|tuple): (E, 2) node index pairs, or a (start, end) tuple of index arrays.
+        num_node (int|None): number of nodes, default is one plus the largest index in edges.
+        positions (2darray|None): positions with shape (num_node, 2), e.g. of the previous frame, default is a :func:`force_layout`.
+        space (float): ideal distance between neighboring nodes.
+        radius (int): number of hops from the change to moved nodes.
+        num_iter (int): number of iterations of an update.
+        cutoff (float): range of repulsion, in units of `space`.
+        seed (int): random seed.
+
+    Example:
+        >>> layout = IncrementalLayout(edges)
+        >>> # contract nodes i and j into a new node k, in between.
+        >>> moved = layout.update(remove_nodes=[i, j], add_nodes=[k], add_edges=[(k, l) for l in neighbors],
+        ...                       positions=[(layout.positions[i] + layout.positions[j]) / 2])
+        >>> layout.positions[moved]
+    '''
+
+    def __init__(self, edges=(), num_node=None, positions=None, space=1., radius=2, num_iter=30, cutoff=3., seed=0):
+        edges = as_edges(edges)
+        if num_node is None:
+            num_node = edges.max() + 1 if len(edges) else 0
+        self.space = space
+        self.radius = radius
+        self.num_iter = num_iter
+        self.cutoff = cutoff
+        self._rng = np.random.RandomState(seed)
+        if positions is None:
+            positions = force_layout(edges, num_node, space=space, seed=seed)
+        self._xy = np.array(positions, dtype='float64').reshape(num_node, 2)
+        self._cell = np.floor(self._xy / (cutoff * space)).astype('int64')
+        self._alive = np.ones(num_node, dtype='bool')
+        self.size = num_node
+        # multiplicities of neighbors, and nodes in cells of the grid hash.
+        self._neighbors = {}
+        self._cells = {}
+        for i, j in edges:
+            self._link(i, j)
+        for i, key in enumerate(map(tuple, self._cell)):
+            self._cells.setdefault(key, set()).add(i)
+        self._lower = self._xy.min(axis=0) if num_node else np.zeros(2)
+        self._upper = self._xy.max(axis=0) if num_node else np.zeros(2)
+
+    @property
+    def positions(self):
+        return self._xy[:self.size]
+
+    @property
+    def alive(self):
+        return self._alive[:self.size]
+
+    def update(self, add_nodes=(), remove_nodes=(), add_edges=(), remove_edges=(), positions=None):
+        '''
+        apply a change, and refine positions near it.
+
+        Edges are removed first, then nodes (with their edges), then nodes and edges are added.
+
+        Args:
+            add_nodes (1darray): indices of new nodes, indices of removed nodes can be used again.
+            remove_nodes (1darray): indices of nodes to remove.
+            add_edges (2darray|tuple): new edges, between nodes in the layout or new nodes.
+            remove_edges (2darray|tuple): edges to remove.
+            positions (2darray|None): initial positions of new nodes, default is the center of their placed neighbors.
+
+        Returns:
+            1darray: indices of moved nodes, new nodes included.
+        '''
+        add_nodes = np.asarray(add_nodes, dtype='int64').ravel()
+        remove_nodes = np.asarray(remove_nodes, dtype='int64').ravel()
+        seeds = set()
+        for i, j in as_edges(remove_edges):
+            self._unlink(i, j)
+            seeds.update((i, j))
+        for i in remove_nodes:
+            self._check(i)
+            for j in list(self._neighbors.get(i, ())):
+                while j in self._neighbors.get(i, ()):
+                    self._unlink(i, j)
+                seeds.add(j)
+            self._cells[tuple(self._cell[i])].discard(i)
+            self._alive[i] = False
+            self._xy[i] = np.nan
+
+        if len(add_nodes):
+            if add_nodes.max() >= len(self._xy):
+                self._reserve(max(add_nodes.max() + 1, 2 * len(self._xy)))
+            self.size = max(self.size, add_nodes.max() + 1)
+            if self._alive[add_nodes].any():
+                raise ValueError('node %d is already in the layout.' % add_nodes[self._alive[add_nodes]][0])
+            self._alive[add_nodes] = True
+        for i, j in as_edges(add_edges):
+            self._check(i)
+            self._check(j)
+            self._link(i, j)
+            seeds.update((i, j))
+        self._place(add_nodes, positions)
+
+        active = self._expand([i for i in seeds.union(add_nodes) if self._alive[i]])
+        self._refine(active)
+        return active
+
+    def _check(self, i):
+        if not (0 <= i < self.size and self._alive[i]):
+            raise ValueError('node %d is not in the layout.' % i)
+
+    def _link(self, i, j):
+        '''add an edge to neighbors, self loops do not count.'''
+        if i != j:
+            for a, b in [(i, j), (j, i)]:
+                counts = self._neighbors.setdefault(a, {})
+                counts[b] = counts.get(b, 0) + 1
+
+    def _unlink(self, i, j):
+        '''remove an edge from neighbors.'''
+        if i != j:
+            if j not in self._neighbors.get(i, ()):
+                raise ValueError('edge (%d, %d) is not in the layout.' % (i, j))
+            for a, b in [(i, j), (j, i)]:
+                self._neighbors[a][b] -= 1
+                if self._neighbors[a][b] == 0:
+                    del self._neighbors[a][b]
+
+    def _reserve(self, capacity):
+        '''grow the arrays to `capacity`.'''
+        for name, fill in [('_xy', np.nan), ('_cell', 0), ('_alive', False)]:
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _place(self, nodes, positions):
+        '''initial positions of new nodes, at centers of placed neighbors, or next to the layout if none of them is placed.'''
+        if positions is not None:
+            self._xy[nodes] = np.reshape(positions, (-1, 2))
+        else:
+            pending = set(nodes)
+            while pending:
+                placed = []
+                for i in sorted(pending):
+                    neighbors = [j for j in self._neighbors.get(i, ()) if j not in pending]
+                    if neighbors:
+                        jitter = self._rng.randn(2) * 0.1 * self.space
+                        self._xy[i] = self._xy[neighbors].mean(axis=0) + jitter
+                        placed.append(i)
+                if not placed:
+                    # a new component, it starts on the right of the layout.
+                    placed = [min(pending)]
+                    self._xy[placed[0]] = self._upper[0] + self.space, (self._lower[1] + self._upper[1]) / 2.
+                pending.difference_update(placed)
+                self._lower = np.minimum(self._lower, self._xy[placed].min(axis=0))
+                self._upper = np.maximum(self._upper, self._xy[placed].max(axis=0))
+        self._cell[nodes] = np.floor(self._xy[nodes] / (self.cutoff * self.space)).astype('int64')
+        for i in nodes:
+            self._cells.setdefault(tuple(self._cell[i]), set()).add(i)
+
+    def _expand(self, seeds):
+        '''nodes within `radius` hops of seeds.'''
+        found, front = set(seeds), set(seeds)
+        for step in range(self.radius):
+            front = set(j for i in front for j in self._neighbors.get(i, ())) - found
+            found |= front
+        return np.array(sorted(found), dtype='int64')
+
+    def _refine(self, active):
+        '''spring iterations moving active nodes, with repulsion from nodes in neighboring cells and pull of edges.'''
+        if len(active) == 0:
+            return
+        # surroundings, neighbors of active nodes and nodes in cells next to them.
+        active_set = set(active.tolist())
+        others = set()
+        for i in active:
+            others.update(self._neighbors.get(i, ()))
+            x, y = self._cell[i]
+            for key in [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]:
+                others.update(self._cells.get(key, ()))
+        nodes = np.concatenate([active, sorted(others - active_set)]).astype('int64')
+        local = dict(zip(nodes.tolist(), range(len(nodes))))
+        edges = np.array([(local[i], local[j]) for i in active for j in self._neighbors.get(i, ()) if j not in active_set or i < j],
+                         dtype='int64').reshape(-1, 2)
+        xy = self._xy[nodes]
+        pairs = cKDTree(xy).query_pairs(self.cutoff * self.space, output_type='ndarray')
+        pairs = pairs[pairs.min(axis=1) < len(active)]
+
+        num_active, num_all = len(active), len(nodes)
+        for step in range(self.num_iter):
+            force = np.zeros([num_all, 2])
+            delta = xy[pairs[:, 0]] - xy[pairs[:, 1]]
+            dist2 = np.maximum((delta**2).sum(axis=1), 1e-12 * self.space**2)
+            push = delta * (self.space**2 / dist2)[:, None]
+            delta = xy[edges[:, 0]] - xy[edges[:, 1]]
+            pull = delta * (np.sqrt((delta**2).sum(axis=1)) / self.space)[:, None]
+            for i in range(2):
+                force[:, i] += np.bincount(pairs[:, 0], weights=push[:, i], minlength=num_all)
+                force[:, i] -= np.bincount(pairs[:, 1], weights=push[:, i], minlength=num_all)
+                force[:, i] -= np.bincount(edges[:, 0], weights=pull[:, i], minlength=num_all)
+                force[:, i] += np.bincount(edges[:, 1], weights=pull[:, i], minlength=num_all)
+            force = force[:num_active]
+            length = np.maximum(np.sqrt((force**2).sum(axis=1)), 1e-300)
+            t = self.space * (1 - step / float(self.num_iter))
+            xy[:num_active] += force * (np.minimum(length, t) / length)[:, None]
+
+        self._xy[active] = xy[:num_active]
+        self._lower = np.minimum(self._lower, xy[:num_active].min(axis=0))
+        self._upper = np.maximum(self._upper, xy[:num_active].max(axis=0))
+        cell = np.floor(xy[:num_active] / (self.cutoff * self.space)).astype('int64')
+        for i, old, new in zip(active, self._cell[active], cell):
+            if (old != new).any():
+                self._cells[tuple(old)].discard(i)
+                self._cells.setdefault(tuple(new), set()).add(i)
+        self._cell[active] = cell
@@ -1,8 +1,10 @@
-import pdb, re
+import re
 import numpy as np
-import matplotlib.pyplot as plt
 
-from . import NodeBrush, DynamicShow, QuantumCircuit, Pin
+from .brush import NodeBrush
+from .circuit import QuantumCircuit
+from .edgenode import Pin
+from .utils import get_ax
 
 GATE = NodeBrush('qc.basic')
 WIDE = NodeBrush('qc.wide')
@@ -165,7 +167,7 @@ def dict2circuit(datamap, handler=None, blockdict=None, putstart=None):
     if putstart:
         # text |0>s
         for i in range(datamap['nline']):
-            plt.text(-0.4, -i, r'$\vert0\rangle$', va='center', ha='center', fontsize=setting['fontsize'])
+            get_ax(handler.ax).text(-0.4, -i, r'$\vert0\rangle$', va='center', ha='center', fontsize=setting['fontsize'])
         handler.x += 0.8
 
     if isinstance(datamap, str):
@@ -0,0 +1,131 @@
+'''
+density rasterization of massive edge sets, edges are accumulated into a count grid and drawn as one image.
+'''
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.colors import to_rgba
+from matplotlib.image import AxesImage
+
+CHUNK_SIZE = 1 << 22
+'''
+number of samples on lines rasterized at a time, memory usage does not grow with the number of edges.
+'''
+
+MAX_PIXELS = 4096
+'''
+maximum width (height) of density images in pixels.
+'''
+
+
+def rasterize_lines(sxy, exy, extent, shape):
+    '''
+    count lines crossing each cell of a grid.
+
+    Lines are sampled with one point per cell along their major axis (a vectorized DDA), and counted once per cell.
+
+    Args:
+        sxy (2darray): start points, with shape (N, 2).
+        exy (2darray): end points, with shape (N, 2).
+        extent (tuple): (xmin, xmax, ymin, ymax) of the grid.
+        shape (tuple): (ny, nx), number of cells.
+
+    Returns:
+        2darray: counts with shape (ny, nx), the first row is at ymin.
+    '''
+    ny, nx = shape
+    xmin, xmax, ymin, ymax = extent
+    sxy = np.asarray(sxy, dtype='float64').reshape(-1, 2)
+    exy = np.asarray(exy, dtype='float64').reshape(-1, 2)
+    # in units of cells, the upper borders belong to the last cells.
+    scale = np.array([nx / (xmax - xmin), ny / (ymax - ymin)]) * (1 - 1e-9)
+    sxy = (sxy - (xmin, ymin)) * scale
+    d = (exy - (xmin, ymin)) * scale - sxy
+    num_sample = np.ceil(abs(d).max(axis=1)).astype('int64') + 1
+    # steps between samples, at most one cell along the major axis.
+    d /= np.maximum(num_sample - 1, 1)[:, None]
+
+    counts = np.zeros(ny * nx)
+    # split lines into chunks of about CHUNK_SIZE samples.
+    bounds = np.searchsorted(np.cumsum(num_sample), np.arange(1, num_sample.sum() // CHUNK_SIZE + 1) * CHUNK_SIZE)
+    for start, stop in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(sxy)]])):
+        n = num_sample[start:stop]
+        # single precision is exact enough for grids up to MAX_PIXELS, and halves memory traffic.
+        step = np.arange(n.sum(), dtype='float32')
+        step -= np.repeat((np.cumsum(n) - n).astype('float32'), n)
+        x = np.repeat(d[start:stop, 0].astype('float32'), n)
+        x *= step
+        x += np.repeat(sxy[start:stop, 0].astype('float32'), n)
+        y = np.repeat(d[start:stop, 1].astype('float32'), n)
+        y *= step
+        y += np.repeat(sxy[start:stop, 1].astype('float32'), n)
+        inside = (x >= 0) & (x < nx) & (y >= 0) & (y < ny)
+        cell = y.astype('int32')
+        cell *= nx
+        cell += x.astype('int32')
+        # consecutive samples of a line in the same cell are counted once, samples of different lines never share a cell by step 0.
+        inside[1:] &= (cell[1:] != cell[:-1]) | (step[1:] == 0)
+        counts += np.bincount(cell[inside], minlength=ny * nx)
+    return counts.reshape(ny, nx)
+
+
+def density_rgba(counts, color='k', cmap=None):
+    '''
+    map counts to an RGBA image, by the logarithm of counts, empty cells are transparent.
+
+    Args:
+        counts (2darray): counts.
+        color (str|tuple): color of dense cells if `cmap` is None, sparse cells fade out.
+        cmap (str|None): name of a matplotlib colormap.
+
+    Returns:
+        3darray: RGBA image with shape counts.shape + (4,).
+    '''
+    level = np.log1p(counts)
+    level /= max(level.max(), 1e-300)
+    if cmap is None:
+        rgba = np.empty(counts.shape + (4,))
+        rgba[...] = to_rgba(color)
+        rgba[..., 3] *= level
+    else:
+        rgba = colormaps[cmap](level)
+        rgba[..., 3] *= counts > 0
+    return rgba
+
+
+def draw_density(ax, sxy, exy, color='k', cmap=None, zorder=0):
+    '''
+    draw edges as a density image.
+
+    The image covers the edges, with cells about the size of screen pixels, estimated from the size of axes and the extent of data.
+
+    Args:
+        ax (:obj:`Axes`): matplotlib Axes instance.
+        sxy (2darray): start points, with shape (N, 2).
+        exy (2darray): end points, with shape (N, 2).
+        color (str|tuple): color of dense cells if `cmap` is None.
+        cmap (str|None): name of a matplotlib colormap.
+        zorder (float): zorder of the image.
+
+    Returns:
+        :obj:`AxesImage`: the image.
+    '''
+    xy = np.concatenate([np.reshape(sxy, (-1, 2)), np.reshape(exy, (-1, 2))])
+    lower, upper = xy.min(axis=0), xy.max(axis=0)
+    # edges along a line still get a (one cell wide) image.
+    size = np.maximum(upper - lower, 1e-3 * max((upper - lower).max(), 1e-3))
+    lower, upper = (lower + upper - size) / 2., (lower + upper + size) / 2.
+    data_size = size
+    if np.isfinite(ax.dataLim.bounds).all() and ax.dataLim.width > 0:
+        data_size = np.maximum(upper, ax.dataLim.max) - np.minimum(lower, ax.dataLim.min)
+    bbox = ax.bbox
+    pixels_per_unit = min(bbox.width / data_size[0], bbox.height / data_size[1])
+    nx, ny = np.clip(np.ceil(size * pixels_per_unit), 1, MAX_PIXELS).astype('int64')
+    extent = (lower[0], upper[0], lower[1], upper[1])
+
+    obj = AxesImage(ax, extent=extent, origin='lower', interpolation='nearest', zorder=zorder)
+    obj.set_data(density_rgba(rasterize_lines(sxy, exy, extent, (ny, nx)), color, cmap))
+    ax.add_image(obj)
+    ax.update_datalim([lower, upper])
+    ax.autoscale_view()
+    return obj
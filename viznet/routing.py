@@ -0,0 +1,519 @@
+'''
+edge routing, orthogonal routes around bounding boxes of nodes, or given polylines.
+'''
+
+import heapq
+import warnings
+import numpy as np
+
+_INF = float('inf')
+
+
+class OrthogonalRouter(object):
+    '''
+    Orthogonal edge router, edges go around bounding boxes of nodes.
+
+    Routes are found by weighted A* search on a sparse orthogonal visibility graph, built once for all edges:
+    lines through corners of obstacles (kept `margin` away) run until they are blocked, and points where they cross are vertices.
+    End points of an edge are connected to the graph by horizontal and vertical lines through them.
+    The cost of a route is its length, plus `bend_cost` for each bend and `share_cost` for each unit length running along graph edges used by
+    previous routes, parallel segments sharing a channel are spread apart by :meth:`route_many`.
+    The search heuristic is scaled by `weight` to expand fewer states, a route costs at most `weight` times the minimum,
+    `weight=1` finds minimum cost routes at the price of speed when many channels are shared.
+
+    An edge may start inside its own nodes, nodes containing an end point are not obstacles of that edge,
+    the route leaves them along a horizontal or vertical line through the end point.
+
+    Args:
+        lower (2darray): lower left corners of bounding boxes, with shape (N, 2).
+        upper (2darray): upper right corners of bounding boxes, with shape (N, 2).
+        margin (float, default=0.1): clearance between edges and obstacles.
+        bend_cost (float, default=0.3): cost of a bend, in unit length.
+        share_cost (float, default=0.5): extra cost of a unit length of channel used by another route.
+        spacing (float, default=0.05): distance between parallel edges sharing a channel, shrinks to fit the margin.
+        weight (float, default=2.): weight of the search heuristic, no less than 1, routes cost at most `weight` times the minimum.
+
+    Examples:
+        router = OrthogonalRouter.from_store(nodes.store)
+        brush = RouteBrush('->-', router, roundness=0.1)
+        brush >> (nodes[0], nodes[10])
+    '''
+
+    def __init__(self, lower, upper, margin=0.1, bend_cost=0.3, share_cost=0.5, spacing=0.05, weight=2.):
+        self.lower = np.asarray(lower, dtype='float64').reshape(-1, 2)
+        self.upper = np.asarray(upper, dtype='float64').reshape(-1, 2)
+        self.margin = margin
+        self.bend_cost = bend_cost
+        self.share_cost = share_cost
+        self.spacing = spacing
+        self.weight = weight
+        # obstacles are boxes expanded by margin.
+        self._lo = self.lower - margin
+        self._hi = self.upper + margin
+        self._pad = 2 * margin + (self.upper - self.lower).max() if len(self.lower) else margin
+        self._frame = None
+        self.reset()
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        '''
+        obstacles from nodes in a :obj:`NodeStore`, removed nodes are skipped.
+        '''
+        index = store.index
+        alive = ~index.removed
+        return cls(index.centers[alive] - index.half_sizes[alive], index.centers[alive] + index.half_sizes[alive], **kwargs)
+
+    @classmethod
+    def from_nodes(cls, nodes, **kwargs):
+        '''
+        obstacles from a list of nodes.
+        '''
+        paths = [np.asarray(node.path) for node in nodes]
+        return cls([path.min(axis=0) for path in paths], [path.max(axis=0) for path in paths], **kwargs)
+
+    def reset(self):
+        '''forget recorded routes.'''
+        self._channels = (np.zeros([0, 3]), np.zeros([0, 3]))
+        self._channel_chunks = ([], [])
+        if self._frame is not None:
+            self._factor = [1.] * len(self._factor)
+
+    def route(self, sxy, exy):
+        '''
+        route an edge, and record it in `channels`.
+
+        Args:
+            sxy (1darray): start point.
+            exy (1darray): end point.
+
+        Returns:
+            2darray: vertices of the route, from `sxy` to `exy`,
+                an L shaped route (crossing obstacles) with a warning if no route avoids the obstacles.
+        '''
+        return self.route_many([sxy], [exy], spread=False)[0]
+
+    def route_many(self, sxys, exys, spread=True):
+        '''
+        route edges one by one, later routes avoid channels used by earlier ones.
+
+        Args:
+            sxys (2darray): start points with shape (N, 2).
+            exys (2darray): end points with shape (N, 2).
+            spread (bool, default=True): spread overlapping segments in shared channels apart.
+
+        Returns:
+            list: vertices of routes, 2darrays compatible with `rounded_path`,
+                edges with no route avoiding the obstacles are L shaped (crossing obstacles), with a warning.
+        '''
+        sxys, exys = np.broadcast_arrays(np.asarray(sxys, dtype='float64').reshape(-1, 2),
+                np.asarray(exys, dtype='float64').reshape(-1, 2))
+        num_edge = len(sxys)
+        points = np.concatenate([sxys, exys])
+        if self._frame is None or (points < self._frame[:2]).any() or (points > self._frame[2:]).any():
+            self._build(points)
+        # lines through end points, and the graph edges they cross, found in bulk.
+        lines, crossings = self._connect(points)
+        routes = []
+        for k in range(num_edge):
+            vertices = self._route(k, k + num_edge, points, lines, crossings)
+            self._record(vertices)
+            routes.append(vertices)
+        if spread:
+            self._spread(routes)
+        return routes
+
+    def _build(self, points):
+        '''build the visibility graph, in a frame around obstacles and `points`.'''
+        lower = np.concatenate([self._lo, points]).min(axis=0) - self._pad
+        upper = np.concatenate([self._hi, points]).max(axis=0) + self._pad
+        if self._frame is not None:
+            lower, upper = np.minimum(lower, self._frame[:2]), np.maximum(upper, self._frame[2:])
+        self._frame = np.concatenate([lower, upper])
+
+        # corners of obstacles, except those inside other obstacles.
+        corners = np.concatenate([np.stack([self._lo[:, 0], self._lo[:, 1]], axis=1), np.stack([self._hi[:, 0], self._lo[:, 1]], axis=1),
+            np.stack([self._lo[:, 0], self._hi[:, 1]], axis=1), np.stack([self._hi[:, 0], self._hi[:, 1]], axis=1)])
+        p, o = _stab(corners[:, 1], self._lo[:, 1], self._hi[:, 1])
+        inside = (self._lo[o, 0] < corners[p, 0]) & (corners[p, 0] < self._hi[o, 0])
+        corners = np.unique(np.delete(corners, p[inside], axis=0), axis=0)
+        # lines (c, start, stop) through corners, and borders of the frame.
+        hlines = np.concatenate([self._lines(corners, 0), [[lower[1], lower[0], upper[0]], [upper[1], lower[0], upper[0]]]])
+        vlines = np.concatenate([self._lines(corners, 1), [[lower[0], lower[1], upper[1]], [upper[0], lower[1], upper[1]]]])
+        self._hlines, self._vlines = np.unique(hlines, axis=0), np.unique(vlines, axis=0)
+
+        # vertices are crossings of lines, graph edges join neighboring vertices on a line.
+        i, j = _cross(self._hlines, self._vlines)
+        xy, vertex = np.unique(np.stack([self._vlines[j, 0], self._hlines[i, 0]], axis=1), axis=0, return_inverse=True)
+        vertex = vertex.ravel()
+        line = np.concatenate([i, j + len(self._hlines)])
+        coord = np.concatenate([xy[vertex, 0], xy[vertex, 1]])
+        vertex = np.concatenate([vertex, vertex])
+        order = np.lexsort((coord, line))
+        line, coord, vertex = line[order], coord[order], vertex[order]
+        # keys of (line, coordinate) pairs sort the same way, to locate points on lines.
+        self._stride = (upper - lower).max() + 1.
+        self._offset = lower.min()
+        self._keys = line * self._stride + (coord - self._offset)
+        self._line, self._vertex = line, vertex
+
+        pair = (line[1:] == line[:-1]) & (vertex[1:] != vertex[:-1])
+        edges = np.unique(np.sort(np.stack([vertex[:-1][pair], vertex[1:][pair]], axis=1), axis=1), axis=0)
+        delta = abs(xy[edges[:, 1]] - xy[edges[:, 0]])
+        axis = (delta[:, 1] > 0).astype('int64')
+        self._xy, self._edges = xy, edges
+        self._xs, self._ys = xy[:, 0].tolist(), xy[:, 1].tolist()
+        self._adjacency = [[] for _ in range(len(xy))]
+        for e, (a, b, length, ax) in enumerate(zip(edges[:, 0].tolist(), edges[:, 1].tolist(), delta.sum(axis=1).tolist(), axis.tolist())):
+            self._adjacency[a].append((b, length, ax, e))
+            self._adjacency[b].append((a, length, ax, e))
+        self._factor = [1.] * len(edges)
+
+    def _lines(self, points, axis, skip_own=False):
+        '''
+        lines (c, start, stop) through points along `axis` (0 for horizontal lines), until they are blocked by obstacles or the frame.
+
+        If `skip_own` is True, lines leave obstacles containing their points:
+        nodes containing a point are skipped, lines only keep out of (unexpanded) nodes less than `margin` away.
+        '''
+        c, s = points[:, 1 - axis], points[:, axis]
+        start = np.full(len(points), self._frame[axis])
+        stop = np.full(len(points), self._frame[2 + axis])
+        p, o = _stab(c, self._lo[:, 1 - axis], self._hi[:, 1 - axis])
+        lo, hi = self._lo[o, axis], self._hi[o, axis]
+        if skip_own:
+            near = (lo < s[p]) & (s[p] < hi)
+            lo, hi = np.where(near, self.lower[o, axis], lo), np.where(near, self.upper[o, axis], hi)
+            keep = ~near | ((self.lower[o, 1 - axis] < c[p]) & (c[p] < self.upper[o, 1 - axis]) & ((s[p] < lo) | (s[p] > hi)))
+            p, lo, hi = p[keep], lo[keep], hi[keep]
+        before = hi <= s[p]
+        after = lo >= s[p]
+        inside = ~before & ~after
+        np.maximum.at(start, p[before], hi[before])
+        np.minimum.at(stop, p[after], lo[after])
+        np.maximum.at(start, p[inside], s[p[inside]])
+        np.minimum.at(stop, p[inside], s[p[inside]])
+        return np.stack([c, start, stop], axis=1)
+
+    def _connect(self, points):
+        '''
+        lines through points, and their crossings with lines of the graph.
+
+        Returns:
+            tuple: horizontal and vertical lines through points, and for each axis, crossings sorted by points,
+            as lists (bounds of points, position along the line, vertices before and after on the graph line, distances to them, graph edge).
+        '''
+        lines = [self._lines(points, 0, True), self._lines(points, 1, True)]
+        num_vertex = len(self._xy)
+        crossings = []
+        for axis, others, first in [(0, self._vlines, len(self._hlines)), (1, self._hlines, 0)]:
+            p, j = _cross(lines[0], others) if axis == 0 else _cross(others, lines[1])[::-1]
+            order = np.argsort(p, kind='stable')
+            p, j = p[order], j[order]
+            # vertices next to the crossing on the graph line, -1 if none.
+            line, c = j + first, lines[axis][p, 0]
+            pos = np.searchsorted(self._keys, line * self._stride + (c - self._offset), 'right')
+            before = np.where((pos > 0) & (self._line[np.maximum(pos - 1, 0)] == line), self._vertex[np.maximum(pos - 1, 0)], -1)
+            pos = np.minimum(pos, len(self._keys) - 1)
+            after = np.where(self._line[pos] == line, self._vertex[pos], -1)
+            dbefore, dafter = abs(self._xy[before, 1 - axis] - c), abs(self._xy[after, 1 - axis] - c)
+            # the graph edge between them.
+            key = np.minimum(before, after) * num_vertex + np.maximum(before, after)
+            edge = np.searchsorted(self._edges[:, 0] * num_vertex + self._edges[:, 1], key)
+            edge = np.where((before >= 0) & (after >= 0), edge, -1)
+            bounds = np.searchsorted(p, np.arange(len(points) + 1))
+            crossings.append([bounds] + [item.tolist() for item in [others[j, 0], before, after, dbefore, dafter, edge]])
+        return lines, crossings
+
+    def _route(self, s, t, points, lines, crossings):
+        '''route from points[s] to points[t], leaving and entering the graph along lines through both points.'''
+        sxy, txy = points[s].tolist(), points[t].tolist()
+        bend_cost, factor = self.bend_cost, self._factor
+        starts, goals = [], {}
+        for axis in [0, 1]:
+            bounds, others, before, after, dbefore, dafter, edge = crossings[axis]
+            c = sxy[1 - axis]
+            for i in range(bounds[s], bounds[s + 1]):
+                point = (others[i], c) if axis == 0 else (c, others[i])
+                cost = abs(others[i] - sxy[axis]) + bend_cost
+                scale = factor[edge[i]] if edge[i] >= 0 else 1.
+                for v, d in [(before[i], dbefore[i]), (after[i], dafter[i])]:
+                    if v >= 0:
+                        starts.append((cost + d * scale, v, 1 - axis, edge[i], point))
+            c = txy[1 - axis]
+            for i in range(bounds[t], bounds[t + 1]):
+                point = (others[i], c) if axis == 0 else (c, others[i])
+                cost = abs(others[i] - txy[axis]) + bend_cost
+                for v, d in [(before[i], dbefore[i]), (after[i], dafter[i])]:
+                    if v >= 0:
+                        goals.setdefault(v, []).append((1 - axis, d, edge[i], cost, point))
+
+        # routes along lines through both points only.
+        best = (_INF, None, [])
+        for axis in [0, 1]:
+            sline, tline = lines[axis][s], lines[1 - axis][t]
+            if sline[1] <= tline[0] <= sline[2] and tline[1] <= sline[0] <= tline[2]:
+                corner = (tline[0], sline[0]) if axis == 0 else (sline[0], tline[0])
+                cost = abs(sxy[0] - txy[0]) + abs(sxy[1] - txy[1]) + bend_cost
+                best = min(best, (cost, [corner], []))
+            if txy[1 - axis] == sline[0] and sline[1] <= txy[axis] <= sline[2]:
+                best = min(best, (abs(sxy[axis] - txy[axis]), [], []))
+            # and a graph edge crossed by lines through both points.
+            bounds, others, before, after, dbefore, dafter, edge = crossings[axis]
+            crossed = {edge[i]: i for i in range(bounds[t], bounds[t + 1]) if edge[i] >= 0}
+            for i in range(bounds[s], bounds[s + 1]):
+                j = crossed.get(edge[i], -1)
+                if j >= 0:
+                    cost = abs(others[i] - sxy[axis]) + abs(others[j] - txy[axis]) + 2 * bend_cost + \
+                            abs(sxy[1 - axis] - txy[1 - axis]) * factor[edge[i]]
+                    points = [(others[i], sxy[1 - axis]), (others[j], txy[1 - axis])] if axis == 0 else \
+                            [(sxy[1 - axis], others[i]), (txy[1 - axis], others[j])]
+                    best = min(best, (cost, points, [edge[i]]))
+
+        path = _astar(self._xs, self._ys, self._adjacency, factor, starts, goals, txy, best, bend_cost, self.weight)
+        if path is None:
+            warnings.warn('no route from %s to %s avoids the obstacles, an L shaped route crossing them is used.' % (tuple(sxy), tuple(txy)))
+            return _merge_collinear(np.array([sxy, (txy[0], sxy[1]), txy]))
+        vertices, edges = path
+        for e in edges:
+            if e >= 0:
+                factor[e] = 1. + self.share_cost
+        return _merge_collinear(np.array([sxy] + vertices + [txy]))
+
+    @property
+    def channels(self):
+        '''
+        tuple: segments of recorded routes, rows of (y, xmin, xmax) for horizontal segments and (x, ymin, ymax) for vertical ones.
+        '''
+        if self._channel_chunks[0] or self._channel_chunks[1]:
+            self._channels = tuple(np.concatenate([channels] + chunks) for channels, chunks in zip(self._channels, self._channel_chunks))
+            self._channel_chunks = ([], [])
+        return self._channels
+
+    def _record(self, vertices):
+        '''record segments of a route in channels.'''
+        start, stop = vertices[:-1], vertices[1:]
+        for axis in [1, 0]:
+            mask = (start[:, axis] == stop[:, axis]) & (start[:, 1-axis] != stop[:, 1-axis])
+            self._channel_chunks[1-axis].append(np.stack([start[mask, axis], np.minimum(start[mask, 1-axis], stop[mask, 1-axis]),
+                np.maximum(start[mask, 1-axis], stop[mask, 1-axis])], axis=1))
+
+    def _spread(self, routes):
+        '''
+        spread overlapping segments on the same line into parallel tracks, inplace.
+
+        Only segments between two bends are moved, and by less than `margin`, so that routes keep clear of obstacles.
+        '''
+        segments = {}
+        for r, vertices in enumerate(routes):
+            for k in range(1, len(vertices) - 2):
+                axis = int(vertices[k, 1] == vertices[k+1, 1])
+                start, stop = sorted([vertices[k, 1-axis], vertices[k+1, 1-axis]])
+                segments.setdefault((axis, vertices[k, axis]), []).append((start, stop, r, k))
+        for (axis, _), items in segments.items():
+            if len(items) == 1:
+                continue
+            # greedy interval coloring, overlapping segments get different tracks.
+            items.sort()
+            ends, tracks = [], []
+            for start, stop, r, k in items:
+                for t, end in enumerate(ends):
+                    if end < start:
+                        break
+                else:
+                    t = len(ends)
+                    ends.append(None)
+                ends[t] = stop
+                tracks.append(t)
+            num_track = len(ends)
+            if num_track == 1:
+                continue
+            space = min(self.spacing, 1.8 * self.margin / (num_track - 1))
+            for (start, stop, r, k), t in zip(items, tracks):
+                routes[r][k:k+2, axis] += (t - (num_track - 1) / 2.) * space
+
+
+class PolylineRouter(object):
+    '''
+    Router replaying given polylines, e.g. routes of edges from :func:`layered_layout`.
+
+    A route is looked up by its end points (rounded to `decimals`), and reversed for an edge in the opposite direction,
+    edges without a route are straight lines.
+
+    Args:
+        routes (list): polylines, 2darrays of vertices from start points to end points.
+        decimals (int, default=6): decimals of end points to match.
+
+    Example:
+        >>> xy, routes = layered_layout(edges)
+        >>> nodes = NodeBrush('nn.input', canvas) >> xy
+        >>> RouteBrush('->', PolylineRouter(routes), canvas) >> (nodes[edges[:, 0]], nodes[edges[:, 1]])
+    '''
+
+    def __init__(self, routes, decimals=6):
+        self.decimals = decimals
+        self.routes = {}
+        for vertices in routes:
+            vertices = np.asarray(vertices, dtype='float64')
+            self.routes.setdefault(self._key(vertices[0], vertices[-1]), vertices)
+
+    def _key(self, sxy, exy):
+        return tuple(np.round(np.concatenate([sxy, exy]), self.decimals) + 0.)
+
+    def reset(self):
+        '''nothing to forget, routes are fixed.'''
+
+    def route(self, sxy, exy):
+        '''
+        route an edge.
+
+        Args:
+            sxy (1darray): start point.
+            exy (1darray): end point.
+
+        Returns:
+            2darray: vertices of the route, from `sxy` to `exy`.
+        '''
+        return self.route_many([sxy], [exy])[0]
+
+    def route_many(self, sxys, exys):
+        '''
+        route edges.
+
+        Args:
+            sxys (2darray): start points with shape (N, 2).
+            exys (2darray): end points with shape (N, 2).
+
+        Returns:
+            list: vertices of routes.
+        '''
+        sxys, exys = np.broadcast_arrays(np.asarray(sxys, dtype='float64').reshape(-1, 2),
+                np.asarray(exys, dtype='float64').reshape(-1, 2))
+        routes = []
+        for sxy, exy in zip(sxys, exys):
+            vertices = self.routes.get(self._key(sxy, exy))
+            if vertices is None:
+                vertices = self.routes.get(self._key(exy, sxy))
+                vertices = np.stack([sxy, exy]) if vertices is None else vertices[::-1]
+            routes.append(vertices.copy())
+        return routes
+
+
+def _stab(points, lo, hi, closed=False):
+    '''
+    pairs (point, interval) of points inside intervals, `lo < point < hi` (or `<=` if `closed`).
+
+    Intervals are registered in bands as wide as their mean length, a point is only checked against intervals in its band.
+
+    Returns:
+        tuple: (point, interval) index arrays.
+    '''
+    if len(points) == 0 or len(lo) == 0:
+        return np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64')
+    base = min(points.min(), lo.min())
+    width = max((hi - lo).mean(), 1e-9 * max(hi.max() - base, 1.))
+    b0 = ((lo - base) // width).astype('int64')
+    num = ((hi - base) // width).astype('int64') - b0 + 1
+    start = np.cumsum(num) - num
+    band = np.repeat(b0 - start, num) + np.arange(num.sum())
+    interval = np.repeat(np.arange(len(lo)), num)
+    order = np.argsort(band, kind='stable')
+    band, interval = band[order], interval[order]
+    pb = ((points - base) // width).astype('int64')
+    first, last = np.searchsorted(band, pb), np.searchsorted(band, pb, 'right')
+    num = last - first
+    start = np.cumsum(num) - num
+    point = np.repeat(np.arange(len(points)), num)
+    interval = interval[np.repeat(first - start, num) + np.arange(num.sum())]
+    if closed:
+        mask = (lo[interval] <= points[point]) & (points[point] <= hi[interval])
+    else:
+        mask = (lo[interval] < points[point]) & (points[point] < hi[interval])
+    return point[mask], interval[mask]
+
+
+def _cross(hlines, vlines):
+    '''pairs (i, j) of horizontal lines (y, xmin, xmax) crossing (or touching) vertical lines (x, ymin, ymax).'''
+    i, j = _stab(hlines[:, 0], vlines[:, 1], vlines[:, 2], closed=True)
+    mask = (hlines[i, 1] <= vlines[j, 0]) & (vlines[j, 0] <= hlines[i, 2])
+    return i[mask], j[mask]
+
+
+def _astar(xs, ys, adjacency, factor, starts, goals, goal, best, bend_cost, weight=1.):
+    '''
+    weighted A* search from a source to a goal off a graph of horizontal and vertical edges,
+    states are (vertex, direction of the last move), a change of direction costs `bend_cost`.
+
+    Neighbors of vertices are (vertex, length, axis, edge) in `adjacency`, costs of lengths are scaled by `factor[edge]`.
+
+    Args:
+        starts (list): ways from the source to the graph, (cost, vertex, axis, edge, point), `vertex` is reached along `axis` from `point`.
+        goals (dict): ways from vertices to the goal, lists of (axis, length, edge, cost, point),
+            `point` is `length` away along `axis`, the rest costs `cost`.
+        goal (tuple): position of the goal.
+        best (tuple): (cost, points, edges) of the cheapest route off the graph.
+
+    Returns:
+        tuple|None: points on the route (without the source and the goal), and graph edges on it, None if the goal is not reachable.
+    '''
+    tx, ty = goal
+    # the heuristic is the length to go plus a bend if not aligned with the goal, it never overestimates the cost to go.
+    # it is weighted to expand fewer states, routes cost at most `weight` times the cheapest one.
+    wbend = weight * bend_cost
+    # states are 2 * vertex + axis.
+    g, parent = {}, {}
+    heap = []
+    heappop, heappush = heapq.heappop, heapq.heappush
+    inf = _INF
+    for cost, v, axis, e, point in starts:
+        state = 2 * v + axis
+        if cost < g.get(state, inf):
+            g[state] = cost
+            parent[state] = (None, e, point)
+            dx, dy = abs(xs[v] - tx), abs(ys[v] - ty)
+            heap.append((cost + weight * (dx + dy) + (wbend if dx > 0 and dy > 0 else 0.), -cost, state))
+    heapq.heapify(heap)
+    best_cost, best_points, best_edges = best
+    final = None
+    while heap:
+        f, gs, state = heappop(heap)
+        if f >= best_cost:
+            break
+        gs = -gs
+        if gs > g[state]:
+            continue
+        v, axis = state >> 1, state & 1
+        if v in goals:
+            for axis_, length, e, cost, point in goals[v]:
+                cost += gs + (length * factor[e] if e >= 0 else length) + (bend_cost if axis_ != axis else 0.)
+                if cost < best_cost:
+                    best_cost, final = cost, (state, e, point)
+        # ties of f are broken in favor of larger g, there are many equally short orthogonal routes.
+        for u, length, axis_, e in adjacency[v]:
+            gu = gs + length * factor[e] + (bend_cost if axis_ != axis else 0.)
+            state_ = 2 * u + axis_
+            if gu < g.get(state_, inf):
+                g[state_] = gu
+                parent[state_] = (state, e, None)
+                dx, dy = abs(xs[u] - tx), abs(ys[u] - ty)
+                heappush(heap, (gu + weight * (dx + dy) + (wbend if dx > 0 and dy > 0 else 0.), -gu, state_))
+    if final is None:
+        return None if best_points is None else (best_points, best_edges)
+    state, e, point = final
+    points, edges = [point], [e]
+    while state is not None:
+        points.append((xs[state >> 1], ys[state >> 1]))
+        state, e, point = parent[state]
+        edges.append(e)
+        if point is not None:
+            points.append(point)
+    return points[::-1], edges
+
+
+def _merge_collinear(vertices):
+    '''remove vertices in the middle of straight segments.'''
+    vertices = vertices[np.concatenate([[True], (np.diff(vertices, axis=0) != 0).any(axis=1)])]
+    if len(vertices) < 3:
+        return vertices
+    d = np.diff(vertices, axis=0)
+    turn = np.abs(d[1:, 0] * d[:-1, 1] - d[1:, 1] * d[:-1, 0]) > 0
+    return vertices[np.concatenate([[True], turn, [True]])]
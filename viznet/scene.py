@@ -0,0 +1,363 @@
+'''
+retained-mode scene, nodes, edges and texts are recorded as arrays and only materialized on `render`.
+'''
+
+import copy
+import itertools
+import numpy as np
+
+from .brush import EdgeBrush, RouteBrush, _set_offsets
+from .edgenode import Pin, NodeCollection
+from .setting import edge_setting, lod_setting
+from .utils import get_ax
+
+
+class SceneNodes(object):
+    '''
+    A handle of nodes recorded in a :obj:`Scene`, it can be used as start or end of edges.
+
+    Attributes:
+        scene (:obj:`Scene`): the scene.
+        ids (1darray): node ids.
+    '''
+
+    def __init__(self, scene, ids):
+        self.scene = scene
+        self.ids = ids
+
+    @property
+    def position(self):
+        '''positions of nodes with shape (N, 2), or (2,) for a single node.'''
+        return self.scene.positions[self.ids]
+
+    def __len__(self):
+        return np.size(self.ids)
+
+    def __getitem__(self, index):
+        return SceneNodes(self.scene, np.atleast_1d(self.ids)[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Scene(object):
+    '''
+    A retained-mode diagram, it records nodes, edges and texts as compact arrays grouped by brushes,
+    and builds matplotlib artists (one collection per brush layer) only when rendered.
+
+    Brushes are kept by reference, change a brush (or the global settings) and render again to restyle the diagram.
+
+    Attributes:
+        brushes (list): node and edge brushes used in this scene.
+        texts (list): recorded texts, tuples of (node id, position, text, text position, keyword arguments).
+        handles (list): node collections, edge collections and texts created by the last `render`,
+            node collections are kept and moved by later renders while their brushes, axes and levels of detail are unchanged.
+
+    Examples:
+        scene = Scene()
+        layer1 = scene.add_nodes(NodeBrush('nn.input'), [[0, 0], [1, 0]])
+        layer2 = scene.add_nodes(NodeBrush('nn.output'), [[0, 1], [1, 1]])
+        scene.add_edges(EdgeBrush('->-'), layer1, layer2)
+        scene.add_text(layer2, ['y1', 'y2'], 'top')
+        with Canvas(filename='_scene.png') as canvas:
+            scene.render(canvas)
+    '''
+
+    def __init__(self):
+        self.brushes = []
+        self.texts = []
+        self.handles = []
+        # node layers kept across renders, brush index -> ((axes, tier, resolved style), node collection).
+        self._layers = {}
+
+        # nodes: brush index and position, stored in chunks and joined on demand.
+        self._node_chunks = []
+        self._nodes = (np.zeros(0, dtype='int32'), np.zeros([0, 2]))
+        self._num_node = 0
+
+        # edges: brush index, node ids of both ends (-1 for free positions) and positions of free ends.
+        self._edge_chunks = []
+        self._edges = (np.zeros(0, dtype='int32'), np.zeros([0, 2], dtype='int64'), np.zeros([0, 2, 2]))
+
+    def _brush_index(self, brush):
+        for i, brush_ in enumerate(self.brushes):
+            if brush_ is brush:
+                return i
+        self.brushes.append(brush)
+        return len(self.brushes) - 1
+
+    @property
+    def num_node(self):
+        return self._num_node
+
+    @property
+    def num_edge(self):
+        return len(self.edge_data[0])
+
+    @property
+    def node_data(self):
+        '''
+        tuple: brush indices (1darray) and positions (2darray) of all nodes.
+        '''
+        if self._node_chunks:
+            chunks = [self._nodes] + self._node_chunks
+            self._nodes = (np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]))
+            self._node_chunks = []
+        return self._nodes
+
+    @property
+    def positions(self):
+        '''
+        2darray: positions of all nodes, with shape (N, 2), edit it inplace to move nodes.
+        '''
+        return self.node_data[1]
+
+    @property
+    def edge_data(self):
+        '''
+        tuple: brush indices (1darray), node ids of start and end (2darray, -1 for free positions),
+            and positions of free start and end (3darray).
+        '''
+        if self._edge_chunks:
+            chunks = [self._edges] + self._edge_chunks
+            self._edges = tuple(np.concatenate([c[i] for c in chunks]) for i in range(3))
+            self._edge_chunks = []
+        return self._edges
+
+    def add_nodes(self, brush, xy):
+        '''
+        record nodes.
+
+        Args:
+            brush (NodeBrush): node brush.
+            xy (tuple|2darray): a position, or an array of positions with shape (N, 2).
+
+        Returns:
+            :obj:`SceneNodes`: handle of nodes.
+        '''
+        xy = np.asarray(xy, dtype='float64')
+        single = xy.ndim == 1
+        xy = xy.reshape(-1, 2)
+        ids = np.arange(self._num_node, self._num_node + len(xy))
+        self._node_chunks.append((np.full(len(xy), self._brush_index(brush), dtype='int32'), xy))
+        self._num_node += len(xy)
+        return SceneNodes(self, ids[0] if single else ids)
+
+    def add_edges(self, brush, start, end):
+        '''
+        record edges.
+
+        Args:
+            brush (EdgeBrush): edge brush.
+            start (:obj:`SceneNodes`|tuple|2darray): start nodes, or positions.
+            end (:obj:`SceneNodes`|tuple|2darray): end nodes, or positions.
+
+        Returns:
+            1darray: edge ids.
+        '''
+        if not isinstance(brush, EdgeBrush):
+            raise TypeError('scenes record edges of EdgeBrush (and its subclasses), got %s.' % type(brush).__name__)
+        sid, sxy = _endpoints(start)
+        eid, exy = _endpoints(end)
+        sid, eid = np.broadcast_arrays(sid, eid)
+        sxy, exy = np.broadcast_arrays(sxy, exy)
+        num_edge = self.num_edge
+        self._edge_chunks.append((np.full(len(sid), self._brush_index(brush), dtype='int32'),
+            np.stack([sid, eid], axis=1), np.stack([sxy, exy], axis=1)))
+        return np.arange(num_edge, num_edge + len(sid))
+
+    def add_text(self, target, text, position='center', **kwargs):
+        '''
+        record texts, arguments are the same as `EdgeNode.text`.
+
+        Args:
+            target (:obj:`SceneNodes`|tuple|2darray): nodes, or positions.
+            text (str|list): the text, or a list of texts for each target.
+        '''
+        ids, xys = _endpoints(target)
+        texts = [text] * len(ids) if isinstance(text, str) else list(text)
+        if len(texts) != len(ids):
+            raise ValueError('got %d texts for %d targets.' % (len(texts), len(ids)))
+        for node_id, xy, text in zip(ids, xys, texts):
+            self.texts.append((node_id, xy, text, position, kwargs))
+
+    def clear(self):
+        '''remove artists created by `render`.'''
+        self._clear_edges()
+        for key, collection in self._layers.values():
+            collection.remove()
+        self._layers = {}
+
+    def _clear_edges(self):
+        '''remove artists of edges and texts created by the last `render`, node layers are kept.'''
+        layers = [collection for key, collection in self._layers.values()]
+        for handle in self.handles:
+            if not any(handle is collection for collection in layers):
+                handle.remove()
+        self.handles = []
+
+    def _layer(self, ib, ax, tier, xys):
+        '''
+        the node collection of a brush, its artists and store are reused (with positions updated) while the brush, axes,
+        level of detail and number of nodes are unchanged.
+        '''
+        brush = self.brushes[ib]
+        if ib in self._layers:
+            (ax_, tier_, resolved), collection = self._layers[ib]
+            if ax_ is ax and tier_ == tier and resolved is brush.resolved and len(collection) == len(xys):
+                collection.store.positions[:] = xys
+                collection.store.invalidate()
+                return collection
+            collection.remove()
+        objs, templates = brush._place_layer(ax, xys, tier)
+        collection = NodeCollection(objs, xys, templates, copy.copy(brush))
+        self._layers[ib] = ((ax, tier, brush.resolved), collection)
+        return collection
+
+    def render(self, ax=None, window=None, lod=False):
+        '''
+        materialize the scene, edges and texts of the previous render are replaced, and routers of route brushes are reset.
+        Artists of nodes are kept, a render on the same axes (e.g. panning or zooming) only moves them to the visible nodes.
+
+        Args:
+            ax (:obj:`Axes`|:obj:`Canvas`|None): target, None to use the current axes of pyplot.
+            window (tuple|None): (xmin, xmax, ymin, ymax), nodes, edges and texts out of this window are culled.
+            lod (bool, default=False): level of detail, pick a tier for each node brush by its size on screen (see `lod_setting`),
+                small nodes are drawn as plain discs, points or dropped, texts on them and small arrow heads are dropped.
+
+        Returns:
+            list: node collections, edge collections and texts.
+        '''
+        self._clear_edges()
+        _reset_routers(self.brushes)
+        ax = get_ax(ax)
+        node_brush, positions = self.node_data
+        edge_brush, ids, free_xy = self.edge_data
+        scale = self.pixels_per_unit(ax, window) if lod else np.inf
+
+        # nodes of each brush form a collection kept across renders, `local` is the index of a node in its collection.
+        collections = {}
+        labeled = np.zeros(len(self.brushes), dtype='bool')
+        local = np.zeros(len(node_brush), dtype='int64')
+        for ib in np.unique(node_brush):
+            mask = node_brush == ib
+            local[mask] = np.arange(mask.sum())
+            brush = self.brushes[ib]
+            xys = positions[mask]
+            visible = _in_window(xys, xys, window, np.max(brush._size))
+            size = 2 * np.max(brush._size) * scale
+            labeled[ib] = size >= lod_setting['text']
+            # artists only draw visible nodes, culled nodes can be connected too.
+            collection = collections[ib] = self._layer(ib, ax, lod_tier(size), xys)
+            _set_offsets(collection.objs, xys[visible])
+            if collection.objs:
+                self.handles.append(collection)
+
+        # edges sharing a brush, a start brush and an end brush are drawn in one batch.
+        node_brush_ = np.append(node_brush, -1)
+        xy = np.where((ids >= 0)[..., None], positions[ids] if len(positions) else free_xy, free_xy)
+        visible = _in_window(xy.min(axis=1), xy.max(axis=1), window, 0)
+        groups = np.stack([edge_brush, node_brush_[ids[:, 0]], node_brush_[ids[:, 1]]], axis=1)[visible]
+        edge_index = np.flatnonzero(visible)
+        unique_groups, first = np.unique(groups, axis=0, return_index=True)
+        for group in unique_groups[np.argsort(first)]:
+            index = edge_index[(groups == group).all(axis=1)]
+            brush = self.brushes[group[0]]
+            if edge_setting['arrow_head_length'] * brush.lw * scale < lod_setting['arrow'] and brush.style != _strip_arrows(brush.style):
+                brush = copy.copy(brush)
+                brush.style = _strip_arrows(brush.style)
+            ends = [collections[ib][local[ids[index, i]]] if ib >= 0 else free_xy[index, i]
+                    for i, ib in enumerate(group[1:])]
+            if type(brush) in (EdgeBrush, RouteBrush):
+                self.handles.append(brush._connect_batch(ax, ends[0], ends[1]))
+            else:
+                brush = copy.copy(brush)
+                brush.ax = ax
+                for i in range(len(index)):
+                    self.handles.append(brush >> tuple(_single(end, i, ax) for end in ends))
+
+        for node_id, xy, text, position, kwargs in self.texts:
+            if node_id >= 0:
+                if not labeled[node_brush[node_id]] or not _in_window(positions[node_id], positions[node_id], window, 0):
+                    continue
+                target = _single(collections[node_brush[node_id]], local[node_id], ax)
+            else:
+                if not _in_window(np.asarray(xy), np.asarray(xy), window, 0):
+                    continue
+                target = Pin(xy, ax=ax)
+            self.handles.append(target.text(text, position, **kwargs))
+        return self.handles
+
+    def pixels_per_unit(self, ax, window=None):
+        '''
+        size of a unit length on screen in pixels, assuming equal axis fitting the window (or the scene).
+
+        Args:
+            ax (:obj:`Axes`|:obj:`Canvas`): target, the size of axes comes from figure size and DPI.
+            window (tuple|None): (xmin, xmax, ymin, ymax), None for the extent of the scene.
+        '''
+        ax = get_ax(ax)
+        if window is None:
+            node_brush, positions = self.node_data
+            edge_brush, ids, free_xy = self.edge_data
+            margin = max([np.max(self.brushes[ib]._size) for ib in np.unique(node_brush)], default=0)
+            xys = np.concatenate([positions - margin, positions + margin, free_xy[ids < 0]])
+            if len(xys) == 0:
+                return np.inf
+            (xmin, ymin), (xmax, ymax) = xys.min(axis=0), xys.max(axis=0)
+        else:
+            xmin, xmax, ymin, ymax = window
+        bbox = ax.bbox
+        with np.errstate(divide='ignore'):
+            return min(bbox.width / (xmax - xmin), bbox.height / (ymax - ymin))
+
+
+def lod_tier(size):
+    '''
+    level of detail for nodes of `size` pixels on screen.
+
+    Returns:
+        str: 'full', 'disc', 'point' or 'drop', by thresholds in `lod_setting`.
+    '''
+    for tier in ['full', 'disc', 'point']:
+        if size >= lod_setting[tier]:
+            return tier
+    return 'drop'
+
+
+def _strip_arrows(style):
+    '''an edge style without arrow heads, adjacent line segments of the same style are merged.'''
+    return ''.join(key for key, _ in itertools.groupby(c for c in style if c not in '<>'))
+
+
+def _endpoints(obj):
+    '''node ids (-1 for free positions) and positions of edge ends.'''
+    if isinstance(obj, SceneNodes):
+        ids = np.atleast_1d(obj.ids)
+        return ids, np.zeros([len(ids), 2])
+    xy = np.asarray(obj, dtype='float64').reshape(-1, 2)
+    return np.full(len(xy), -1), xy
+
+
+def _reset_routers(brushes):
+    '''routers of route brushes forget recorded routes, so that every render (or SVG file) of a scene gets the same routes.'''
+    for brush in brushes:
+        if isinstance(brush, RouteBrush):
+            brush.router.reset()
+
+
+def _single(end, i, ax):
+    '''the i-th node of a batch of ends.'''
+    if isinstance(end, NodeCollection):
+        return end[i]
+    return Pin(end[i], ax=ax)
+
+
+def _in_window(lower, upper, window, margin):
+    '''mask of boxes [lower, upper] (with margin) overlapping the window.'''
+    if window is None:
+        return np.ones(np.shape(lower)[:-1], dtype='bool')
+    xmin, xmax, ymin, ymax = window
+    return (upper[..., 0] >= xmin - margin) & (lower[..., 0] <= xmax + margin) & \
+           (upper[..., 1] >= ymin - margin) & (lower[..., 1] <= ymax + margin)
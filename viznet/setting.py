@@ -3,6 +3,8 @@ contains default settings for annotate, node, arrow and grid,
     * annotate_setting
     * node_setting
     * edge_setting
+    * lod_setting
+    * layout_setting
 
 Example:
     # disable edge for nodes
@@ -13,31 +15,93 @@ Example:
     node_setting['lw'] = 0
 '''
 
-annotate_setting = {
+
+class Setting(dict):
+    '''
+    a dict of settings, its `version` increases on every change, so that objects caching resolved settings know when to refresh.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super(Setting, self).__init__(*args, **kwargs)
+        self.version = 0
+
+    def _changed(method):
+        def wrapper(self, *args, **kwargs):
+            self.version += 1
+            return method(self, *args, **kwargs)
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    __setitem__ = _changed(dict.__setitem__)
+    __delitem__ = _changed(dict.__delitem__)
+    update = _changed(dict.update)
+    pop = _changed(dict.pop)
+    popitem = _changed(dict.popitem)
+    setdefault = _changed(dict.setdefault)
+    clear = _changed(dict.clear)
+    del _changed
+
+    def __ior__(self, other):
+        # `dict.__ior__` is missing before python 3.9.
+        self.update(other)
+        return self
+
+
+annotate_setting = Setting({
     'fontsize': 12,
     'text_offset': 0.07,
-}
+})
 '''
 global text setting
 '''
 
-node_setting = {
+node_setting = Setting({
     'lw': 0.7,
     'edgecolor': 'k',
 
     'inner_lw': 0.7,
     'inner_edgecolor': 'k',
     'inner_facecolor': 'none',
-}
+})
 '''
 global node style setting
 '''
 
-edge_setting = {
+edge_setting = Setting({
     'arrow_head_width': 0.04,
     'arrow_head_length': 0.06,
     'doubleline_space': 0.016,
-}
+
+    'density_threshold': 100000,
+    'density_cmap': None,
+})
+'''
+global edge style setting, batches of more than `density_threshold` edges are drawn as a density image,
+mapped by the colormap `density_cmap` (None for fading out the color of edges).
+'''
+
+lod_setting = Setting({
+    'full': 8.,
+    'disc': 2.,
+    'point': 0.2,
+    'text': 12.,
+    'arrow': 2.,
+})
+'''
+level of detail setting, sizes of nodes (arrow heads) on screen in pixels.
+    * full, nodes at least this size are drawn in full shape.
+    * disc, nodes at least this size are drawn as plain discs (squares), smaller ones as single points.
+    * point, nodes smaller than this are dropped.
+    * text, texts on nodes smaller than this are dropped.
+    * arrow, arrow heads shorter than this are dropped.
+'''
+
+layout_setting = Setting({
+    'cache_dir': None,
+    'cache_size': 2**30,
+})
 '''
-global edge style setting
+layout setting, layouts are cached in the directory `cache_dir` (None for no cache), taking at most `cache_size` bytes,
+see :obj:`LayoutCache`.
 '''
@@ -2,17 +2,18 @@
 
 from matplotlib import patches, transforms
 from matplotlib.path import Path
-import matplotlib.pyplot as plt
-from functools import reduce
+from functools import reduce, lru_cache
 import numpy as np
-import pdb
 from numpy.linalg import norm
 
-from .utils import rotate
+from .utils import rotate, get_ax
 from .setting import node_setting
 
 _basic_prop_list =  ['ls', 'facecolor', 'edgecolor', 'lw', 'zorder']
 
+TEMPLATE_CACHE_SIZE = 256
+'''maximum number of cached unit paths.'''
+
 def affine(pp, offset=(0,0), scale=1, angle=0):
     '''rotate path/patch by angle'''
     if isinstance(pp, (np.ndarray, list, tuple)):
@@ -29,7 +30,7 @@ def affine(pp, offset=(0,0), scale=1, angle=0):
         pp = pp.transformed(_affine)
     else:
         # for patch
-        pp.set_transform(_affine+plt.gca().transData)
+        pp.set_transform(_affine+get_ax(pp.axes).transData)
     return pp
 
 def rounded_path(vertices, roundness, close=False):
@@ -56,12 +57,114 @@ def rounded_path(vertices, roundness, close=False):
         vertices_new.append(vertices[-1])
     return Path(vertices_new, codes)
 
+class Shape(object):
+    '''
+    A registered geometry.
+
+    Attributes:
+        name (str): name of this geometry.
+        handler (func): `handler(xy, size, angle, roundness, props, **kwargs)` returns a list of patches.
+        inner_scale (float): size relative to the outer geometry, when used as an inner geometry.
+        template (str|None): key of the cached unit path, if this geometry is placed from a template.
+    '''
+    def __init__(self, name, handler, inner_scale=0.7, template=None):
+        self.name = name
+        self.handler = handler
+        self.inner_scale = inner_scale
+        self.template = template
+
+    def __call__(self, xy, size, angle, roundness, props, **kwargs):
+        return self.handler(xy, size, angle, roundness, props=props, **kwargs)
+
+    def __repr__(self):
+        return 'Shape(%s)' % self.name
+
+SHAPE_REGISTRY = {}
+'''
+registered geometries, a dict with names as keys and :obj:`Shape` instances as values.
+'''
+
+def register_shape(name, handler=None, inner_scale=0.7, template=None):
+    '''
+    register a geometry, so that it can be used in node themes.
+
+    Args:
+        name (str): name of this geometry.
+        handler (func|None): `handler(xy, size, angle, roundness, props, **kwargs)` returns a list of patches,
+            if None, return a decorator.
+        inner_scale (float): size relative to the outer geometry, when used as an inner geometry.
+        template (str|None): key of the cached unit path, if this geometry is placed from a template.
+
+    Returns:
+        :obj:`Shape`|func: the registered shape, or a decorator.
+
+    Example:
+        @register_shape('hexagon')
+        def hexagon(xy, size, angle, roundness, props, **kwargs):
+            path = [(np.cos(t), np.sin(t)) for t in np.arange(6) * np.pi / 3]
+            return polygon(xy, size, angle, roundness, props={'path': path}, **kwargs)
+    '''
+    if handler is None:
+        def decorator(handler):
+            register_shape(name, handler, inner_scale=inner_scale, template=template)
+            return handler
+        return decorator
+    shape = Shape(name, handler, inner_scale=inner_scale, template=template)
+    SHAPE_REGISTRY[name] = shape
+    return shape
+
+def get_shape(geo):
+    '''
+    resolve a geometry.
+
+    Args:
+        geo (str|:obj:`Shape`|func): name of a registered geometry, a shape or a handler.
+
+    Returns:
+        :obj:`Shape`: the shape.
+    '''
+    if isinstance(geo, Shape):
+        return geo
+    if callable(geo):
+        return Shape(getattr(geo, '__name__', 'custom'), geo)
+    try:
+        return SHAPE_REGISTRY[geo]
+    except KeyError:
+        raise ValueError('Unknown shape %s, register it by `register_shape` first.' % geo)
+
 def _fix(d):
     '''get universal parameters for patches.'''
     nd = dict(node_setting)
     nd.update(d)
     return {k:d.get(k) for k in _basic_prop_list}
 
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def unit_path(geometry, roundness=0, close=False):
+    '''
+    get the cached path of a built-in geometry with unit size, centered at origin.
+
+    Args:
+        geometry (str): key of `_UNIT_VERTICES`.
+        roundness (float): the roundness of corners, relative to size.
+        close (bool): close each sub-path if True.
+
+    Returns:
+        :obj:`Path`: read-only path, place it by `affine`.
+    '''
+    path = _join_paths([rounded_path(vertices, roundness, close=close) for vertices in _UNIT_VERTICES[geometry]])
+    return Path(path.vertices, path.codes, readonly=True)
+
+def _join_paths(paths):
+    '''join paths into one path with multiple sub-paths.'''
+    if len(paths) == 1:
+        return paths[0]
+    return Path.make_compound_path(*paths)
+
+def _placed_path(geometry, xy, size, angle, roundness, close):
+    '''place the cached unit path of a built-in geometry by one affine transformation.'''
+    path = unit_path(geometry, roundness / size if roundness != 0 else 0, close)
+    return affine(path, xy, size, angle)
+
 def empty(xy, *args, **kwargs):
     c = patches.Circle(xy, 0, edgecolor='none', facecolor='none')
     return [c]
@@ -73,16 +176,9 @@ def circle(xy, size, angle=None, roundness=0, props={}, **kwargs):
 def lines(xy, size, angle, roundness, props, **kwargs):
     vertices_list = props['paths']
     kwargs['facecolor'] = 'none'
-    codes = []
-    verts = np.zeros([0, 2])
-    for iv, vertices in enumerate(np.asarray(vertices_list)):
-        pp = rounded_path(affine(vertices, xy, size, angle), roundness, close=False)
-        verts = np.concatenate([verts, pp.vertices], axis=0)
-        if iv == 0:
-            codes =  pp.codes
-        else:
-            codes =  np.concatenate([codes, [Path.MOVETO], pp.codes[1:]])
-    c = patches.PathPatch(Path(verts, codes), **_fix(kwargs))
+    path = _join_paths([rounded_path(affine(np.asarray(vertices), xy, size, angle), roundness, close=False)
+            for vertices in vertices_list])
+    c = patches.PathPatch(path, **_fix(kwargs))
     return [c]
 
 def polygon(xy, size, angle, roundness, props, **kwargs):
@@ -108,12 +204,12 @@ def rectangle(xy, size, angle, roundness, **kwargs):
 ##########################  Derived types  #############################
 
 def triangle(xy, size, angle, roundness, props={}, **kwargs):
-    path = [[-0.5 * np.sqrt(3), -0.5], [0.5 * np.sqrt(3), -0.5], [0, 1]]
-    return polygon(xy, size, angle, roundness, props={'path':path}, **kwargs)
+    path = _placed_path('triangle', xy, size, angle, roundness, close=True)
+    return [patches.PathPatch(path, **_fix(kwargs))]
 
 def diamond(xy, size, angle, roundness, props={}, **kwargs):
-    path = np.array([[-1, 0], [0, -1], [1, 0], [0, 1]])
-    return polygon(xy, size, angle, roundness, props={'path':path}, **kwargs)
+    path = _placed_path('diamond', xy, size, angle, roundness, close=True)
+    return [patches.PathPatch(path, **_fix(kwargs))]
 
 square = lambda xy, size, *args, **kwargs: rectangle(xy, (size, size), *args, **kwargs)
 golden = lambda xy, size, *args, **kwargs: rectangle(xy, (1.3* size, size), *args, **kwargs)
@@ -121,27 +217,45 @@ golden = lambda xy, size, *args, **kwargs: rectangle(xy, (1.3* size, size), *arg
 def dot(xy, size, *args, **kwargs):
     return circle(xy, 0.3*size, *args, **kwargs)
 
+def _placed_lines(geometry, xy, size, angle, roundness, **kwargs):
+    kwargs['facecolor'] = 'none'
+    path = _placed_path(geometry, xy, size, angle, roundness, close=False)
+    return [patches.PathPatch(path, **_fix(kwargs))]
+
 def cross(xy, size, angle, roundness, props={}, **kwargs):
-    radi = 1.0
-    radi_ = radi / np.sqrt(2.)
-    path_list = [[(-radi_, -radi_), (radi_, radi_)],
-            [(radi_, -radi_), (-radi_, radi_)]]
-    return lines(xy, size, angle, roundness, props={'paths':path_list}, **kwargs)
+    return _placed_lines('cross', xy, size, angle, roundness, **kwargs)
 
 def plus(xy, size, angle, roundness, props={}, **kwargs):
-    radi = 1.0
-    path_list = [[(-radi, 0), (radi, 0)], [(0, -radi), (0, radi)]]
-    return lines(xy, size, angle, roundness, props={'paths':path_list}, **kwargs)
+    return _placed_lines('plus', xy, size, angle, roundness, **kwargs)
 
 def vbar(xy, size, angle, roundness, props={}, **kwargs):
-    radi = 1.0
-    path_list = [[(0, -radi), (0, radi)]]
-    return lines(xy, size, angle, roundness, props={'paths': path_list}, **kwargs)
+    return _placed_lines('vbar', xy, size, angle, roundness, **kwargs)
 
 def measure(xy, size, angle, roundness, props={}, **kwargs):
+    return _placed_lines('measure', xy, size, angle, roundness, **kwargs)
+
+def _measure_vertices():
     bottom, top, left, right, radi = np.array([-0.3, 0.6, -0.9, 0.9, 1.0])
     x = np.linspace(left, right, 100)
     y = np.sqrt(radi**2 - x**2)
-    path_list = [[(0, bottom), (right, top)],
-                list(zip(x, y - radi + 0.1))]
-    return lines(xy, size, angle, roundness, props={'paths':path_list}, **kwargs)
+    return [[(0, bottom), (right, top)], np.stack([x, y - radi + 0.1], axis=1)]
+
+_UNIT_VERTICES = {
+    'triangle': [[[-0.5 * np.sqrt(3), -0.5], [0.5 * np.sqrt(3), -0.5], [0, 1]]],
+    'diamond': [[[-1, 0], [0, -1], [1, 0], [0, 1]]],
+    'cross': [[(-np.sqrt(0.5), -np.sqrt(0.5)), (np.sqrt(0.5), np.sqrt(0.5))],
+            [(np.sqrt(0.5), -np.sqrt(0.5)), (-np.sqrt(0.5), np.sqrt(0.5))]],
+    'plus': [[(-1, 0), (1, 0)], [(0, -1), (0, 1)]],
+    'vbar': [[(0, -1), (0, 1)]],
+    'measure': _measure_vertices(),
+}
+'''
+vertices of built-in geometries with unit size, a list of sub-paths for each geometry.
+'''
+
+for _name in ['empty', 'circle', 'lines', 'polygon', 'rectangle', 'square', 'golden', 'dot']:
+    register_shape(_name, globals()[_name])
+for _name in ['triangle', 'diamond']:
+    register_shape(_name, globals()[_name], template=_name)
+for _name in ['cross', 'plus', 'vbar', 'measure']:
+    register_shape(_name, globals()[_name], inner_scale=1., template=_name)
@@ -0,0 +1,205 @@
+'''
+spatial index over bounding boxes of nodes.
+'''
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class SpatialIndex(object):
+    '''
+    KD-tree over bounding boxes, for bulk hit, radius, box and nearest queries.
+
+    Bulk queries return pairs, `(query, node)` arrays of the same length, meaning the `query`-th point (box) matches node `node`.
+    Boxes can be added, the tree is rebuilt once added boxes outnumber an eighth of boxes in it, the others are searched by brute force.
+
+    Args:
+        lower (2darray): lower left corners of bounding boxes, with shape (N, 2).
+        upper (2darray): upper right corners of bounding boxes, with shape (N, 2).
+
+    Attributes:
+        centers (2darray): centers of boxes.
+        half_sizes (2darray): half widths and heights of boxes.
+        removed (1darray): True for boxes of removed nodes, they match no query.
+    '''
+
+    def __init__(self, lower, upper):
+        lower, upper = np.asarray(lower, dtype='float64').reshape(-1, 2), np.asarray(upper, dtype='float64').reshape(-1, 2)
+        self.centers = (lower + upper) / 2.
+        self.half_sizes = (upper - lower) / 2.
+        self.removed = np.zeros(len(lower), dtype='bool')
+        self._reach = 0.
+        self._build()
+
+    def _build(self):
+        '''build the tree over all boxes.'''
+        # a box within distance r of a point has its center within r + reach.
+        if len(self.centers):
+            self._reach = max(self._reach, np.sqrt((self.half_sizes**2).sum(axis=1)).max())
+        self._tree = cKDTree(self.centers)
+        self._num_tree = len(self.centers)
+
+    @classmethod
+    def from_store(cls, store):
+        '''
+        index nodes in a :obj:`NodeStore`.
+        '''
+        paths = [collection.geometry.path for collection in store.collections]
+        lower = np.array([path.min(axis=0) for path in paths]).reshape(-1, 2)
+        upper = np.array([path.max(axis=0) for path in paths]).reshape(-1, 2)
+        index = cls(store.positions + lower[store.artists], store.positions + upper[store.artists])
+        index.removed[:] = ~store.alive
+        return index
+
+    def add(self, lower, upper):
+        '''
+        add boxes, they get the next node indices.
+
+        Args:
+            lower (2darray): lower left corners of bounding boxes, with shape (N, 2).
+            upper (2darray): upper right corners of bounding boxes, with shape (N, 2).
+        '''
+        lower, upper = np.asarray(lower, dtype='float64').reshape(-1, 2), np.asarray(upper, dtype='float64').reshape(-1, 2)
+        half_sizes = (upper - lower) / 2.
+        self.centers = np.concatenate([self.centers, (lower + upper) / 2.])
+        self.half_sizes = np.concatenate([self.half_sizes, half_sizes])
+        self.removed = np.concatenate([self.removed, np.zeros(len(lower), dtype='bool')])
+        if len(self.centers) - self._num_tree > 16 + self._num_tree // 8:
+            self._build()
+        elif len(lower):
+            self._reach = max(self._reach, np.sqrt((half_sizes**2).sum(axis=1)).max())
+
+    def __len__(self):
+        return len(self.centers)
+
+    def box_distance(self, points, nodes):
+        '''
+        distances from points to bounding boxes of nodes, zero for points inside boxes.
+
+        Args:
+            points (2darray): points with shape (N, 2).
+            nodes (1darray): node indices with shape (N,).
+        '''
+        gap = np.maximum(abs(points - self.centers[nodes]) - self.half_sizes[nodes], 0)
+        return np.where(self.removed[nodes], np.inf, np.sqrt((gap**2).sum(axis=-1)))
+
+    def query_radius(self, points, radius):
+        '''
+        nodes with bounding boxes within `radius` of points.
+
+        Args:
+            points (2darray): points with shape (N, 2).
+            radius (float|1darray): radius for each point.
+
+        Returns:
+            tuple: (query, node) pairs.
+        '''
+        points = np.asarray(points, dtype='float64').reshape(-1, 2)
+        radius = np.broadcast_to(radius, len(points))
+        if len(self) == 0 or len(points) == 0:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64')
+        # a tree-tree query returns arrays, instead of a python list for each point.
+        pairs = cKDTree(points).sparse_distance_matrix(self._tree, radius.max() + self._reach, output_type='ndarray')
+        query, node = pairs['i'].astype('int64'), pairs['j'].astype('int64')
+        if len(self) > self._num_tree:
+            # boxes added after the tree was built.
+            query_, node_ = np.divmod(np.arange(len(points) * (len(self) - self._num_tree)), len(self) - self._num_tree)
+            query, node = np.concatenate([query, query_]), np.concatenate([node, node_ + self._num_tree])
+        mask = (self.box_distance(points[query], node) <= radius[query]) & ~self.removed[node]
+        return query[mask], node[mask]
+
+    def query_box(self, boxes):
+        '''
+        nodes with bounding boxes overlapping boxes.
+
+        Args:
+            boxes (2darray): (xmin, ymin, xmax, ymax) of boxes, with shape (N, 4).
+
+        Returns:
+            tuple: (query, node) pairs.
+        '''
+        boxes = np.asarray(boxes, dtype='float64').reshape(-1, 4)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2.
+        half_sizes = (boxes[:, 2:] - boxes[:, :2]) / 2.
+        query, node = self.query_radius(centers, np.sqrt((half_sizes**2).sum(axis=1)))
+        mask = (abs(centers[query] - self.centers[node]) <= half_sizes[query] + self.half_sizes[node]).all(axis=1)
+        return query[mask], node[mask]
+
+    def hit(self, points):
+        '''
+        nodes under points, the last placed one if boxes overlap.
+
+        Args:
+            points (2darray): points with shape (N, 2).
+
+        Returns:
+            1darray: node indices, -1 for points hitting no node.
+        '''
+        points = np.asarray(points, dtype='float64').reshape(-1, 2)
+        query, node = self.query_radius(points, 0.)
+        result = np.full(len(points), -1, dtype='int64')
+        np.maximum.at(result, query, node)
+        return result
+
+    def nearest(self, points, k=1):
+        '''
+        nearest nodes, measured by the distance to their bounding boxes.
+
+        Args:
+            points (2darray): points with shape (N, 2).
+            k (int): number of nodes for each point.
+
+        Returns:
+            tuple: distances and node indices with shape (N, k), sorted by distances, padded by (inf, -1) if there are less than k nodes.
+        '''
+        points = np.asarray(points, dtype='float64').reshape(-1, 2)
+        distances, nodes = self._nearest_tree(points, k)
+        num_added = len(self) - self._num_tree
+        if num_added:
+            # boxes added after the tree was built are candidates too.
+            added = np.arange(self._num_tree, len(self))
+            query = np.repeat(np.arange(len(points)), k + num_added)
+            node = np.concatenate([nodes, np.broadcast_to(added, (len(points), num_added))], axis=1).ravel()
+            distance = np.concatenate([distances, self.box_distance(np.repeat(points, num_added, axis=0),
+                np.tile(added, len(points))).reshape(len(points), num_added)], axis=1).ravel()
+            keep = (node >= 0) & np.isfinite(distance)
+            _, first = np.unique(query[keep] * len(self) + node[keep], return_index=True)
+            distances, nodes = _top_k(query[keep][first], node[keep][first], distance[keep][first], len(points), k)
+        return distances, nodes
+
+    def _nearest_tree(self, points, k):
+        '''nearest nodes among boxes in the tree (and some added later).'''
+        num_node = self._num_tree
+        if num_node == 0:
+            return np.full([len(points), k], np.inf), np.full([len(points), k], -1, dtype='int64')
+        # box distances are within `reach` below center distances,
+        # the result is exact if the farthest center fetched is `reach` beyond the k-th box distance.
+        kc = min(2 * k + 1, num_node)
+        center_distance, node = self._tree.query(points, k=[kc] if kc == 1 else kc, workers=-1)
+        distance = self.box_distance(np.repeat(points, kc, axis=0), node.ravel()).reshape(len(points), kc)
+        order = np.argsort(distance, axis=1)[:, :k]
+        distances = np.full([len(points), k], np.inf)
+        nodes = np.full([len(points), k], -1, dtype='int64')
+        distances[:, :kc] = np.take_along_axis(distance, order, axis=1)
+        nodes[:, :kc] = np.take_along_axis(node, order, axis=1)
+        nodes[np.isinf(distances)] = -1
+        if kc < num_node:
+            # points with ambiguous neighbors, search all nodes within the k-th box distance.
+            redo = np.flatnonzero(center_distance[:, -1] <= distances[:, -1] + self._reach)
+            if len(redo):
+                query, node = self.query_radius(points[redo], distances[redo, -1])
+                distances[redo], nodes[redo] = _top_k(query, node, self.box_distance(points[redo][query], node), len(redo), k)
+        return distances, nodes
+
+
+def _top_k(query, node, distance, num_query, k):
+    '''the k nearest nodes of each query, padded by (inf, -1).'''
+    order = np.lexsort((distance, query))
+    query, node, distance = query[order], node[order], distance[order]
+    rank = np.arange(len(query)) - np.searchsorted(query, query)
+    mask = rank < k
+    distances = np.full([num_query, k], np.inf)
+    nodes = np.full([num_query, k], -1, dtype='int64')
+    distances[query[mask], rank[mask]] = distance[mask]
+    nodes[query[mask], rank[mask]] = node[mask]
+    return distances, nodes
@@ -0,0 +1,293 @@
+'''
+streaming SVG writer, renders a :obj:`Scene` from brush and theme data without building matplotlib artists.
+'''
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.colors import to_rgba, to_hex
+from matplotlib.path import Path
+
+from .brush import EdgeBrush, CLinkBrush, RouteBrush, basicline_handler, clink_handler, route_handler, _arrow_vertices, _double_lines, _route_directions
+from .edgenode import Node, Pin, _node_geometry, _connection_point
+from .scene import _reset_routers
+from .setting import annotate_setting, edge_setting
+
+CHUNK_SIZE = 4096
+'''
+number of nodes (edges) converted to text at a time, memory usage does not grow with the size of diagrams.
+'''
+
+_PATH_CODES = {Path.MOVETO: 'M', Path.LINETO: 'L', Path.CURVE3: 'Q', Path.CURVE4: 'C'}
+_DASHES = {'--': 'dashed', 'dashed': 'dashed', ':': 'dotted', 'dotted': 'dotted', '-.': 'dashdot', 'dashdot': 'dashdot'}
+_TEXT_ANCHOR = {'left': 'start', 'center': 'middle', 'right': 'end'}
+_BASELINE = {'bottom': 'text-after-edge', 'center': 'central', 'top': 'text-before-edge'}
+
+
+def write_svg(scene, fname, scale=72., padding=0.2):
+    '''
+    write a scene to an SVG file, repeated node shapes are defined once as symbols.
+
+    Args:
+        scene (:obj:`Scene`): the scene.
+        fname (str|file): filename or a text file object, the document is written incrementally.
+        scale (float, default=72.): size of a unit length in points (1/72 inch).
+        padding (float, default=0.2): padding around the diagram, in unit length.
+    '''
+    if isinstance(fname, str):
+        with open(fname, 'w') as f:
+            return write_svg(scene, f, scale=scale, padding=padding)
+    _SVGWriter(scene, fname, scale, padding).write()
+
+
+class _SVGWriter(object):
+    def __init__(self, scene, f, scale, padding):
+        self.scene = scene
+        self.f = f
+        self.scale = scale
+        self.padding = padding
+
+    def write(self):
+        scene, f = self.scene, self.f
+        node_brush, positions = scene.node_data
+        edge_brush, ids, free_xy = scene.edge_data
+
+        # a template (node placed at origin) for each node brush.
+        self.templates = {}
+        for ib in np.unique(node_brush):
+            brush = scene.brushes[ib]
+            templates = brush._make_patches((0., 0.), brush._size)
+            self.templates[ib] = (templates, _node_geometry(templates[0], np.zeros(2)))
+        self.origin = self._bounds(node_brush, positions, free_xy[ids < 0])
+        width, height = (self.origin[2:] - self.origin[:2]) * self.scale
+
+        f.write('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n')
+        f.write('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                'version="1.1" width="%.2fpt" height="%.2fpt" viewBox="0 0 %.2f %.2f">\n' % (width, height, width, height))
+        f.write('<defs>\n')
+        for ib, (templates, geometry) in self.templates.items():
+            f.write('<symbol id="n%d" overflow="visible">\n' % ib)
+            for patch in templates:
+                path = patch.get_transform().transform_path(patch.get_path())
+                f.write('<path d="%s" %s/>\n' % (self._path_data(path.vertices * [1, -1] * self.scale, path.codes),
+                    self._style(patch.get_facecolor() if patch.get_fill() else 'none', patch.get_edgecolor(),
+                        patch.get_linewidth(), patch.get_linestyle())))
+            f.write('</symbol>\n')
+        f.write('</defs>\n')
+
+        # nodes, edges and texts, ordered by zorder.
+        _reset_routers(scene.brushes)
+        layers = [(scene.brushes[ib].zorder, 0, ib) for ib in self.templates]
+        layers += [(brush.zorder, 1, ib) for ib, brush in enumerate(scene.brushes) if ib in edge_brush]
+        for zorder, kind, ib in sorted(layers):
+            if kind == 0:
+                self._write_nodes(ib, positions[node_brush == ib])
+            else:
+                mask = edge_brush == ib
+                self._write_edges(scene.brushes[ib], ids[mask], free_xy[mask], node_brush, positions)
+        self._write_texts(node_brush, positions)
+        f.write('</svg>\n')
+
+    def _bounds(self, node_brush, positions, free_xy):
+        '''(xmin, ymin, xmax, ymax) of the diagram.'''
+        lower, upper = [np.full(2, np.inf)], [np.full(2, -np.inf)]
+        for ib, (templates, geometry) in self.templates.items():
+            xys = positions[node_brush == ib]
+            lower.append(xys.min(axis=0) + geometry.path.min(axis=0))
+            upper.append(xys.max(axis=0) + geometry.path.max(axis=0))
+        xys = free_xy.reshape(-1, 2)
+        if len(xys):
+            lower.append(xys.min(axis=0))
+            upper.append(xys.max(axis=0))
+        if self.scene.texts:
+            xys, reach = self._text_extents(node_brush, positions)
+            lower.append((xys - reach[:, None]).min(axis=0))
+            upper.append((xys + reach[:, None]).max(axis=0))
+        lower, upper = np.min(lower, axis=0), np.max(upper, axis=0)
+        if not np.isfinite(lower).all():
+            lower = upper = np.zeros(2)
+        return np.concatenate([lower - self.padding, upper + self.padding])
+
+    def _transform(self, xy):
+        '''data space to SVG space, y axis points downward.'''
+        xy = np.asarray(xy, dtype='float64')
+        return np.stack([xy[..., 0] - self.origin[0], self.origin[3] - xy[..., 1]], axis=-1) * self.scale
+
+    def _path_data(self, vertices, codes=None):
+        '''vertices and codes of a path to SVG path data.'''
+        if codes is None:
+            codes = [Path.MOVETO] + [Path.LINETO] * (len(vertices) - 1)
+        items = []
+        code_pre = None
+        for code, (x, y) in zip(codes, vertices.tolist()):
+            if code == Path.CLOSEPOLY:
+                items.append('Z')
+                code_pre = None
+                continue
+            # a curve takes several vertices, their codes are written once.
+            if code != code_pre or code == Path.MOVETO:
+                items.append(_PATH_CODES[code])
+            items.append('%.2f %.2f' % (x, y))
+            code_pre = code
+        return ' '.join(items)
+
+    def _style(self, facecolor, edgecolor, lw, ls='-'):
+        '''fill and stroke attributes.'''
+        attrs = {}
+        for key, color in [('fill', facecolor), ('stroke', edgecolor)]:
+            if isinstance(color, str) and color == 'none':
+                attrs[key] = 'none'
+                continue
+            rgba = to_rgba(color)
+            attrs[key] = 'none' if rgba[3] == 0 else to_hex(rgba)
+            if 0 < rgba[3] < 1:
+                attrs[key + '-opacity'] = '%g' % rgba[3]
+        if lw == 0:
+            attrs['stroke'] = 'none'
+            attrs.pop('stroke-opacity', None)
+        attrs['stroke-width'] = '%g' % lw
+        if isinstance(ls, str) and ls in _DASHES:
+            dashes = np.asarray(rcParams['lines.%s_pattern' % _DASHES[ls]]) * lw
+            attrs['stroke-dasharray'] = ','.join('%g' % d for d in dashes)
+        return ' '.join('%s="%s"' % item for item in attrs.items())
+
+    def _write_nodes(self, ib, xys):
+        for start in range(0, len(xys), CHUNK_SIZE):
+            self.f.write(''.join('<use xlink:href="#n%d" x="%.2f" y="%.2f"/>\n' % (ib, x, y)
+                for x, y in self._transform(xys[start:start + CHUNK_SIZE]).tolist()))
+
+    def _write_edges(self, brush, ids, free_xy, node_brush, positions):
+        if not isinstance(brush, EdgeBrush):
+            raise NotImplementedError('can not write edges of %s to SVG.' % type(brush).__name__)
+        if isinstance(brush, CLinkBrush) and '=' in brush.style:
+            # the same as drawing with matplotlib.
+            raise NotImplementedError('Double line for C link not implemented!')
+        lw = brush.lw
+        head_length = edge_setting['arrow_head_length'] * lw
+        head_width = edge_setting['arrow_head_width'] * lw
+        routes = self._routes(brush, ids, free_xy, node_brush, positions) if isinstance(brush, RouteBrush) else None
+        lines = {}
+        arrows = []
+        for start in range(0, len(ids), CHUNK_SIZE):
+            chunk = slice(start, start + CHUNK_SIZE)
+            directions = None if routes is None else _route_directions(routes[chunk])
+            sxy, exy = self._end_points(ids[chunk], free_xy[chunk], node_brush, positions, directions)
+            if isinstance(brush, RouteBrush):
+                for vertices, sxy_, exy_ in zip(routes[chunk], sxy, exy):
+                    vertices[0], vertices[-1] = sxy_, exy_
+                    arrows_, lines_ = route_handler(vertices, brush.style, brush.roundness, head_length, lw)
+                    arrows.extend(self._arrow_data(arrows_, head_width, head_length))
+                    for ls, path in lines_:
+                        lines.setdefault(ls, []).append(self._path_data(self._transform(path.vertices), path.codes))
+                routes[chunk] = [None] * len(sxy)
+            elif isinstance(brush, CLinkBrush):
+                for sxy_, exy_ in zip(sxy, exy):
+                    arrows_, lines_, _ = clink_handler(sxy_, exy_, brush.style, brush.offsets, brush.roundness, head_length)
+                    arrows.extend(self._arrow_data(arrows_, head_width, head_length))
+                    for ls, path in lines_:
+                        lines.setdefault(ls, []).append(self._path_data(self._transform(path.vertices), path.codes))
+            else:
+                arrows_, lines_ = basicline_handler(sxy, exy, brush.style, head_length)
+                arrows.extend(self._arrow_data(arrows_, head_width, head_length))
+                for ls, (sxy_, exy_) in _double_lines(lines_, lw):
+                    sxy_, exy_ = np.broadcast_arrays(sxy_, exy_)
+                    lines.setdefault(ls, []).extend('M%.2f %.2f L%.2f %.2f' % tuple(seg)
+                        for seg in np.concatenate([self._transform(sxy_), self._transform(exy_)], axis=-1).tolist())
+            self._flush_edges(brush, lines, arrows)
+
+    def _routes(self, brush, ids, free_xy, node_brush, positions):
+        '''
+        routes of edges, grouped by brushes of start and end nodes as in `Scene.render`, so that they share channels the same way.
+        '''
+        sxy, exy = self._end_points(ids, free_xy, node_brush, positions, centers=True)
+        groups = np.append(node_brush, -1)[ids]
+        _, first, inverse = np.unique(groups, axis=0, return_index=True, return_inverse=True)
+        routes = [None] * len(ids)
+        for group in np.argsort(first):
+            index = np.flatnonzero(inverse.ravel() == group)
+            for i, vertices in zip(index, brush.router.route_many(sxy[index], exy[index])):
+                routes[i] = vertices
+        return routes
+
+    def _end_points(self, ids, free_xy, node_brush, positions, directions=None, centers=False):
+        '''
+        connection points of edges, `ids` are node ids of ends (-1 for free positions).
+
+        `directions` are unit vectors pointing from start (end) points into edges, straight edges are assumed if not given,
+        positions of nodes are returned if `centers` is True.
+        '''
+        xy = np.where((ids >= 0)[..., None], positions[ids] if len(positions) else free_xy, free_xy)
+        if centers:
+            return xy[:, 0], xy[:, 1]
+        if directions is None:
+            d = xy[:, 1] - xy[:, 0]
+            unit_d = d / np.linalg.norm(d, axis=-1, keepdims=True)
+            directions = [unit_d, -unit_d]
+        ends = []
+        for i, direction in enumerate(directions):
+            ends.append(xy[:, i].copy())
+            for ib, (templates, geometry) in self.templates.items():
+                mask = (ids[:, i] >= 0) & (node_brush[ids[:, i]] == ib)
+                ends[i][mask] = _connection_point(geometry, xy[mask, i], direction[mask])
+        return ends
+
+    def _arrow_data(self, arrows, head_width, head_length):
+        data = []
+        for mxy, direction in arrows:
+            mxy, direction = np.broadcast_arrays(mxy, direction)
+            vertices = self._transform(_arrow_vertices(np.reshape(mxy, (-1, 2)), np.reshape(direction, (-1, 2)), head_width, head_length))
+            data.extend('M%.2f %.2f L%.2f %.2f L%.2f %.2f Z' % tuple(v) for v in vertices.reshape(-1, 6).tolist())
+        return data
+
+    def _flush_edges(self, brush, lines, arrows):
+        '''write and clear buffered edges.'''
+        lw = brush.lw
+        for ls, data in lines.items():
+            if data:
+                self.f.write('<path d="%s" %s stroke-linecap="%s"/>\n' % (' '.join(data),
+                    self._style('none', brush.color, lw, '--' if ls == '.' else ls), brush.solid_capstyle))
+                del data[:]
+        if arrows:
+            self.f.write('<path d="%s" %s/>\n' % (' '.join(arrows), self._style(brush.color, brush.color, lw)))
+            del arrows[:]
+
+    def _text_extents(self, node_brush, positions):
+        '''
+        anchors of texts (positions of nodes or free positions), and how far texts reach from them,
+        a text is placed at most `text_offset` off its node, and takes about a font size in each direction.
+        '''
+        texts = self.scene.texts
+        node_id = np.array([node_id for node_id, xy, text, position, kwargs in texts])
+        xys = np.array([xy for node_id, xy, text, position, kwargs in texts], dtype='float64').reshape(-1, 2)
+        reach = np.array([kwargs.get('fontsize', annotate_setting['fontsize']) / self.scale +
+            (annotate_setting['text_offset'] if kwargs.get('text_offset') is None else kwargs['text_offset'])
+            for node_id, xy, text, position, kwargs in texts])
+        on_node = node_id >= 0
+        xys[on_node] = positions[node_id[on_node]]
+        for ib, (templates, geometry) in self.templates.items():
+            reach[on_node & (node_brush[np.maximum(node_id, 0)] == ib)] += abs(geometry.path).max()
+        return xys, reach
+
+    def _text_items(self, node_brush, positions):
+        '''location, alignments, font size, color and text of texts, generated one by one.'''
+        for node_id, xy, text, position, kwargs in self.scene.texts:
+            kwargs = dict(kwargs)
+            if node_id >= 0:
+                ib = node_brush[node_id]
+                templates, geometry = self.templates[ib]
+                xy = positions[node_id]
+                target = Node(templates[:1], xy, self.scene.brushes[ib], geometry=geometry._replace(path=geometry.path + xy))
+            else:
+                target = Pin(xy)
+            xy, ha, va = target._text_layout(position, kwargs.get('text_offset'))
+            yield (np.asarray(xy, dtype='float64'), ha, va, kwargs.get('fontsize', annotate_setting['fontsize']),
+                kwargs.get('color', 'k'), text)
+
+    def _write_texts(self, node_brush, positions):
+        for xy, ha, va, fontsize, color, text in self._text_items(node_brush, positions):
+            x, y = self._transform(xy).tolist()
+            self.f.write('<text x="%.2f" y="%.2f" font-size="%g" fill="%s" text-anchor="%s" dominant-baseline="%s">%s</text>\n' % (
+                x, y, fontsize, to_hex(color), _TEXT_ANCHOR[ha], _BASELINE[va], _escape(text)))
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
@@ -7,6 +7,7 @@ from ..edgenode import Pin
 from ..context import DynamicShow
 from ..circuit import QuantumCircuit
 from ..cluster import node_ring
+from ..theme import NODE_THEME_DICT
 
 
 def test_edgenode():
@@ -236,6 +237,224 @@ def test_grid3D():
             for i in range(nodes.shape[D]-1):
                 connect121(np.take(nodes, i, D).ravel(), np.take(nodes, i+1, D).ravel(), edge)
 
+def test_node_batch():
+    fig, ax = plt.subplots()
+    xy = np.random.random([100, 2]) * 10
+    for style in ['nn.memory', 'tn.mpo', 'tn.tri', 'qc.NOT']:
+        brush = NodeBrush(style, ax)
+        nodes = brush >> xy
+        assert len(nodes) == 100
+        assert len(nodes.objs) == (1 if NODE_THEME_DICT[style][2] == 'none' else 2)
+        # agree with nodes placed one by one.
+        node = brush >> xy[3]
+        for direction in [(1, 0), (0, -1), (0.6, 0.8)]:
+            assert np.allclose(nodes.get_connection_point(np.array([direction]*100))[3],
+                    node.get_connection_point(np.array(direction)))
+        assert np.allclose(nodes[3].path, node.path)
+        assert np.allclose(nodes.pin(np.pi / 3.)[3], node.pin(np.pi / 3.))
+        assert np.allclose(nodes.pin('top')[3], node.pin('top'))
+        assert np.allclose(nodes[2:4].positions, xy[2:4])
+    assert len(ax.collections) == 6
+    plt.close(fig)
+
+def test_edge_batch():
+    from ..cluster import connecta2a, connect121
+    fig, ax = plt.subplots()
+    brush = NodeBrush('tn.mpo', ax)
+    starts = brush >> np.c_[np.arange(5), np.zeros(5)]
+    ends = brush >> np.c_[np.arange(4), np.ones(4)*2]
+    for style in ['---', '=.=', '<->']:
+        ebrush = EdgeBrush(style, ax)
+        edges = connecta2a(starts, ends, ebrush, batch=True)
+        assert len(edges) == 20
+        # agree with edges connected one by one.
+        edge = ebrush >> (starts[4], ends[1])
+        assert np.allclose(edges.start_xy[4*4+1], edge.start_xy)
+        assert np.allclose(edges.end_xy[4*4+1], edge.end_xy)
+    edges = connect121([Pin((0, 0)), Pin((1, 0))], np.array([(0, 1), (1, 1)]), EdgeBrush('-.-', ax), batch=True)
+    assert len(edges) == 2 and len(edges.objs) == 2
+    plt.close(fig)
+
+def test_arrow_batch():
+    from matplotlib.collections import PolyCollection
+    fig, ax = plt.subplots()
+    edges = EdgeBrush('->-.-<-', ax, lw=2) >> (np.zeros([10, 2]), np.c_[np.ones(10), np.arange(10)])
+    heads = [obj for obj in edges.objs if isinstance(obj, PolyCollection)]
+    assert len(heads) == 1 and len(heads[0].get_paths()) == 20
+    # the first arrow head of the first edge points to +x, after the first of five segments.
+    tip, left, right = heads[0].get_paths()[0].vertices[:3]
+    head_length = EdgeBrush.setting['arrow_head_length'] * 2
+    assert np.allclose(tip, ((1 - 1.2 * head_length) / 5. + head_length, 0))
+    assert np.allclose(left - right, (0, -EdgeBrush.setting['arrow_head_width'] * 2))
+    clink = CLinkBrush('<->', ax, offsets=(0.2,)) >> (Pin((0, 0)), Pin((1, 0)))
+    assert len(clink.objs) == 2 and len(clink.objs[0].get_paths()) == 2
+    plt.close(fig)
+
+def test_register_shape():
+    from .. import shapes
+    @shapes.register_shape('_hexagon', inner_scale=0.5)
+    def hexagon(xy, size, angle, roundness, props, **kwargs):
+        path = [(np.cos(t), np.sin(t)) for t in np.arange(6) * np.pi / 3]
+        return shapes.polygon(xy, size, angle, roundness, props={'path': path}, **kwargs)
+
+    fig, ax = plt.subplots()
+    brush = NodeBrush(('r', '_hexagon', '_hexagon'), ax, size=0.2)
+    assert brush._theme[1] == '_hexagon' and brush.resolved.theme[1] is shapes.SHAPE_REGISTRY['_hexagon']
+    node = brush >> (0, 0)
+    assert np.allclose(node.objs[1].get_path().vertices[0], (0.1, 0))
+    assert np.allclose(node.width, 0.4)
+    assert shapes.get_shape('plus').inner_scale == 1
+    try:
+        NodeBrush(('r', '_unregistered', 'none'))
+    except ValueError:
+        pass
+    else:
+        assert False
+    del shapes.SHAPE_REGISTRY['_hexagon']
+    plt.close(fig)
+
+def test_node_geometry_cache():
+    from .. import shapes
+    fig, ax = plt.subplots()
+    node = NodeBrush('tn.tri', ax, size=0.3) >> (1, 1)
+    geometry = node.geometry
+    node.get_connection_point(np.array([1, 0]))
+    node.pin('top')
+    assert node.geometry is geometry
+    assert np.allclose(node.width, np.sqrt(3) * 0.3)
+    # transform the node, and invalidate its geometry.
+    shapes.affine(node.obj, offset=(1, 0))
+    node.position = (2, 1)
+    assert node.geometry is not geometry
+    assert np.allclose(node.path, geometry.path + (1, 0))
+    assert np.allclose(node.get_connection_point(np.array([0, 1])), (2, 1.3))
+    plt.close(fig)
+
+def test_node_store():
+    from ..cluster import node_sequence
+    from ..edgenode import NodeStore, NodeHandle
+    fig, ax = plt.subplots()
+    store = NodeStore(capacity=4)
+    brush1 = NodeBrush('nn.input', ax, store=store)
+    brush2 = NodeBrush('tn.mpo', ax, size='small', store=store)
+    seq = node_sequence(brush1, 5, (0, 0), batch=True)
+    ring = node_ring(brush2, 8, (0, 0), 0.5, batch=True)
+    assert len(store) == 13 and len(store.collections) == 2
+    assert np.allclose(store.positions[:5], seq.positions)
+    assert list(store.styles) == [0] * 5 + [1] * 8
+    assert list(store.slots[5:]) == list(range(8))
+
+    # handles index into the store, and work like nodes.
+    node = ring[2]
+    assert isinstance(node, NodeHandle) and not hasattr(node, '__dict__')
+    assert node.index == 7 and node.brush is ring.brush
+    assert np.allclose(node.position, store.positions[7])
+    ref = brush2 >> store.positions[7]
+    assert np.allclose(node.get_connection_point(np.array([0.6, 0.8])), ref.get_connection_point(np.array([0.6, 0.8])))
+    assert np.allclose(node.top_left, ref.top_left)
+    assert np.allclose(node.pin(np.pi / 4), ref.pin(np.pi / 4))
+    text = node.text('A', 'top')
+    assert ring[2].objs[-1] is text and ring[2].objs[:-1] == ring.objs
+    ebrush = EdgeBrush('->-', ax)
+    assert np.allclose((ebrush >> (seq[0], node)).end_xy, (ebrush >> (seq[0], ref)).end_xy)
+    # the geometry is shared by nodes of a collection, and mass centers agree with nodes for polygons.
+    assert node.geometry is ring[3].geometry and np.allclose(node.path, ref.path)
+    pbrush = NodeBrush(('#981255', 'polygon', 'none'), ax, props={'path': [(-1, 0), (0, -1), (2, 2)]}, store=store)
+    polygons = pbrush >> np.array([[3., 0], [4, 0]])
+    assert np.allclose(polygons[1].mass_center, (pbrush >> (4, 0)).mass_center)
+    assert not np.allclose(polygons[1].mass_center, polygons[1].position)
+
+    # removed nodes are transparent, and dropped from the spatial index.
+    assert 7 in store.index.query_radius([store.positions[7]], 0.)[1]
+    assert node.remove() and not store.alive[7] and store.alive.sum() == len(store) - 1
+    assert text.axes is None and ring.objs[0].axes is ax
+    assert ring.objs[0].get_edgecolor()[2, 3] == 0 and ring.objs[0].get_edgecolor()[3, 3] == 1
+    assert 7 not in store.index.query_radius([store.positions[7]], 0.)[1]
+    assert 7 not in store.index.nearest([store.positions[7]], k=3)[1]
+    plt.close(fig)
+
+def test_pin_light():
+    fig, ax = plt.subplots()
+    pin = Pin((1, 2), ax=ax)
+    assert not hasattr(pin, '__dict__') and pin.position == (1., 2.)
+    assert len(pin) == 2 and pin[1] == 2 and tuple(pin) == (1, 2)
+    assert np.allclose(np.asarray(pin), (1, 2)) and np.ndim(pin) == 1
+    assert np.allclose(pin + (1, 1), (2, 3)) and np.allclose(np.array([1, 1]) - pin, (0, -1))
+    assert np.allclose(pin * 2, (2, 4)) and np.allclose(-pin, (-1, -2))
+    assert Pin(pin).ax is ax
+    pin.text('p', 'top')
+    assert len(pin.objs) == 1
+
+    node = NodeBrush('tn.mpo', ax) >> pin
+    assert np.allclose(node.position, pin)
+    assert isinstance(node.top_left, Pin) and np.allclose(node.top_left, (1 - 0.3 * 0.8, 2.3))
+    edge = EdgeBrush('-', ax) >> (node.pin('right'), (3, 2))
+    assert np.allclose(edge.start_xy, (1.3, 2))
+    plt.close(fig)
+
+def test_edge_style():
+    from ..brush import compile_style, basicline_handler, _double_lines
+    template = compile_style('<=.>')
+    assert compile_style('<=.>') is template
+    assert template.styles == ('=', '--') and template.signs == (-1, 1)
+    # the dashed line ends before the last arrow head.
+    assert np.allclose(template.points[3], (1, -1))
+    ebrush = EdgeBrush('<=.>')
+    assert ebrush.template is template
+    try:
+        ebrush.style = '<>'
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    # a batch of edges agrees with edges one by one.
+    sxy, exy = np.random.random([2, 10, 2])
+    arrows, lines = basicline_handler(sxy, exy, '<=.>', 0.06)
+    for i in range(10):
+        arrows_, lines_ = basicline_handler(sxy[i], exy[i], '<=.>', 0.06)
+        for (mxy, direction), (mxy_, direction_) in zip(arrows, arrows_):
+            assert np.allclose(mxy[i], mxy_) and np.allclose(direction[i], direction_)
+        for (ls, line), (ls_, line_) in zip(lines, lines_):
+            assert ls == ls_ and np.allclose(np.array(line)[:, i], line_)
+    # two lines of a double line are apart by twice the space, scaled by the line width.
+    (_, (s1, e1)), (_, (s2, e2)) = _double_lines(lines, lw=2)[:2]
+    assert np.allclose(np.linalg.norm(s1 - s2, axis=-1), 4 * EdgeBrush.setting['doubleline_space'])
+    (_, (s1, e1)), (_, (s2, e2)) = _double_lines(basicline_handler(sxy[0], exy[0], '=', 0.06)[1], lw=2)
+    assert np.allclose(np.linalg.norm(s1 - s2), 4 * EdgeBrush.setting['doubleline_space'])
+
+    # line handlers take (sxy, exy, style, head_length), double lines they return are drawn with the width of the brush.
+    fig, ax = plt.subplots()
+    ebrush = EdgeBrush('=', ax, lw=2)
+    ebrush.line_handler = lambda sxy, exy, style, head_length: ([], [(style, (sxy, exy))])
+    edge = ebrush >> ((0, 0), (1, 0))
+    space = 2 * EdgeBrush.setting['doubleline_space']
+    assert np.allclose([line.get_ydata() for line in edge.objs], [[space, space], [-space, -space]])
+    plt.close(fig)
+
+def test_resolved_style():
+    from ..setting import node_setting
+    brush = NodeBrush('nn.convolution', size='small')
+    resolved = brush.resolved
+    assert brush.resolved is resolved
+    assert np.allclose(resolved.size, 0.21) and resolved.lw == node_setting['lw']
+    # brush attributes and settings invalidate the resolved style.
+    brush.size = 'large'
+    assert brush.resolved is not resolved and np.allclose(brush._size, 0.39)
+    resolved = brush.resolved
+    inner_lw = node_setting['inner_lw']
+    node_setting['inner_lw'] = 2.
+    try:
+        assert brush.resolved is not resolved
+        inner = brush._make_patches((0, 0), brush._size)[1]
+        assert inner.get_linewidth() == 2.
+    finally:
+        node_setting['inner_lw'] = inner_lw
+    resolved = brush.resolved
+    node_setting |= {'inner_lw': inner_lw}
+    assert brush.resolved is not resolved
+    assert NodeBrush('tn.mpo', size=0.2, lw=3).resolved.lw == 3
+
 class TestShow():
     '''
     Dynamic plot context, intended for displaying geometries.
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+
+from ..cache import LayoutCache
+from ..layout import force_layout, layered_layout
+from ..setting import layout_setting
+
+
+def test_layout_cache(tmp_path):
+    cache = LayoutCache(str(tmp_path))
+    edges = np.array([[0, 1], [1, 2]])
+    key = cache.key('force_layout', edges, center=(0, 0), space=1.)
+    assert key == cache.key('force_layout', edges.astype('int32'), space=1., center=(0., 0))
+    assert key != cache.key('force_layout', edges[::-1], center=(0, 0), space=1.)
+    assert key != cache.key('force_layout', edges, center=(0, 0), space=2.)
+    assert cache.key('f', edges, positions=np.zeros([3, 2])) != cache.key('f', edges, positions=np.ones([3, 2]))
+
+    assert cache.get(key) is None
+    cache.put(key, [np.arange(6.).reshape(3, 2)])
+    xy, = cache.get(key)
+    assert isinstance(xy, np.memmap) and (xy == np.arange(6.).reshape(3, 2)).all()
+
+    # least recently used entries are evicted, a hit counts as a use.
+    keys = ['%040d' % i for i in range(4)]
+    cache.max_bytes = 10**6
+    for k in keys[:3]:
+        cache.put(k, [np.zeros(50)])
+    for i, k in enumerate([key] + keys[:3]):
+        os.utime(os.path.join(cache.directory, '%s_0.npy' % k), (i, i))
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = 1500
+    cache.put(keys[3], [np.zeros(50)])
+    assert cache.get(key) is None and cache.get(keys[1]) is None and cache.get(keys[2]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[3]) is not None
+
+
+def test_cached_layouts(tmp_path, monkeypatch):
+    monkeypatch.setitem(layout_setting, 'cache_dir', str(tmp_path))
+    edges = np.array([(i, i + 1) for i in range(30)] + [(0, 15)])
+    xy = force_layout(edges, space=0.5)
+    assert not isinstance(xy, np.memmap) and len(os.listdir(str(tmp_path))) == 1
+    cached = force_layout(edges, space=0.5)
+    assert isinstance(cached, np.memmap) and np.array_equal(cached, xy)
+    assert not isinstance(force_layout(edges, space=0.6), np.memmap)
+
+    xy, routes = layered_layout(edges)
+    cached_xy, cached_routes = layered_layout(edges)
+    assert isinstance(cached_xy, np.memmap) and np.array_equal(cached_xy, xy)
+    assert len(cached_routes) == len(routes) and all(np.array_equal(a, b) for a, b in zip(cached_routes, routes))
@@ -0,0 +1,47 @@
+import numpy as np
+from threading import Thread
+import matplotlib.pyplot as plt
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, EdgeBrush
+from ..circuit import QuantumCircuit
+
+
+def _draw(canvas, seed):
+    rng = np.random.RandomState(seed)
+    xy = rng.random_sample([50, 2]) * 5
+    nodes = NodeBrush('nn.memory', canvas, size='small') >> xy
+    EdgeBrush('->-', canvas) >> (nodes[:25], nodes[25:])
+    node = NodeBrush('tn.mpo', canvas) >> (2.5, 6)
+    node.text('mpo', 'top')
+    handler = QuantumCircuit(num_bit=2, ax=canvas, y0=-1)
+    handler.x += 1
+    handler.gate(NodeBrush('qc.basic'), 0, 'H')
+    handler.x += 1
+    handler.gate((NodeBrush('qc.C'), NodeBrush('qc.NOT', size='small')), (0, 1))
+    canvas.finalize()
+    return canvas.to_rgba()
+
+
+def test_canvas_threads():
+    num_fig = plt.get_fignums()
+    serial = [_draw(Canvas(figsize=(3, 3), dpi=50), seed) for seed in range(4)]
+
+    results = [None] * 4
+    def render(seed):
+        results[seed] = _draw(Canvas(figsize=(3, 3), dpi=50), seed)
+    threads = [Thread(target=render, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for image, image_ in zip(serial, results):
+        assert image.shape == (150, 150, 4)
+        assert np.array_equal(image, image_)
+    # pyplot is not touched.
+    assert plt.get_fignums() == num_fig
+
+
+if __name__ == '__main__':
+    test_canvas_threads()
@@ -0,0 +1,39 @@
+import sys
+import subprocess
+
+HEAVY_MODULES = ['matplotlib.pyplot', 'matplotlib.animation', 'scipy', 'pdb']
+
+
+def _run(code):
+    '''run `code` in a fresh interpreter, return its stdout.'''
+    return subprocess.check_output([sys.executable, '-c', code]).decode().strip()
+
+
+def _loaded(statement):
+    '''heavy modules loaded by `statement`, and the time it takes (best of 3 runs).'''
+    code = '''
+import sys, time
+t0 = time.time()
+%s
+t = time.time() - t0
+print(t, ' '.join(m for m in %r if m in sys.modules))
+''' % (statement, HEAVY_MODULES)
+    results = [_run(code).split(' ', 1) for i in range(3)]
+    return min(float(r[0]) for r in results), results[0][1:]
+
+
+def test_import_time():
+    t, modules = _loaded('import viznet')
+    assert modules == []
+    assert t < 0.1, 'import viznet takes %.3fs' % t
+
+    # parsing circuits does not need pyplot.
+    t, modules = _loaded('from viznet import parsecircuit, QuantumCircuit')
+    assert modules == []
+
+    t, modules = _loaded('from viznet import DynamicShow')
+    assert 'matplotlib.pyplot' in modules[0].split()
+
+
+if __name__ == '__main__':
+    test_import_time()
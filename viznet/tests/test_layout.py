@@ -0,0 +1,173 @@
+import numpy as np
+from numpy.testing import assert_raises
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, RouteBrush
+from .. import layout
+from ..layout import barnes_hut, force_layout, spectral_layout, layered_layout, component_layout, skyline, IncrementalLayout
+from ..routing import PolylineRouter
+
+
+def _grid(m):
+    index = np.arange(m * m).reshape(m, m)
+    return np.concatenate([np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1),
+                           np.stack([index[:-1].ravel(), index[1:].ravel()], axis=1)])
+
+
+def test_barnes_hut():
+    xy = np.random.RandomState(0).rand(300, 2) * 10
+    delta = xy[:, None] - xy[None]
+    dist2 = (delta**2).sum(axis=-1)
+    np.fill_diagonal(dist2, np.inf)
+    exact = (delta / dist2[..., None]).sum(axis=1)
+    # exact for theta = 0, up to single precision.
+    assert np.linalg.norm(barnes_hut(xy, theta=0) - exact) < 1e-5 * np.linalg.norm(exact)
+    assert np.linalg.norm(barnes_hut(xy) - exact) < 0.05 * np.linalg.norm(exact)
+    # coincident nodes do not blow up.
+    assert np.isfinite(barnes_hut(np.array([[0, 0], [0, 0], [1, 1.]]))).all()
+
+
+def test_force_layout():
+    edges = _grid(12)
+    xy = force_layout(edges, center=(1, 2), space=0.5)
+    assert xy.shape == (144, 2) and np.allclose(xy.mean(axis=0), (1, 2))
+    length = np.linalg.norm(xy[edges[:, 0]] - xy[edges[:, 1]], axis=1)
+    assert np.allclose(np.median(length), 0.5) and length.max() < 1.
+    # unfolded, the corners are far apart.
+    corners = xy[[0, 11, 132, 143]]
+    assert np.linalg.norm(corners[0] - corners[3]) > 3 and np.linalg.norm(corners[1] - corners[2]) > 3
+    assert np.allclose(force_layout((edges[:, 0], edges[:, 1]), center=(1, 2), space=0.5), xy)
+
+    # isolated nodes, and positions go straight to a brush.
+    xy = force_layout(edges[:10], num_node=30)
+    assert xy.shape == (30, 2) and np.isfinite(xy).all()
+    nodes = NodeBrush('basic', Canvas(), size='small') >> xy
+    assert len(nodes) == 30
+
+
+def test_spectral_layout():
+    # a ring is a circle, a grid is unfolded.
+    ring = np.stack([np.arange(100), (np.arange(100) + 1) % 100], axis=1)
+    xy = spectral_layout(ring, center=(1, 1), space=0.5)
+    radius = np.linalg.norm(xy - (1, 1), axis=1)
+    assert np.allclose(radius, radius.mean(), rtol=1e-2) and np.allclose(np.pi * radius.mean(), 25, rtol=1e-2)
+    edges = _grid(20)
+    xy = spectral_layout(edges)
+    length = np.linalg.norm(xy[edges[:, 0]] - xy[edges[:, 1]], axis=1)
+    assert np.allclose(np.median(length), 1) and length.max() < 2
+    assert np.linalg.norm(xy[0] - xy[399]) > 15 and np.linalg.norm(xy[19] - xy[380]) > 15
+
+    # components do not overlap, isolated nodes included.
+    edges = np.concatenate([_grid(6), ring[:10] + 36, [[50, 51]]])
+    xy = spectral_layout(edges, num_node=60)
+    assert xy.shape == (60, 2) and np.isfinite(xy).all()
+    labels = np.concatenate([np.zeros(36), np.ones(11), [2, 3, 4, 5, 5], np.arange(6, 14)]).astype('int64')
+    lower = np.array([xy[labels == i].min(axis=0) for i in range(14)])
+    upper = np.array([xy[labels == i].max(axis=0) for i in range(14)])
+    overlap = (lower[:, None] <= upper[None]) & (lower[None] <= upper[:, None])
+    assert (overlap.all(axis=-1) == np.eye(14, dtype='bool')).all()
+
+
+def test_skyline():
+    rng = np.random.RandomState(0)
+    sizes = np.concatenate([rng.rand(100, 2) + 0.1, np.full([300, 2], 0.1)])
+    lower = skyline(sizes)
+    upper = lower + sizes
+    overlap = (lower[:, None] < upper[None] - 1e-9) & (lower[None] < upper[:, None] - 1e-9)
+    assert (overlap.all(axis=-1) == np.eye(len(sizes), dtype='bool')).all()
+    assert (lower >= 0).all() and np.prod(sizes, axis=1).sum() > 0.8 * np.prod(upper.max(axis=0))
+
+
+def test_component_layout(monkeypatch):
+    # grids, rings and isolated nodes, in several tasks sent to worker processes.
+    monkeypatch.setattr(layout, 'TASK_SIZE', 30)
+    edges = np.concatenate([_grid(6), _grid(5) + 36] + [np.stack([np.arange(8), (np.arange(8) + 1) % 8], axis=1) + 61 + 8 * i
+                                                        for i in range(5)] + [[[101, 102], [103, 103]]])
+    labels = np.concatenate([np.zeros(36), np.ones(25), np.repeat(np.arange(2, 7), 8), [7, 7, 8], np.arange(9, 15)])
+    xy = component_layout(edges, 110, center=(1, 2), space=0.5, num_workers=2)
+    assert xy.shape == (110, 2) and np.allclose(xy.mean(axis=0), (1, 2))
+    assert np.allclose(component_layout(edges, 110, center=(1, 2), space=0.5, num_workers=1), xy)
+    # components keep their layouts, and are `space` apart.
+    assert np.allclose(xy[:36] - xy[:36].mean(axis=0), force_layout(_grid(6), space=0.5))
+    distance = np.linalg.norm(xy[:, None] - xy[None], axis=-1)
+    assert distance[labels[:, None] != labels[None]].min() >= 0.5 - 1e-8
+
+    xy = component_layout((edges[:, 0], edges[:, 1]), layout='spectral', num_workers=1)
+    assert np.allclose(xy[:36] - xy[:36].mean(axis=0), spectral_layout(_grid(6)))
+
+
+def test_incremental_layout():
+    edges = _grid(30)
+    layout = IncrementalLayout(edges, positions=spectral_layout(edges), space=1.)
+    old = layout.positions.copy()
+    # contract nodes 465 and 466 into a new node 900, only nodes near the change move.
+    neighbors = [435, 436, 464, 467, 495, 496]
+    moved = layout.update(remove_nodes=[465, 466], add_nodes=[900], add_edges=[(900, i) for i in neighbors])
+    xy = layout.positions
+    assert xy.shape == (901, 2) and 900 in moved and len(moved) < 50
+    assert np.isnan(xy[[465, 466]]).all() and (~layout.alive[[465, 466]]).all()
+    still = np.setdiff1d(np.arange(900), np.concatenate([moved, [465, 466]]))
+    assert (xy[still] == old[still]).all()
+    length = np.linalg.norm(xy[900] - xy[neighbors], axis=1)
+    assert (length > 0.5).all() and (length < 2).all()
+
+    # a new component is placed next to the layout, removed edges are not pulled.
+    moved = layout.update(add_nodes=[901, 902], add_edges=[(901, 902)], remove_edges=[(0, 1)])
+    assert set([0, 1, 901, 902]) <= set(moved)
+    xy = layout.positions
+    assert xy[[901, 902], 0].min() > np.nanmax(old[:, 0]) and np.isfinite(xy).sum() == 2 * 901
+
+    assert_raises(ValueError, layout.update, remove_nodes=[465])
+    assert_raises(ValueError, layout.update, add_nodes=[900])
+    assert_raises(ValueError, layout.update, remove_edges=[(0, 1)])
+
+
+def _route_crossings(routes):
+    '''number of crossing pairs of route segments between the same layers (in y).'''
+    segments = np.concatenate([np.concatenate([route[:-1], route[1:]], axis=1) for route in routes])
+    segments = segments[segments[:, 1] != segments[:, 3]]
+    num = 0
+    for y in np.unique(segments[:, 1]):
+        s = segments[segments[:, 1] == y]
+        dx0, dx1 = s[:, 0, None] - s[:, 0], s[:, 2, None] - s[:, 2]
+        num += (dx0 * dx1 < -1e-9).sum() // 2
+    return num
+
+
+def test_layered_layout():
+    rng = np.random.RandomState(0)
+    # a random DAG with long edges, and a cycle.
+    edges = np.array([(i, j) for i in range(60) for j in range(i + 1, 60) if rng.rand() < 4. / (j - i + 8)])
+    edges = np.concatenate([edges, [[59, 0], [7, 7]]])
+    xy, routes = layered_layout(edges, 60, center=(1, 2), space=0.5, layer_space=2.)
+    assert xy.shape == (60, 2) and len(routes) == len(edges)
+    assert np.allclose(xy.mean(axis=0), (1, 2))
+    # layers are rows, edges (except the reversed one and the self loop) go down.
+    layer = (xy[:, 1].max() - xy[:, 1]) / 2.
+    assert np.allclose(layer, np.round(layer))
+    assert (xy[edges[:-2, 0], 1] > xy[edges[:-2, 1], 1]).all()
+    for y in np.unique(xy[:, 1]):
+        assert (np.diff(np.sort(xy[xy[:, 1] == y, 0])) >= 0.5 - 1e-8).all()
+    # routes run from start nodes to end nodes, going through one layer at a time.
+    for (i, j), route in zip(edges, routes):
+        assert np.allclose(route[0], xy[i]) and np.allclose(route[-1], xy[j])
+        assert (abs(np.diff(route[:, 1])) <= 2 + 1e-8).all()
+    assert (np.diff(routes[-2][:, 1]) > 0).all()
+
+    _, unordered = layered_layout(edges, 60, num_sweep=0)
+    _, ordered = layered_layout(edges, 60)
+    assert _route_crossings(ordered) < 0.7 * _route_crossings(unordered)
+
+    xy, routes = layered_layout(edges, 60, direction='right', space=0.5)
+    assert (xy[edges[:-2, 0], 0] < xy[edges[:-2, 1], 0]).all()
+    layer = (xy[:, 0] - xy[:, 0].min()) / 0.5
+    assert np.allclose(layer, np.round(layer))
+
+    # routes are drawn by a route brush.
+    canvas = Canvas()
+    nodes = NodeBrush('basic', canvas, size='tiny') >> xy
+    router = PolylineRouter(routes)
+    assert np.allclose(router.route(xy[5], xy[2]), [xy[5], xy[2]])
+    assert np.allclose(router.route(xy[0], xy[59]), routes[-2][::-1])
+    edge_objs = RouteBrush('->', router, canvas) >> (nodes[edges[:-1, 0]], nodes[edges[:-1, 1]])
+    assert len(edge_objs) == len(edges) - 1
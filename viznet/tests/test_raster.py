@@ -0,0 +1,42 @@
+import numpy as np
+from matplotlib.image import AxesImage
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, EdgeBrush
+from ..cluster import connecta2a
+from ..raster import rasterize_lines, density_rgba
+from ..setting import edge_setting
+
+
+def test_rasterize():
+    # a line is counted once in each cell it crosses.
+    counts = rasterize_lines([[0, 0.5]], [[10, 0.5]], (0, 10, 0, 1), (1, 10))
+    assert np.allclose(counts, 1)
+    counts = rasterize_lines([[0, 0], [0, 0], [0, 11]], [[10, 10], [0, 0], [10, 11]], (0, 10, 0, 10), (10, 10))
+    assert counts.sum() == 11 and counts[0, 0] == 2 and np.diag(counts).sum() == 11
+
+    rgba = density_rgba(np.array([[0, 1], [10, 100]]), color='r')
+    assert np.allclose(rgba[..., :3], (1, 0, 0))
+    assert rgba[0, 0, 3] == 0 and rgba[1, 1, 3] == 1 and 0 < rgba[0, 1, 3] < rgba[1, 0, 3]
+    rgba = density_rgba(np.array([[0, 1]]), cmap='viridis')
+    assert rgba[0, 0, 3] == 0 and rgba[0, 1, 3] == 1
+
+
+def test_density_brush():
+    canvas = Canvas()
+    layer1 = NodeBrush('basic', canvas, size='small') >> np.c_[np.arange(20), np.zeros(20)]
+    layer2 = NodeBrush('basic', canvas, size='small') >> np.c_[np.arange(20), np.ones(20) * 5]
+    edges = connecta2a(layer1, layer2, EdgeBrush('->-', canvas, density=True), batch=True)
+    assert len(edges) == 400 and len(edges.objs) == 1 and isinstance(edges.objs[0], AxesImage)
+    assert np.allclose(edges.start_xy, layer1.position[np.arange(400) // 20])
+
+    # 'auto' rasterizes edge sets above the threshold.
+    threshold = edge_setting['density_threshold']
+    edge_setting['density_threshold'] = 100
+    try:
+        edges = connecta2a(layer1, layer2, EdgeBrush('-', canvas), batch=True)
+        assert isinstance(edges.objs[0], AxesImage)
+        edges = connecta2a(layer1[:5], layer2[:5], EdgeBrush('-', canvas), batch=True)
+        assert not isinstance(edges.objs[0], AxesImage)
+    finally:
+        edge_setting['density_threshold'] = threshold
@@ -0,0 +1,132 @@
+import io
+import time
+import warnings
+import numpy as np
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, RouteBrush, route_handler
+from ..edgenode import NodeStore
+from ..routing import OrthogonalRouter
+from ..scene import Scene
+from ..setting import edge_setting
+from .. import svg
+from ..svg import write_svg
+
+
+def _crossed(router, vertices, skip):
+    '''number of obstacles (except `skip`) crossed by a route.'''
+    inside = np.zeros(len(router.lower), dtype='bool')
+    for start, stop in zip(vertices[:-1], vertices[1:]):
+        for t in np.linspace(0, 1, 41):
+            xy = start + (stop - start) * t
+            inside |= ((router.lower < xy) & (xy < router.upper)).all(axis=1)
+    inside[list(skip)] = False
+    return inside.sum()
+
+
+def _cost(router, vertices):
+    '''length plus bend costs of a route, off shared channels.'''
+    return abs(np.diff(vertices, axis=0)).sum() + router.bend_cost * (len(vertices) - 2)
+
+
+def test_route():
+    # a wall between start and end.
+    router = OrthogonalRouter([[-0.2, -0.2], [1, -2], [3, 0.8]], [[0.2, 0.2], [1.5, 2], [3.4, 1.2]])
+    vertices = router.route((0., 0.), (3.2, 1.))
+    assert np.allclose(vertices[0], (0, 0)) and np.allclose(vertices[-1], (3.2, 1))
+    # orthogonal, and around the wall with clearance.
+    assert (np.diff(vertices, axis=0) == 0).any(axis=1).all()
+    assert _crossed(router, vertices, [0, 2]) == 0
+    assert abs(vertices[:, 1]).max() >= 2 + router.margin - 1e-8
+    # the end node is left along a line through its center.
+    assert vertices[-2, 0] == 3.2 or vertices[-2, 1] == 1.
+
+    # channels are shared by parallel routes.
+    router.reset()
+    routes = router.route_many([(0., 0.)] * 3, [(3.2, 1.)] * 3)
+    middle = [tuple(np.round(route[len(route) // 2], 6)) for route in routes]
+    assert len(set(middle)) == 3
+    assert all(_crossed(router, route, [0, 2]) == 0 for route in routes)
+
+    # weighted search costs at most `weight` times the minimum.
+    rng = np.random.RandomState(3)
+    xy = rng.rand(60, 2) * 10
+    for weight in [1., 2.]:
+        router = OrthogonalRouter(xy - 0.3, xy + 0.3, weight=weight)
+        costs = [_cost(router, router.route(xy[0], xy[i])) for i in range(1, 11)]
+        if weight == 1:
+            minimum = np.array(costs)
+    assert (minimum <= np.array(costs) + 1e-8).all() and (np.array(costs) <= 2 * minimum + 1e-8).all()
+
+    # an end point enclosed by obstacles can not be reached, the L shaped route is kept with a warning.
+    router = OrthogonalRouter([[-1, 0.5], [-1, -1], [-1, -0.5], [0.5, -0.5]], [[1, 1], [1, -0.5], [-0.5, 0.5], [1, 0.5]])
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        vertices = router.route((0., 0.), (3., 2.))
+    assert len(caught) == 1 and 'no route' in str(caught[0].message)
+    assert np.allclose(vertices, [(0, 0), (3, 0), (3, 2)])
+
+
+def test_route_brush(monkeypatch):
+    rng = np.random.RandomState(2)
+    canvas = Canvas()
+    store = NodeStore()
+    xy = np.stack(np.meshgrid(np.arange(5), np.arange(5)), -1).reshape(-1, 2).astype('float64')
+    nodes = NodeBrush('tn.mps', canvas, size='small', store=store) >> xy
+    router = OrthogonalRouter.from_store(store)
+    start, end = rng.randint(0, 25, [2, 30])
+    start, end = start[start != end], end[start != end]
+    for i, j, route in zip(start, end, router.route_many(xy[start], xy[end])):
+        assert _crossed(router, route, [i, j]) == 0
+
+    brush = RouteBrush('->', router, canvas, roundness=0.05)
+    edge = brush >> (nodes[0], nodes[24])
+    assert np.allclose(np.linalg.norm(edge.start_xy - xy[0]), NodeBrush.size_dict['small'])
+    edges = brush >> (nodes[start], nodes[end])
+    assert len(edges) == len(start) and len(edges.objs) == 2
+    assert np.allclose(np.linalg.norm(edges.end_xy - xy[end], axis=1), NodeBrush.size_dict['small'])
+
+    # double lines are two routes, one on each side.
+    edges = RouteBrush('=', router, canvas) >> (nodes[start], nodes[end])
+    assert len(edges.objs) == 1 and len(edges.objs[0].get_paths()) == 2 * len(start)
+    arrows, lines = route_handler([(0, 0), (1, 0), (1, 1)], '=', 0, 0.1, lw=2)
+    space = edge_setting['doubleline_space'] * 2
+    assert [ls for ls, path in lines] == ['-', '-']
+    assert np.allclose(lines[0][1].vertices, [(0, space), (1 - space, space), (1 - space, 1)])
+    assert np.allclose(lines[1][1].vertices, [(0, -space), (1 + space, -space), (1 + space, 1)])
+
+    # scenes route edges of a brush together, and write them to SVG.
+    scene = Scene()
+    snodes = scene.add_nodes(NodeBrush('tn.mps', size='small'), xy)
+    router = OrthogonalRouter.from_nodes(nodes)
+    scene.add_edges(RouteBrush('-', router), snodes[start], snodes[end])
+    calls = []
+    route_many = router.route_many
+    monkeypatch.setattr(router, 'route_many', lambda sxys, exys: calls.append(route_many(sxys, exys)) or calls[-1])
+    handles = scene.render(Canvas())
+    assert len(handles[-1]) == len(start)
+    # SVG files are written in chunks, with the routes drawn by `render`.
+    monkeypatch.setattr(svg, 'CHUNK_SIZE', 4)
+    f = io.StringIO()
+    write_svg(scene, f)
+    assert f.getvalue().count(' C') + f.getvalue().count(' L') > len(start)
+    assert len(calls) == 2 and all(np.allclose(a, b) for a, b in zip(*calls))
+
+
+def test_route_many_size():
+    # edges among scattered nodes are routed on one sparse graph, in seconds.
+    rng = np.random.RandomState(2)
+    xy = rng.rand(500, 2) * 30
+    router = OrthogonalRouter(xy - 0.15, xy + 0.15)
+    start, end = rng.randint(0, 500, [2, 1000])
+    start, end = start[start != end], end[start != end]
+    t0 = time.time()
+    routes = router.route_many(xy[start], xy[end])
+    assert time.time() - t0 < 30
+    assert len(router._xs) < 100 * len(xy)
+    for i, j, route in list(zip(start, end, routes))[:50]:
+        assert (np.diff(route, axis=0) == 0).any(axis=1).all()
+        assert np.allclose(route[0], xy[i]) and np.allclose(route[-1], xy[j])
+        # nodes overlapping end points can not be avoided.
+        own = ((router.lower <= xy[[i, j], None]) & (xy[[i, j], None] <= router.upper)).all(axis=-1).any(axis=0)
+        assert _crossed(router, route, np.where(own)[0]) == 0
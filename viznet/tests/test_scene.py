@@ -0,0 +1,88 @@
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.lines import Line2D
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, EdgeBrush, CLinkBrush
+from ..scene import Scene, lod_tier
+from ..setting import lod_setting
+
+
+def _scene():
+    scene = Scene()
+    nbrush = NodeBrush('nn.input', size='small')
+    layer1 = scene.add_nodes(nbrush, np.stack([np.arange(5), np.zeros(5)], axis=1))
+    layer2 = scene.add_nodes(NodeBrush('nn.output'), np.stack([np.arange(5), np.ones(5)], axis=1))
+    ebrush = EdgeBrush('->-')
+    scene.add_edges(ebrush, layer1, layer2)
+    scene.add_edges(ebrush, layer1[0], (2.0, -1.0))
+    scene.add_edges(CLinkBrush('-'), layer1[3], layer1[4])
+    scene.add_text(layer2, ['y%d' % i for i in range(5)], 'top')
+    scene.add_text((2., 2.), 'title')
+    return scene, nbrush, layer1, layer2
+
+
+def test_scene_render():
+    scene, nbrush, layer1, layer2 = _scene()
+    assert scene.num_node == 10 and scene.num_edge == 7
+    assert len(layer1) == 5 and np.allclose(layer2[1].position, (1, 1))
+
+    canvas = Canvas()
+    handles = scene.render(canvas)
+    num_artist = len(canvas.ax.get_children())
+    # node collections + edge batches + a C link + texts.
+    assert len(handles) == 2 + 2 + 1 + 6
+    edges = handles[2]
+    assert len(edges) == 5
+    # edges connect the outlines of nodes.
+    assert np.allclose(edges.start_xy[:, 1], nbrush._size)
+    assert np.allclose(edges.end_xy[:, 1], 1 - NodeBrush.size_dict['normal'])
+
+    # re-render replaces artists, and reflects changes of brushes and positions.
+    nbrush.size = 'tiny'
+    scene.positions[layer1.ids, 1] -= 1
+    handles = scene.render(canvas)
+    assert len(canvas.ax.get_children()) == num_artist
+    assert np.allclose(handles[2].start_xy[:, 1], -1 + NodeBrush.size_dict['tiny'])
+
+
+def test_scene_cull():
+    scene = _scene()[0]
+    canvas = Canvas()
+    handles = scene.render(canvas, window=(-0.5, 1.5, 0.5, 1.5))
+    assert len(handles[0].objs[0].get_offsets()) == 0
+    assert np.allclose(handles[1].objs[0].get_offsets(), [(0, 1), (1, 1)])
+    # edges pointing to visible nodes are kept.
+    assert len(handles[2]) == 2
+    # texts on visible nodes are kept, the free title out of the window is culled.
+    assert sorted(text.get_text() for text in canvas.ax.texts) == ['y0', 'y1']
+
+    # panning keeps node artists and stores, and moves them to the visible nodes.
+    objs, store = handles[1].objs, handles[1].store
+    handles = scene.render(canvas, window=(2.5, 4.5, -0.5, 1.5))
+    assert handles[1].objs == objs and handles[1].store is store
+    assert np.allclose(handles[0].objs[0].get_offsets(), [(3, 0), (4, 0)])
+    assert sorted(text.get_text() for text in canvas.ax.texts) == ['y3', 'y4']
+    scene.clear()
+    assert len(canvas.ax.collections) == 0 and len(canvas.ax.texts) == 0
+
+
+def test_scene_lod():
+    scene, nbrush, layer1, layer2 = _scene()
+    # at full size, level of detail changes nothing.
+    canvas = Canvas(figsize=(6, 4), dpi=300)
+    assert scene.pixels_per_unit(canvas) > 100
+    assert len(scene.render(canvas, lod=True)) == len(scene.render(canvas))
+
+    canvas = Canvas(figsize=(0.5, 0.5), dpi=20)
+    assert lod_tier(2 * nbrush._size * scene.pixels_per_unit(canvas)) == 'point'
+    handles = scene.render(canvas, lod=True)
+    # nodes become points, texts on nodes are dropped, and arrows are dropped.
+    assert isinstance(handles[0].objs[0], Line2D) and len(handles[0].objs[0].get_xdata()) == 5
+    assert len(canvas.ax.texts) == 1
+    assert all(not isinstance(obj, PolyCollection) for obj in handles[2].objs)
+
+    assert lod_tier(lod_setting['disc']) == 'disc' and lod_tier(0) == 'drop'
+    # nodes far below a pixel are dropped, edges are kept.
+    handles = scene.render(canvas, window=(-500, 500, -500, 500), lod=True)
+    assert len(canvas.ax.lines) == 0 and len(handles) == 2 + 1 + 1
@@ -0,0 +1,77 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+from ..brush import NodeBrush
+from ..edgenode import NodeStore
+from ..spatial import SpatialIndex
+
+
+def _brute_radius(index, points, radius):
+    pairs = set()
+    for i, p in enumerate(points):
+        d = index.box_distance(np.repeat(p[None], len(index), axis=0), np.arange(len(index)))
+        pairs.update((i, j) for j in np.flatnonzero(d <= radius))
+    return pairs
+
+
+def test_spatial_index():
+    rng = np.random.RandomState(3)
+    lower = rng.random_sample([500, 2]) * 10
+    index = SpatialIndex(lower, lower + rng.random_sample([500, 2]) * 0.5)
+    points = rng.random_sample([50, 2]) * 10
+
+    query, node = index.query_radius(points, 0.3)
+    assert set(zip(query, node)) == _brute_radius(index, points, 0.3)
+
+    boxes = np.c_[points, points + 0.4]
+    query, node = index.query_box(boxes)
+    lower_, upper_ = index.centers - index.half_sizes, index.centers + index.half_sizes
+    overlap = (lower_[None] <= boxes[:, None, 2:]).all(axis=-1) & (upper_[None] >= boxes[:, None, :2]).all(axis=-1)
+    assert set(zip(query, node)) == set(zip(*np.nonzero(overlap)))
+
+    distances, nodes = index.nearest(points, k=3)
+    for p, d, n in zip(points, distances, nodes):
+        d_all = index.box_distance(np.repeat(p[None], len(index), axis=0), np.arange(len(index)))
+        assert np.allclose(d, np.sort(d_all)[:3]) and np.allclose(d_all[n], d)
+
+    hits = index.hit(index.centers[[3, 7]])
+    assert hits[0] >= 3 and hits[1] >= 7
+    assert index.hit([[-5, -5]])[0] == -1
+
+    # boxes added one by one are found before and after the tree is rebuilt.
+    full = index
+    index = SpatialIndex(lower[:300], full.centers[:300] + full.half_sizes[:300])
+    for i in range(300, 500):
+        index.add(lower[i:i + 1], full.centers[i:i + 1] + full.half_sizes[i:i + 1])
+        if i in [310, 499]:
+            assert index._num_tree < len(index)
+            query, node = index.query_radius(points, 0.3)
+            assert set(zip(query, node)) == {(q, n) for q, n in _brute_radius(full, points, 0.3) if n <= i}
+            d, n = index.nearest(points, k=3)
+            assert np.allclose(d, np.sort(full.box_distance(np.repeat(points, i + 1, axis=0),
+                np.tile(np.arange(i + 1), len(points))).reshape(len(points), -1), axis=1)[:, :3])
+    assert index._num_tree > 300
+
+
+def test_store_index():
+    fig, ax = plt.subplots()
+    store = NodeStore()
+    circles = NodeBrush('nn.input', ax, size='small', store=store) >> np.c_[np.arange(5), np.zeros(5)]
+    box = NodeBrush('tn.mpo', ax, store=store) >> (2, 2)
+    assert len(store.index) == 6
+    assert list(store.index.hit([(1.1, 0.1), (2.25, 2.25), (2.5, 2.5), (0.5, 0)])) == [1, 5, -1, -1]
+    assert store.index.hit([box.position])[0] == box.index
+    # the index is kept up to date as nodes are placed.
+    index = store.index
+    brush = NodeBrush('tn.mpo', ax, store=store)
+    brush >> (0, 5)
+    assert store.index is index and store.index.hit([(0, 5)])[0] == 6
+    # single nodes of a brush share a collection.
+    for i in range(100):
+        brush >> (i, 7)
+    assert store.index is index and list(store.index.hit([(0, 7), (99, 7)])) == [7, 106]
+    assert len(store.collections) == 3 and len(ax.collections[-1].get_paths()) == 101
+    assert list(store.slots[-3:]) == [98, 99, 100]
+    brush.color = 'red'
+    assert (brush >> (0, 9)).slot == 0 and len(store.collections) == 4
+    plt.close(fig)
@@ -0,0 +1,76 @@
+import io
+import numpy as np
+from numpy.testing import assert_raises
+from xml.etree import ElementTree
+
+from ..canvas import Canvas
+from ..brush import NodeBrush, EdgeBrush, CLinkBrush, CurveBrush
+from ..scene import Scene
+from ..svg import write_svg
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def _scene(num_node):
+    rng = np.random.RandomState(2)
+    scene = Scene()
+    nodes = scene.add_nodes(NodeBrush('nn.convolution', size='small'), rng.random_sample([num_node, 2]) * 10)
+    mpo = scene.add_nodes(NodeBrush('tn.mpo'), [[0, 11], [2, 11]])
+    scene.add_edges(EdgeBrush('->-'), nodes[:num_node // 2], nodes[num_node // 2:])
+    scene.add_edges(EdgeBrush('=', lw=2), mpo[0], mpo[1])
+    scene.add_edges(CLinkBrush('<-', roundness=0.1), mpo[0], mpo[1])
+    scene.add_text(mpo, ['A', 'B<1>'], 'top')
+    return scene
+
+
+def test_write_svg():
+    scene = _scene(100)
+    f = io.StringIO()
+    write_svg(scene, f)
+    root = ElementTree.fromstring(f.getvalue())
+
+    # a symbol for each node brush, shared by nodes.
+    symbols = root.findall('%sdefs/%ssymbol' % (SVG, SVG))
+    assert len(symbols) == 2
+    # the convolution node has an inner circle.
+    assert len(symbols[0]) == 2
+    assert len(root.findall('%suse' % SVG)) == 102
+    texts = root.findall('%stext' % SVG)
+    assert [t.text for t in texts] == ['A', 'B<1>']
+
+    # nodes are inside the view box, with y axis flipped.
+    width, height = [float(v) for v in root.get('viewBox').split()[2:]]
+    xy = np.array([[float(u.get('x')), float(u.get('y'))] for u in root.findall('%suse' % SVG)])
+    assert (xy > 0).all() and (xy < [width, height]).all()
+    assert np.allclose(xy[-2:, 1], xy[-2, 1]) and xy[-1, 1] < xy[0:100, 1].min()
+    txy = np.array([[float(t.get('x')), float(t.get('y'))] for t in texts])
+    assert (txy > 0).all() and (txy < [width, height]).all()
+
+
+def test_svg_size():
+    scene = _scene(2000)
+    f = io.StringIO()
+    write_svg(scene, f)
+    canvas = Canvas()
+    scene.render(canvas)
+    f_mpl = io.StringIO()
+    canvas.savefig(f_mpl, format='svg')
+    assert len(f.getvalue()) * 3 < len(f_mpl.getvalue())
+
+
+def test_svg_style():
+    # translucent nodes without outlines.
+    scene = Scene()
+    nodes = scene.add_nodes(NodeBrush('nn.input', color=(1, 0, 0, 0.5), lw=0), [[0, 0], [1, 1]])
+    f = io.StringIO()
+    write_svg(scene, f)
+    path = ElementTree.fromstring(f.getvalue()).find('%sdefs/%ssymbol/%spath' % (SVG, SVG, SVG))
+    assert path.get('fill-opacity') == '0.5' and path.get('stroke') == 'none' and path.get('stroke-opacity') is None
+
+    # edges of curve brushes are not recorded.
+    assert_raises(TypeError, scene.add_edges, CurveBrush('->'), nodes[0], nodes[1])
+
+    # double C links are not drawn by matplotlib, nor written to SVG.
+    scene.add_edges(CLinkBrush('='), nodes[0], nodes[1])
+    assert_raises(NotImplementedError, scene.render, Canvas())
+    assert_raises(NotImplementedError, write_svg, scene, io.StringIO())
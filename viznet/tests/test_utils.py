@@ -1,5 +1,5 @@
 import numpy as np
-from numpy.testing import dec, assert_, assert_raises, assert_almost_equal, assert_allclose
+from numpy.testing import assert_, assert_raises, assert_almost_equal, assert_allclose
 import matplotlib.pyplot as plt
 from matplotlib import patches
 from matplotlib.collections import PatchCollection
@@ -22,6 +22,17 @@ def test_intersection():
     res = intersection(ring, theta, align=(-0.5, 0))
     assert_allclose(res, (0, 0.5))
 
+def test_intersection_batch():
+    ring = np.array([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)])
+    thetas = np.arange(4) * np.pi / 2.
+    res = intersection(ring, thetas, align=(0.5, 0.5))
+    assert_allclose(res, [(1, 0.5), (0.5, 1), (0, 0.5), (0.5, 0)], atol=1e-12)
+    # many nodes with their own outlines and angles.
+    rings = np.stack([ring, ring + 2])
+    res = intersection(rings, [np.pi / 2., np.pi], align=[(0.2, 0.5), (2.5, 2.3)])
+    assert_allclose(res, [(0.2, 1), (2, 2.3)])
+    assert_raises(Exception, intersection, ring, 0, (5, 5))
+
 def test_rounded_path():
     vertices = np.array([(0, 0), (1, 0), (1, 1), (0, 1)])
     path = shapes.rounded_path(vertices, 0.1)
@@ -35,6 +46,20 @@ def test_rounded_path():
     plt.ylim(-1,5)
     plt.show()
 
+def test_unit_path_cache():
+    shapes.unit_path.cache_clear()
+    for i in range(3):
+        p1 = shapes.triangle((i, 0), 0.3, 0, 0.03)[0].get_path()
+        p2 = shapes.triangle((i, 1), 0.6, 0, 0.06)[0].get_path()
+    info = shapes.unit_path.cache_info()
+    assert_(info.misses == 1 and info.hits == 5)
+    # rounded in absolute units, the same as rounding the placed vertices.
+    vertices = shapes.affine(np.asarray(shapes._UNIT_VERTICES['triangle'][0]), (2, 1), 0.6, 0)
+    assert_allclose(p2.vertices, shapes.rounded_path(vertices, 0.06, close=True).vertices)
+    # ragged sub-paths.
+    path = shapes.measure((0, 0), 0.3, 0, 0)[0].get_path()
+    assert_(len(path.vertices) == 102)
+
 def test_shapes():
     kwargs = {'ls':'--', 'lw':0.5, 'zorder':1, 'facecolor':'r', 'edgecolor': 'g'}
     plt.ion()
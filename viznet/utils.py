@@ -1,7 +1,30 @@
 import numpy as np
-import pdb
 
-from scipy.interpolate import interp1d
+def gca():
+    '''
+    get the current axes, `matplotlib.pyplot` is imported on the first call.
+
+    Returns:
+        :obj:`Axes`: matplotlib Axes instance.
+    '''
+    import matplotlib.pyplot as plt
+    return plt.gca()
+
+def get_ax(ax=None):
+    '''
+    resolve the axes to draw on.
+
+    Args:
+        ax (:obj:`Axes`|:obj:`Canvas`|None): axes, a canvas (draw on its axes) or None (the current axes of pyplot).
+
+    Returns:
+        :obj:`Axes`: matplotlib Axes instance.
+    '''
+    if ax is None:
+        return gca()
+    if hasattr(ax, 'add_patch'):
+        return ax
+    return ax.ax
 
 def rotate(vec, theta):
     '''
@@ -23,54 +46,37 @@ def intersection(line, theta, align):
     '''
     get the intersection point from direction specified by theta.
 
+    All arguments broadcast over leading dimensions, e.g. to intersect
+    many angles with one outline, or one angle with the outlines of many nodes.
+
     Args:
-        line (2darray): an array of points.
-        theta (float): direction of the intersection line.
-        align (len-2 tuple): align to this point in the free dimension.
+        line (2darray): an array of points, with shape (..., num_point, 2).
+        theta (float|ndarray): direction of the intersection line, with shape (...).
+        align (len-2 tuple|ndarray): align to this point in the free dimension, with shape (..., 2).
 
     Returns:
-        tuple: the nearest intersection point.
+        ndarray: the farthest intersection point along theta, with shape (..., 2).
     '''
-    def trans(line, theta):
-        return rotate(line, - theta)[...,::-1]
-
-    def trans_r(line, theta):
-        return rotate(np.asarray(line)[...,::-1], theta)
-
-    # rotate to y-axis
-    rotated_line = trans(line, theta)
-    rotated_xy = trans(align, theta)
-
-    # get segments
-    p_pre = rotated_line[0]
-    segment = [p_pre]
-    segments = []
-    direction_pre = 0
-    for p in rotated_line[1:]:
-        direction = 1 if p[0] > p_pre[0] else -1
-        if direction * direction_pre < 0:
-            segments.append(segment)
-            segment = [p_pre, p]
-        else:
-            segment.append(p)
-        direction_pre = direction
-        p_pre = p
-    segments.append(segment)
-
-    # intersect segments
-    x = rotated_xy[0]
-    ys = []
-    for segment in segments:
-        x_, y_ = np.array(segment).T
-        f = interp1d(x_, y_)
-        try:
-            ys.append(f(x))
-        except:
-            pass
-
-    # interpolate x
-    if len(ys) == 0:
+    line = np.asarray(line, dtype='float64')
+    theta = np.asarray(theta, dtype='float64')
+    align = np.asarray(align, dtype='float64')
+    uvec = np.stack([np.cos(theta), np.sin(theta)], axis=-1)[..., None, :]
+    vvec = uvec[..., ::-1] * [-1, 1]
+
+    # signed distance to the intersection line, and projection along it, of segment ends.
+    start = line[..., :-1, :] - align[..., None, :]
+    stop = line[..., 1:, :] - align[..., None, :]
+    dstart, dstop = (start * vvec).sum(axis=-1), (stop * vvec).sum(axis=-1)
+    pstart, pstop = (start * uvec).sum(axis=-1), (stop * uvec).sum(axis=-1)
+
+    # segments parallel to the line can only hit it by lying on it.
+    parallel = dstart == dstop
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(parallel, 0., dstart / (dstart - dstop))
+    hit = np.where(parallel, dstart == 0, (t >= 0) & (t <= 1))
+    proj = np.where(parallel, np.maximum(pstart, pstop), pstart + t * (pstop - pstart))
+    proj = np.where(hit, proj, -np.inf).max(axis=-1)
+
+    if not np.all(np.isfinite(proj)):
         raise Exception('Can not find connection point!')
-    index = np.argmax(ys)
-    p = trans_r([x, ys[index]], theta)
-    return p
+    return align + proj[..., None] * uvec[..., 0, :]